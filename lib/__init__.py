@@ -1,8 +1,24 @@
-from .system_info import SystemInfo
-from .result import BenchmarkResult
-from .analysis import analyze_performance, print_results
-from .runner import run_benchmark, main as run_benchmark_main
-from .utils import Colors
+import importlib
+
+# Exports are imported on first use, so `import lib` (and the menu) starts
+# without pulling in ollama, numpy and the hardware probes
+_EXPORTS = {
+    'SystemInfo': ('.system_info', 'SystemInfo'),
+    'BenchmarkResult': ('.result', 'BenchmarkResult'),
+    'analyze_performance': ('.analysis', 'analyze_performance'),
+    'print_results': ('.analysis', 'print_results'),
+    'run_benchmark': ('.runner', 'run_benchmark'),
+    'run_benchmark_main': ('.runner', 'main'),
+    'Colors': ('.utils', 'Colors'),
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attribute = _EXPORTS[name]
+    value = getattr(importlib.import_module(module, __name__), attribute)
+    globals()[name] = value
+    return value
 
 __all__ = [
     'SystemInfo',
@@ -1,40 +1,429 @@
+# Thresholds for analyze_performance
+LOW_GPU_UTILIZATION = 0.7
+PREFILL_BOUND_SHARE = 0.5    # Share of server time spent in prompt evaluation
+CPU_BOUND_SHARE = 0.8        # Ollama CPU time as a share of the physical cores
+IDLE_GPU_UTILIZATION = 0.3
+THROTTLE_TEMPERATURE = 83    # °C; most GPUs start lowering clocks around here
+THROTTLE_SLOWDOWN = 0.10     # Decode speed drop from the first to the last third of requests
+MEMORY_PRESSURE = 90         # Peak system memory use, in percent
+THROTTLE_SHARE = 0.05        # Share of samples with a limiting throttle reason worth reporting
+
+def _slowdown(speeds):
+    """Relative decode speed drop from the first to the last third of the run"""
+    if len(speeds) < 6:
+        return None
+    third = len(speeds) // 3
+    first = sum(speeds[:third]) / third
+    last = sum(speeds[-third:]) / third
+    return (first - last) / first if first > 0 else None
+
 def analyze_performance(results):
     """Generate performance insights from benchmark results"""
     insights = []
     
     for result in results:
         model = result["model_name"]
-        speeds = result["speeds"]
-        res_usage = result["system"]["resources"]
+        res_usage = result["system"]["resources"] or {}
+        specs = result["system"]["specs"] or {}
+        server = result.get("server") or {}
+        gpu = res_usage.get("gpu")
+        process = res_usage.get("process")
+
+        # Where the server spends its time: prompt processing or generation
+        prefill = server.get("prompt_eval_duration", 0)
+        decode = server.get("eval_duration", 0)
+        if prefill + decode > 0:
+            share = prefill / (prefill + decode)
+            if share >= PREFILL_BOUND_SHARE:
+                insights.append(f"{model}: Prefill-bound ({share:.0%} of server time in prompt evaluation), "
+                                f"prompt length dominates; try a larger num_batch or prompt caching")
+            else:
+                insights.append(f"{model}: Decode-bound ({1 - share:.0%} of server time generating tokens), "
+                                f"limited by memory bandwidth")
         
         # Analyze resource utilization
-        if res_usage and res_usage.get("gpu"):
-            gpu_efficiency = res_usage["gpu"]["load"]["mean"] / 100
-            if gpu_efficiency < 0.7:
+        if gpu:
+            gpu_efficiency = gpu["load"]["mean"] / 100
+            if gpu_efficiency < LOW_GPU_UTILIZATION:
                 insights.append(f"{model}: Low GPU utilization ({gpu_efficiency:.1%})")
+
+        cores = (specs.get("cpu") or {}).get("cores") or (specs.get("cpu") or {}).get("threads")
+        if process and cores:
+            cpu_share = process["cpu"]["mean"] / (100 * cores)
+            if cpu_share >= CPU_BOUND_SHARE and (not gpu or gpu["load"]["mean"] / 100 < IDLE_GPU_UTILIZATION):
+                insights.append(f"{model}: CPU-bound (Ollama busy on {cpu_share:.0%} of {cores} cores, "
+                                + ("GPU mostly idle)" if gpu else "no GPU in use)"))
+
+        # Clock limits reported by the driver (NVML throttle reasons)
+        for device in res_usage.get("devices", []):
+            reasons = {reason: share for reason, share in (device.get("throttle") or {}).items()
+                       if share >= THROTTLE_SHARE}
+            if reasons:
+                described = ", ".join(f"{reason} {share:.0%}" for reason, share in reasons.items())
+                insights.append(f"{model}: {device['name']} clocks were limited ({described} of samples)")
+
+        # Thermal throttling shows up as decode speed sagging while the GPU runs hot
+        slowdown = _slowdown((result.get("samples") or {}).get("response_speed") or [])
+        if gpu and gpu["temperature"]["max"] >= THROTTLE_TEMPERATURE:
+            drop = f", decode speed fell {slowdown:.0%} over the run" if slowdown and slowdown > 0 else ""
+            insights.append(f"{model}: Possible thermal throttling (GPU reached "
+                            f"{gpu['temperature']['max']:.0f}°C{drop})")
+        elif slowdown is not None and slowdown >= THROTTLE_SLOWDOWN:
+            insights.append(f"{model}: Decode speed fell {slowdown:.0%} from the first to the last requests "
+                            f"(thermal or power throttling?)")
+
+        # Memory pressure: swapping on the host, or a model that doesn't fit in VRAM
+        memory = res_usage.get("memory")
+        if memory and memory["max"] >= MEMORY_PRESSURE:
+            insights.append(f"{model}: Memory pressure (system memory peaked at {memory['max']:.0f}% used)")
+        load = result.get("load") or {}
+        if load.get("resident_size") and load.get("resident_vram", 0) < load["resident_size"]:
+            offloaded = load.get("resident_vram", 0) / load["resident_size"]
+            if offloaded > 0:
+                insights.append(f"{model}: Only {offloaded:.0%} of the model fits in VRAM, "
+                                f"the rest runs on the CPU")
             
     return insights
 
+def print_insights(insights):
+    """Print the findings of analyze_performance"""
+    from .utils import Colors
+
+    if not insights:
+        return
+    print(f"\n{Colors.BOLD}Performance Insights:{Colors.END}")
+    for insight in insights:
+        print(f"  - {insight}")
+    print()
+
 def print_results(avg_result):
     """Print benchmark results in a formatted way"""
     from .utils import Colors
 
     print(f"\n{Colors.BOLD}Model: {Colors.CYAN}{avg_result['model_name']}{Colors.END}\n")
+
+    # Embedding models are only swept through ollama.embed, nothing is generated
+    generation = not avg_result.get('embeddings')
     
     # Speed Metrics
-    print(f"{Colors.BOLD}Speed Metrics:{Colors.END}")
-    print(f"  Prompt Evaluation:    {Colors.GREEN}{avg_result['speeds']['prompt_eval']:.2f} t/s{Colors.END}")
-    print(f"  Response Generation:  {Colors.GREEN}{avg_result['speeds']['response']:.2f} t/s{Colors.END}")
-    print(f"  Total Speed:          {Colors.GREEN}{avg_result['speeds']['total']:.2f} t/s{Colors.END}\n")
+    if generation:
+        print(f"{Colors.BOLD}Speed Metrics:{Colors.END}")
+        print(f"  Prompt Evaluation:    {Colors.GREEN}{avg_result['speeds']['prompt_eval']:.2f} t/s{Colors.END}")
+        print(f"  Response Generation:  {Colors.GREEN}{avg_result['speeds']['response']:.2f} t/s{Colors.END}")
+        print(f"  Total Speed:          {Colors.GREEN}{avg_result['speeds']['total']:.2f} t/s{Colors.END}\n")
     
-    # Token Statistics
-    print(f"{Colors.BOLD}Token Statistics:{Colors.END}")
-    print(f"  Prompt Tokens:        {Colors.GREEN}{avg_result['performance']['prompt_tokens']:.0f}{Colors.END}")
-    print(f"  Response Tokens:      {Colors.GREEN}{avg_result['performance']['response_tokens']:.0f}{Colors.END}\n")
+        # Token Statistics
+        print(f"{Colors.BOLD}Token Statistics:{Colors.END}")
+        print(f"  Prompt Tokens:        {Colors.GREEN}{avg_result['performance']['prompt_tokens']:.0f}{Colors.END}")
+        print(f"  Response Tokens:      {Colors.GREEN}{avg_result['performance']['response_tokens']:.0f}{Colors.END}\n")
     
     # Timing Metrics
     print(f"{Colors.BOLD}Timing Metrics:{Colors.END}")
     print(f"  Model Load:           {Colors.GREEN}{avg_result['performance']['model_load_time']:.2f}s{Colors.END}")
-    print(f"  Prompt Evaluation:    {Colors.GREEN}{avg_result['performance']['prompt_eval_time']:.2f}s{Colors.END}")
-    print(f"  Response Generation:  {Colors.GREEN}{avg_result['performance']['response_time']:.2f}s{Colors.END}")
+    if avg_result.get('load'):
+        load = avg_result['load']
+        print(f"  Warm Load:            {Colors.GREEN}{load['warm_load_time']:.2f}s{Colors.END}")
+        print(f"  Load Throughput:      {Colors.GREEN}{load['load_throughput'] / (1024 * 1024):.1f} MB/s{Colors.END}"
+              f" ({load['model_size'] / (1024 * 1024 * 1024):.1f} GB"
+              f"{', page cache dropped' if load['page_cache_dropped'] else ''})")
+        rss = f"{load['resident_memory_delta'] / (1024 * 1024):+.0f} MB" if load['resident_memory_delta'] is not None else "n/a"
+        print(f"  Resident Memory:      {Colors.GREEN}{rss}{Colors.END} RSS,"
+              f" {Colors.GREEN}{load['resident_vram'] / (1024 * 1024):.0f} MB{Colors.END} VRAM")
+    if generation:
+        print(f"  Prompt Evaluation:    {Colors.GREEN}{avg_result['performance']['prompt_eval_time']:.2f}s{Colors.END}")
+        print(f"  Response Generation:  {Colors.GREEN}{avg_result['performance']['response_time']:.2f}s{Colors.END}")
+    if avg_result.get('pull') and avg_result['pull']['mb_per_second']:
+        pull = avg_result['pull']
+        print(f"  Pull (not timed):     {Colors.GREEN}{pull['mb_per_second']:.1f} MB/s{Colors.END} "
+              f"({pull['downloaded'] / (1024 * 1024):.0f} MB in {pull['duration']:.1f}s)")
     print(f"  Total Time:           {Colors.GREEN}{avg_result['performance']['total_time']:.2f}s{Colors.END}\n")
+    
+    # Latency Metrics
+    if generation and avg_result.get('latency'):
+        ttft = avg_result['latency']['ttft']
+        itl = avg_result['latency']['inter_token']
+        print(f"{Colors.BOLD}Latency Metrics:{Colors.END}")
+        print(f"  Time To First Token:  {Colors.GREEN}{ttft['p50'] * 1000:.1f} ms{Colors.END} p50, "
+              f"{Colors.GREEN}{ttft['p95'] * 1000:.1f} ms{Colors.END} p95, {Colors.GREEN}{ttft['p99'] * 1000:.1f} ms{Colors.END} p99")
+        print(f"  Inter-Token Latency:  {Colors.GREEN}{itl['p50'] * 1000:.1f} ms{Colors.END} p50, "
+              f"{Colors.GREEN}{itl['p95'] * 1000:.1f} ms{Colors.END} p95, {Colors.GREEN}{itl['p99'] * 1000:.1f} ms{Colors.END} p99\n")
+    
+    # Energy per token
+    if avg_result.get('energy'):
+        energy = avg_result['energy']
+        print(f"{Colors.BOLD}Energy:{Colors.END}")
+        if energy['prompt_tokens_per_joule']:
+            print(f"  Prompt Evaluation:    {Colors.GREEN}{energy['prompt_tokens_per_joule']:.2f} tokens/J{Colors.END} "
+                  f"({energy['prefill_j']:.1f} J)")
+        if energy['tokens_per_joule']:
+            print(f"  Response Generation:  {Colors.GREEN}{energy['tokens_per_joule']:.2f} tokens/J{Colors.END} "
+                  f"({energy['decode_j']:.1f} J, {1 / energy['tokens_per_joule']:.3f} J/token)")
+        for device in avg_result['system']['resources'].get('devices', []):
+            if device.get('power_w'):
+                clock = f", {device['sm_clock_mhz']['mean']:.0f} MHz" if device.get('sm_clock_mhz') else ""
+                print(f"  {device['name'][:20] + ':':<22}{Colors.GREEN}{device['power_w']['mean']:.0f} W{Colors.END} mean, "
+                      f"{device['power_w']['max']:.0f} W peak{clock}")
+        print()
+    
+    # Repetition statistics
+    statistics = avg_result.get('statistics') or {}
+    if statistics.get('response_speed'):
+        repetitions = avg_result.get('repetitions', {})
+        print(f"{Colors.BOLD}Statistics ({repetitions.get('measured', 0)} repetitions, {repetitions.get('warmup', 0)} warm-up):{Colors.END}")
+        for metric, label, unit in (("prompt_eval_speed", "Prompt Evaluation", "t/s"),
+                                    ("response_speed", "Response Generation", "t/s"),
+                                    ("ttft", "Time To First Token", "s")):
+            summary = statistics.get(metric)
+            if not summary:
+                continue
+            ci = f" [{summary['ci_low']:.2f}, {summary['ci_high']:.2f}]" if summary['ci_low'] is not None else ""
+            print(f"  {label + ':':<22}{Colors.GREEN}{summary['mean']:.2f} {unit}{Colors.END} "
+                  f"± {summary['std']:.2f} (median {summary['median']:.2f}){ci}")
+        print()
+    
+    # Concurrency sweep
+    if avg_result.get('concurrency'):
+        print(f"{Colors.BOLD}Concurrency Sweep:{Colors.END}")
+        print(f"  {'Level':>5}  {'Requests':>8}  {'Aggregate':>12}  {'p50':>8}  {'p95':>8}  {'p99':>8}")
+        for level in avg_result['concurrency']['levels']:
+            latency = level['latency']
+            print(f"  {level['concurrency']:>5}  {level['requests']:>8}  "
+                  f"{Colors.GREEN}{level['aggregate_tokens_per_second']:>8.2f} t/s{Colors.END}  "
+                  f"{latency['p50']:>7.2f}s  {latency['p95']:>7.2f}s  {latency['p99']:>7.2f}s")
+        print(f"  Saturation Point:     {Colors.GREEN}{avg_result['concurrency']['saturation_level']} concurrent requests{Colors.END}\n")
+    
+    # Context-length scaling
+    if avg_result.get('context_sweep'):
+        print(f"{Colors.BOLD}Context Scaling:{Colors.END}")
+        print(f"  {'Context':>8}  {'Output':>6}  {'Prefill':>12}  {'Decode':>12}  {'TTFT':>8}  {'KV Growth':>10}")
+        for point in avg_result['context_sweep']:
+            growth = point['gpu_memory_growth_mb']
+            if growth is None:
+                growth = point['process_rss_growth_mb']
+            growth = f"{growth:+.0f} MB" if growth is not None else "n/a"
+            print(f"  {point['prompt_tokens']:>8.0f}  {point['response_tokens']:>6.0f}  "
+                  f"{Colors.GREEN}{point['prefill_speed']:>8.2f} t/s{Colors.END}  "
+                  f"{Colors.GREEN}{point['decode_speed']:>8.2f} t/s{Colors.END}  "
+                  f"{point['ttft']:>7.2f}s  {growth:>10}")
+        print()
+    
+    # Embedding throughput sweep
+    if avg_result.get('embeddings'):
+        sweep = avg_result['embeddings']
+        print(f"{Colors.BOLD}Embeddings ({sweep['dimensions']} dimensions, "
+              f"{sweep['documents_per_point']} documents per point):{Colors.END}")
+        print(f"  {'Input':>6}  {'Batch':>5}  {'Conc':>4}  {'Documents':>12}  {'Tokens':>12}  "
+              f"{'p50':>8}  {'p99':>8}  {'Memory':>9}")
+        for point in sweep['points']:
+            memory = point['gpu_memory_mb'] if point['gpu_memory_mb'] is not None else point['process_rss_mb']
+            memory = f"{memory:.0f} MB" if memory is not None else "n/a"
+            errors = f"  ({point['errors']} failed)" if point['errors'] else ""
+            print(f"  {point['input_tokens']:>6}  {point['batch_size']:>5}  {point['concurrency']:>4}  "
+                  f"{Colors.GREEN}{point['documents_per_second']:>6.1f} doc/s{Colors.END}  "
+                  f"{Colors.GREEN}{point['tokens_per_second']:>8.0f} t/s{Colors.END}  "
+                  f"{point['latency']['p50'] * 1000:>5.0f} ms  {point['latency']['p99'] * 1000:>5.0f} ms  "
+                  f"{memory:>9}{errors}")
+        for best in sweep['best']:
+            label = f"Best at {best['input_tokens']} tokens:"
+            print(f"  {label:<22}{Colors.GREEN}batch {best['batch_size']}, "
+                  f"concurrency {best['concurrency']}{Colors.END} ({best['documents_per_second']:.1f} doc/s)")
+        print()
+
+    # Prompt cache reuse
+    if avg_result.get('prompt_cache'):
+        cache = avg_result['prompt_cache']
+        print(f"{Colors.BOLD}Prompt Cache ({cache['families']} prefix families x {cache['variants']} prompts):{Colors.END}")
+        print(f"  {'Prefix':>7}  {'Unique':>8}  {'Shared':>8}  {'Interleaved':>11}  {'Reduction':>9}  "
+              f"{'Prefill':>8}  {'Cached':>7}")
+        for point in cache['prefixes']:
+            shared = point['shared']
+            reduction = f"{shared['ttft_reduction']:.0%}" if shared['ttft_reduction'] is not None else "n/a"
+            speedup = f"{shared['prefill_speedup']:.1f}x" if shared['prefill_speedup'] is not None else "n/a"
+            cached = f"{shared['cached_share']:.0%}" if shared['cached_share'] is not None else "n/a"
+            print(f"  {point['prefix_tokens']:>7}  {point['unique']['ttft'] * 1000:>5.0f} ms  "
+                  f"{Colors.GREEN}{shared['ttft'] * 1000:>5.0f} ms{Colors.END}  "
+                  f"{point['interleaved']['ttft'] * 1000:>8.0f} ms  {reduction:>9}  {speedup:>8}  {cached:>7}")
+        if cache.get('conversation'):
+            conversation = cache['conversation']
+            print(f"  Multi-turn chat ({conversation['system_tokens']}-token system prompt):")
+            print(f"  {'Turn':>7}  {'History':>8}  {'Warm':>8}  {'Cold':>8}  {'Reduction':>9}")
+            for turn in conversation['turns']:
+                reduction = f"{turn['ttft_reduction']:.0%}" if turn['ttft_reduction'] is not None else "n/a"
+                print(f"  {turn['turn']:>7}  {turn['history_tokens']:>8}  "
+                      f"{Colors.GREEN}{turn['warm_ttft'] * 1000:>5.0f} ms{Colors.END}  "
+                      f"{turn['cold_ttft'] * 1000:>5.0f} ms  {reduction:>9}")
+        print()
+
+    # Open-loop load test
+    if avg_result.get('open_loop'):
+        load = avg_result['open_loop']
+        source = f"replay of {load['trace']['path']} at {load['trace']['speedup']:g}x, " if load.get('trace') else ""
+        print(f"{Colors.BOLD}Open-Loop Load ({source}{load['rate']:.2f} req/s offered, "
+              f"SLO TTFT <= {load['slo']['ttft'] * 1000:.0f} ms, ITL p99 <= {load['slo']['itl_p99'] * 1000:.0f} ms):{Colors.END}")
+        print(f"  Requests:             {Colors.GREEN}{load['requests']}{Colors.END} ({load['errors']} errors)")
+        print(f"  Throughput:           {Colors.GREEN}{load['throughput']:.2f} req/s{Colors.END}, "
+              f"{Colors.GREEN}{load['tokens_per_second']:.2f} t/s{Colors.END}")
+        print(f"  Goodput:              {Colors.GREEN}{load['goodput']:.2f} req/s{Colors.END} "
+              f"({load['slo_attainment']:.1%} within SLO)")
+        print(f"  TTFT:                 {Colors.GREEN}{load['ttft']['p50'] * 1000:.0f} ms{Colors.END} p50, "
+              f"{Colors.GREEN}{load['ttft']['p99'] * 1000:.0f} ms{Colors.END} p99")
+        print(f"  Queueing Delay:       {Colors.GREEN}{load['queue_delay']['p50'] * 1000:.0f} ms{Colors.END} p50, "
+              f"{Colors.GREEN}{load['queue_delay']['p99'] * 1000:.0f} ms{Colors.END} p99")
+        if load.get('search'):
+            best = load['search']['max_sustainable_rate']
+            best = f"{best:.2f} req/s" if best is not None else "none of the probed rates"
+            print(f"  Max Sustainable Rate: {Colors.GREEN}{best}{Colors.END} "
+                  f"(>= {load['search']['attainment_target']:.0%} of requests within SLO)")
+        print()
+
+def print_comparison(baseline, candidate, comparisons):
+    """Print a metric-by-metric comparison of two stored runs"""
+    from .utils import Colors
+
+    print(f"\n{Colors.BOLD}Model: {Colors.CYAN}{candidate['model']}{Colors.END} "
+          f"({baseline['run_id']} -> {candidate['run_id']}, prompt set {candidate['prompt_set']})")
+    if not comparisons:
+        print(f"  {Colors.WARNING}No per-request samples to compare{Colors.END}")
+        return
+    print(f"  {'Metric':<20} {'Baseline':>10} {'Candidate':>10} {'Change':>8}")
+    for comparison in comparisons:
+        if comparison['regression']:
+            status = f"{Colors.FAIL}REGRESSION{Colors.END}"
+        elif comparison['improvement']:
+            status = f"{Colors.GREEN}improved{Colors.END}"
+        elif comparison['significant']:
+            status = "significant, below threshold"
+        else:
+            status = "not significant"
+        print(f"  {comparison['metric']:<20} {comparison['baseline']:>10.2f} {comparison['candidate']:>10.2f} "
+              f"{comparison['change']:>+8.1%}  {status}")
+
+def print_history(runs):
+    """Print stored runs as a table, newest first"""
+    from .utils import Colors
+
+    print(f"\n{Colors.BOLD}{'Run':<16} {'Model':<24} {'Digest':<12} {'Host':<16} {'Prompt':>9} {'Response':>9} {'TTFT p50':>9}{Colors.END}")
+    for run in runs:
+        print(f"{run['run_id']:<16} {run['model']:<24} {(run['model_digest'] or '')[:12]:<12} "
+              f"{run['host_fingerprint'] or '':<16} {run['prompt_eval_speed'] or 0:>9.2f} "
+              f"{run['response_speed'] or 0:>9.2f} {run['ttft_p50'] or 0:>9.3f}")
+
+def print_host_comparison(results):
+    """Print one row per model and host so heterogeneous nodes can be compared"""
+    from .utils import Colors
+
+    print(f"\n{Colors.BOLD}Host Comparison:{Colors.END}")
+    print(f"  {'Model':<24} {'Host':<28} {'Prompt':>10} {'Response':>10} {'TTFT p50':>9} {'ITL p50':>8} {'Load':>7}")
+    for result in sorted(results, key=lambda r: (r['model_name'], r.get('host') or '')):
+        latency = result.get('latency', {})
+        print(f"  {result['model_name']:<24} {result.get('host') or '':<28} "
+              f"{Colors.GREEN}{result['speeds']['prompt_eval']:>6.2f} t/s{Colors.END} "
+              f"{Colors.GREEN}{result['speeds']['response']:>6.2f} t/s{Colors.END} "
+              f"{latency.get('ttft', {}).get('p50', 0) * 1000:>6.0f} ms "
+              f"{latency.get('inter_token', {}).get('p50', 0) * 1000:>5.1f} ms "
+              f"{result['performance']['model_load_time']:>6.2f}s")
+
+def print_selfbench(report):
+    """Print the harness self-benchmark"""
+    from .utils import Colors
+
+    for mode, label in (("in_process", "In-Process Fake"), ("http", "HTTP Fake")):
+        if mode not in report:
+            continue
+        overhead = report[mode]["overhead"]
+        print(f"\n{Colors.BOLD}Harness Overhead ({label}, {overhead['tokens']} tokens):{Colors.END}")
+        print(f"  Bare Stream Loop:     {Colors.GREEN}{overhead['bare_per_token_us']:.2f} µs/token{Colors.END}")
+        print(f"  Measured Loop:        {Colors.GREEN}{overhead['measured_per_token_us']:.2f} µs/token{Colors.END}")
+        print(f"  Measurement Overhead: {Colors.GREEN}{overhead['overhead_per_token_us']:.2f} µs/token{Colors.END}")
+        print(f"  Result Recording:     {Colors.GREEN}{overhead['record_per_token_us']:.2f} µs/token{Colors.END}")
+        print(f"  Max Measurable Rate:  {Colors.GREEN}{overhead['max_tokens_per_second']:.0f} t/s{Colors.END}")
+
+        if report[mode].get("accuracy"):
+            print(f"\n{Colors.BOLD}Rate Accuracy ({label}):{Colors.END}")
+            for point in report[mode]["accuracy"]:
+                print(f"  {point['configured_tokens_per_second']:>8.0f} t/s configured -> "
+                      f"{Colors.GREEN}{point['measured_tokens_per_second']:>10.1f} t/s{Colors.END} measured "
+                      f"({point['error']:+.2%})")
+    print()
+
+def print_coresidency(result):
+    """Print per-model solo vs shared performance and residency events"""
+    from .utils import Colors
+
+    print(f"\n{Colors.BOLD}Co-Residency ({len(result['models'])} models, up to {result['max_resident']} resident, "
+          f"{result['evictions']} evictions):{Colors.END}")
+    print(f"  {'Model':<24} {'Solo':>12} {'Shared':>12} {'Degradation':>12} {'TTFT p99 solo/shared':>22} {'Swap Stalls':>14}")
+    for model, stats in result['models'].items():
+        solo = stats['solo']
+        shared = stats['shared']
+        degradation = f"{stats['degradation']:.1%}" if stats['degradation'] is not None else "n/a"
+        print(f"  {model:<24} {solo['decode_speed']:>8.2f} t/s {shared['decode_speed']:>8.2f} t/s {degradation:>12} "
+              f"{solo['ttft']['p99']:>9.2f}s/{shared['ttft']['p99']:.2f}s "
+              f"{shared['swap_stalls']:>5} ({shared['swap_stall_time']:.1f}s)")
+    for event in result['events']:
+        colour = Colors.WARNING if event['event'] == 'evict' else Colors.GREEN
+        print(f"  {event['time']:>7.1f}s  {colour}{event['event']:<5}{Colors.END} {event['model']}")
+    print()
+
+def print_pull(pull):
+    """Print the download throughput of a model pull, layer by layer"""
+    from .utils import Colors
+
+    rate = f"{pull['mb_per_second']:.1f} MB/s" if pull['mb_per_second'] else "nothing downloaded"
+    print(f"\n{Colors.BOLD}Pull {pull['model']}:{Colors.END} {pull['downloaded'] / (1024 * 1024):.0f} MB in "
+          f"{pull['duration']:.1f}s ({Colors.GREEN}{rate}{Colors.END})")
+    for layer in pull['layers']:
+        if layer['cached']:
+            speed = "already present"
+        elif layer['mb_per_second']:
+            speed = f"{layer['mb_per_second']:.1f} MB/s"
+        else:
+            speed = "downloaded"
+        print(f"  {layer['digest'].removeprefix('sha256:')[:12]:<14} {layer['size'] / (1024 * 1024):>9.1f} MB  "
+              f"{Colors.GREEN}{speed}{Colors.END}")
+
+def print_storage(results):
+    """Print model sizes next to their blob read throughput"""
+    from .utils import Colors
+
+    def rate(value):
+        return f"{value:>7.0f} MB/s" if value is not None else f"{'n/a':>12}"
+
+    print(f"\n{Colors.BOLD}Model Storage:{Colors.END}")
+    print(f"  {'Model':<28} {'Size':>9}  {'Seq cold':>12} {'Seq cached':>12} {'mmap cold':>12} {'mmap cached':>12}")
+    for result in results:
+        reads = result['reads']
+        size = f"{result['size'] / (1024 * 1024 * 1024):.1f} GB"
+        if not reads:
+            print(f"  {result['model']:<28} {size:>9}  {Colors.WARNING}blobs not found in a local model store{Colors.END}")
+            continue
+        print(f"  {result['model']:<28} {size:>9}  {Colors.GREEN}{rate(reads['sequential']['cold'])} "
+              f"{rate(reads['sequential']['cached'])} {rate(reads['mmap']['cold'])} "
+              f"{rate(reads['mmap']['cached'])}{Colors.END}")
+    directories = {result['reads']['directory'] for result in results if result['reads']}
+    if directories:
+        print(f"  Model store: {', '.join(sorted(directories))}")
+    if any(result['reads'] and not result['reads']['cache_dropped'] for result in results):
+        print(f"  {Colors.WARNING}The page cache could not be dropped here, so cold reads may be cached{Colors.END}")
+    print()
+
+def print_grid(summary):
+    """Print grid cells with their Pareto status and the best configuration per host"""
+    from .utils import Colors
+
+    def describe(point):
+        options = " ".join(f"{k}={v}" for k, v in point['options'].items() if k not in ('temperature', 'top_p'))
+        return f"{point['model']} {options}".strip()
+
+    print(f"\n{Colors.BOLD}Configuration Grid ({len(summary['points'])} cells, * = Pareto-optimal):{Colors.END}")
+    print(f"  {'Configuration':<56} {'Throughput':>12} {'Memory':>10} {'TTFT p50':>9}")
+    for point in sorted(summary['points'], key=lambda p: -p['throughput']):
+        marker = f"{Colors.GREEN}*{Colors.END}" if point['pareto'] else " "
+        memory = f"{point['memory_mb']:.0f} MB" if point['memory_mb'] is not None else "n/a"
+        ttft = f"{point['ttft'] * 1000:.0f} ms" if point['ttft'] is not None else "n/a"
+        print(f"{marker} {describe(point):<56} {point['throughput']:>8.2f} t/s {memory:>10} {ttft:>9}")
+
+    print(f"\n{Colors.BOLD}Best Configuration per Host:{Colors.END}")
+    for host, point in summary['best'].items():
+        print(f"  {host}: {Colors.CYAN}{describe(point)}{Colors.END} ({point['throughput']:.2f} t/s)")
+    print()
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from array import array
+from datetime import datetime
+
+from .utils import convert_numpy
+
+RUNS_DIR = 'results/runs'
+
+NS_PER_SECOND = 1e9
+
+def cell_key(host, cell):
+    """Stable identifier of one (host, model, prompt set, options) benchmark cell"""
+    return json.dumps([host or "", cell["model"], cell["prompt_set"], cell["options"]], sort_keys=True)
+
+class CellCheckpoint:
+    """Checkpointed requests of one cell, keyed by (prompt index, repetition).
+
+    Request times are stored relative to the result's origin (a perf_counter
+    value) and shifted onto the current origin when restored, since
+    perf_counter values don't carry over between processes. Token arrivals
+    go to the binary tokens log rather than the JSON one (see Checkpoint).
+    """
+
+    def __init__(self, checkpoint, key, requests):
+        self.checkpoint = checkpoint
+        self.key = key
+        self.requests = requests
+
+    def completed(self, prompt_index, repetition, origin):
+        saved = self.requests.get((prompt_index, repetition))
+        if saved is None:
+            return None
+        start = origin + saved["start"]
+        if "tokens" in saved:
+            offsets = [t / NS_PER_SECOND for t in self.checkpoint.read_tokens(*saved["tokens"])]
+        else:
+            offsets = saved["token_times"]  # Checkpointed before the tokens log existed
+        return {
+            **{k: v for k, v in saved.items() if k != "tokens"},
+            "start": start,
+            "end": start + saved["latency"],
+            "token_times": [start + offset for offset in offsets]
+        }
+
+    def record(self, prompt_index, repetition, measurement, origin):
+        start = measurement["start"]
+        start_ns = round(start * NS_PER_SECOND)
+        tokens = self.checkpoint.append_tokens(array('q', (t - start_ns for t in measurement["token_ns"])))
+        saved = {
+            **{k: v for k, v in measurement.items() if k not in ("token_ns", "token_times")},
+            "start": start - origin,
+            "end": measurement["end"] - origin,
+            "tokens": tokens
+        }
+        self.requests[(prompt_index, repetition)] = saved
+        self.checkpoint.append({"type": "request", "cell": self.key, "prompt": prompt_index,
+                                "repetition": repetition, "measurement": saved}, sync=False)
+
+class Checkpoint:
+    """Append-only progress log and manifest of one run, in RUNS_DIR/<run_id>/.
+
+    manifest.json holds the arguments the run was started with, and
+    checkpoint.jsonl gets one line per measured request, finished cell and
+    failed cell as it happens. The token arrival offsets of each request
+    (int64 ns since its start) are appended to tokens.bin, which request
+    lines point into. Request lines are flushed, so they survive a crash of
+    the process; cell lines are also fsynced. A crashed or interrupted run
+    is resumed from these (see runner.resume).
+    """
+
+    def __init__(self, run_id, directory=RUNS_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(directory, run_id)
+        self.manifest_path = os.path.join(self.path, 'manifest.json')
+        self.log_path = os.path.join(self.path, 'checkpoint.jsonl')
+        self.tokens_path = os.path.join(self.path, 'tokens.bin')
+        self.lock = threading.Lock()
+        self.manifest = None
+        self.requests = {}
+        self.results = {}
+        self.failures = {}
+        self._file = None
+        self._tokens = None
+
+    @classmethod
+    def create(cls, run_id, arguments, directory=RUNS_DIR):
+        checkpoint = cls(run_id, directory)
+        os.makedirs(checkpoint.path, exist_ok=True)
+        checkpoint.manifest = {
+            "run_id": run_id,
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "status": "running",
+            "arguments": arguments
+        }
+        checkpoint._write_manifest()
+        return checkpoint
+
+    @classmethod
+    def load(cls, run_id, directory=RUNS_DIR):
+        checkpoint = cls(run_id, directory)
+        if not os.path.exists(checkpoint.manifest_path):
+            raise ValueError(f"No checkpointed run '{run_id}' in {directory}")
+        with open(checkpoint.manifest_path, encoding='utf-8') as f:
+            checkpoint.manifest = json.load(f)
+
+        if os.path.exists(checkpoint.log_path):
+            with open(checkpoint.log_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut short by the crash
+                    checkpoint._apply(record)
+        return checkpoint
+
+    def _apply(self, record):
+        if record["type"] == "request":
+            self.requests.setdefault(record["cell"], {})[(record["prompt"], record["repetition"])] = record["measurement"]
+        elif record["type"] == "result":
+            self.results[record["cell"]] = record["result"]
+        elif record["type"] == "failure":
+            self.failures[record["cell"]] = record
+
+    def _write_manifest(self):
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=4, default=convert_numpy)
+        os.replace(tmp, self.manifest_path)
+
+    def append(self, record, sync=True):
+        """Append one record to the log; with `sync`, durably (fsync)"""
+        line = json.dumps(record, default=convert_numpy) + '\n'
+        with self.lock:
+            if self._file is None:
+                self._file = open(self.log_path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def append_tokens(self, offsets):
+        """Append an array('q') of token offsets; returns its (position, count) in tokens.bin"""
+        with self.lock:
+            if self._tokens is None:
+                self._tokens = open(self.tokens_path, 'ab')
+            # Positions are absolute, so offsets a crash left without a request line are never read
+            position = self._tokens.tell() // offsets.itemsize
+            offsets.tofile(self._tokens)
+            self._tokens.flush()
+        return [position, len(offsets)]
+
+    def read_tokens(self, position, count):
+        offsets = array('q')
+        with open(self.tokens_path, 'rb') as f:
+            f.seek(position * offsets.itemsize)
+            offsets.frombytes(f.read(count * offsets.itemsize))
+        return offsets
+
+    def cell(self, key):
+        return CellCheckpoint(self, key, self.requests.setdefault(key, {}))
+
+    def result(self, key):
+        return self.results.get(key)
+
+    def record_result(self, key, result):
+        self.results[key] = result
+        self.append({"type": "result", "cell": key, "result": result})
+
+    def record_failure(self, key, attempts):
+        record = {"type": "failure", "cell": key, "attempts": attempts,
+                  "time": datetime.now().isoformat(timespec='seconds')}
+        self.failures[key] = record
+        self.append(record)
+
+    def close(self, complete=False):
+        if complete:
+            self.manifest["status"] = "failed cells" if self._unresolved() else "complete"
+            self._write_manifest()
+        with self.lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if self._tokens:
+                self._tokens.close()
+                self._tokens = None
+
+    def _unresolved(self):
+        return [key for key in self.failures if key not in self.results]
+
+def list_runs(directory=RUNS_DIR):
+    """Manifests of the checkpointed runs, newest first"""
+    manifests = []
+    for run_id in os.listdir(directory) if os.path.isdir(directory) else []:
+        path = os.path.join(directory, run_id, 'manifest.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                manifests.append(json.load(f))
+    return sorted(manifests, key=lambda manifest: manifest["created_at"], reverse=True)
@@ -0,0 +1,398 @@
+import argparse
+import json
+import sqlite3
+import sys
+
+from .exporter import parse_listen
+from .store import ResultStore, DEFAULT_PATH as DEFAULT_STORE_PATH
+from .utils import Colors
+
+def _parse_option(text):
+    """Parse a KEY=VALUE generation option, decoding JSON values where possible"""
+    key, sep, value = text.partition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got '{text}'")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='ai-bench',
+        description="Measure and compare local LLM performance with Ollama"
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('menu', help="Start the interactive menu (default)")
+
+    run = subparsers.add_parser('run', help="Run a benchmark non-interactively")
+    run.add_argument('--models', nargs='+', help="Models to benchmark (default: all installed)")
+    run.add_argument('--hosts', nargs='+', metavar='HOST',
+                     help="Ollama hosts to benchmark in parallel, e.g. gpu1:11434 http://gpu2:11434")
+    run.add_argument('--prompts-file', help="Text file with one prompt per line, or a JSON list")
+    run.add_argument('--prompt', action='append', dest='prompts', help="Prompt to send (repeatable)")
+    run.add_argument('--matrix', help="TOML/YAML file describing models x prompt sets x options")
+    run.add_argument('--repeat', type=int, help="Measured repetitions of each prompt (default: 1)")
+    run.add_argument('--warmup', type=int, help="Discarded warm-up passes over the prompts (default: 1)")
+    run.add_argument('--ci-target', type=float,
+                     help="Repeat until the 95%% CI of response speed is narrower than this fraction of the mean")
+    run.add_argument('--max-repeat', type=int, help="Upper bound on repetitions with --ci-target (default: 10)")
+    run.add_argument('--concurrency', type=int, nargs='+', help="Concurrency ladder to sweep, e.g. 1 2 4 8")
+    run.add_argument('--context-sweep', type=int, nargs='+', dest='context_lengths', metavar='TOKENS',
+                     help="Prompt lengths in tokens for the scaling sweep, e.g. 128 1024 8192 32768")
+    run.add_argument('--output-lengths', type=int, nargs='+', metavar='TOKENS',
+                     help="num_predict values for the scaling sweep (default: 128)")
+    run.add_argument('--prompt-cache', type=int, nargs='*', metavar='TOKENS',
+                     help="Measure prompt (KV) cache reuse for shared prefixes of these lengths "
+                          "(default: 256 1024 4096)")
+    run.add_argument('--cache-turns', type=int, default=4,
+                     help="Turns of the multi-turn chat in the prompt cache scenario, 0 to skip (default: 4)")
+    run.add_argument('--embeddings', action='store_true',
+                     help="Benchmark the models as embedding models (ollama.embed) instead of generating; "
+                          "--concurrency sets the in-flight batches")
+    run.add_argument('--batch-sizes', type=int, nargs='+', metavar='N',
+                     help="Inputs per embed request to sweep (default: 1 8 32 128)")
+    run.add_argument('--input-lengths', type=int, nargs='+', metavar='TOKENS',
+                     help="Embedding input lengths in tokens to sweep (default: 128 512)")
+    run.add_argument('--documents', type=int, help="Documents embedded per sweep point (default: 256)")
+    run.add_argument('--arrival-rate', type=float,
+                     help="Run an open-loop load test with Poisson arrivals at this many requests/s")
+    run.add_argument('--duration', type=float, default=60, help="Seconds per open-loop run (default: 60)")
+    run.add_argument('--load-output-lengths', type=int, nargs='+', metavar='TOKENS',
+                     help="num_predict values mixed into open-loop requests")
+    run.add_argument('--ttft-slo', type=float, default=0.5, help="TTFT SLO in seconds (default: 0.5)")
+    run.add_argument('--itl-slo', type=float, default=0.1, help="Per-request p99 ITL SLO in seconds (default: 0.1)")
+    run.add_argument('--find-max-rate', action='store_true',
+                     help="Binary-search the maximum arrival rate that meets the SLOs")
+    run.add_argument('--max-rate', type=float, default=32, help="Upper bound for --find-max-rate (default: 32)")
+    run.add_argument('--trace', help="Replay a JSONL/CSV request log (optionally .gz) as open-loop load")
+    run.add_argument('--speedup', type=float, default=1.0,
+                     help="Divide the trace's inter-arrival gaps by this factor (default: 1.0)")
+    run.add_argument('--trace-limit', type=int, help="Replay at most this many trace records")
+    run.add_argument('--trace-models', action='store_true',
+                     help="Send each request to the model named in the trace instead of the benchmarked one")
+    run.add_argument('--option', type=_parse_option, action='append', dest='options', default=[],
+                     metavar='KEY=VALUE', help="Generation option, e.g. num_ctx=4096 (repeatable)")
+    run.add_argument('--drop-cache', action='store_true',
+                     help="Evict model blobs from the page cache before the cold load")
+    run.add_argument('--retries', type=int, default=0, help="Retries for a failed model/cell before skipping it")
+    run.add_argument('--cell-timeout', type=float, help="Seconds after which a model/cell is abandoned")
+    run.add_argument('--request-timeout', type=float, help="Seconds to wait on a silent Ollama request")
+    run.add_argument('--telemetry', nargs='+', metavar='BACKEND',
+                     help="Device telemetry backends: auto (default), nvml, rocm, gputil, rapl, fake or none")
+    run.add_argument('--sample-rate', type=float, default=10, help="Resource samples per second")
+    run.add_argument('--store', default=None, help="Results history database (default: results/results.db)")
+    run.add_argument('--no-store', action='store_true', help="Don't append results to the history database")
+    run.add_argument('--dashboard', action='store_true', help="Show a live dashboard while the benchmark runs")
+    run.add_argument('--metrics-port', type=parse_listen, metavar='[HOST:]PORT',
+                     help="Serve live Prometheus metrics on /metrics (host defaults to 127.0.0.1)")
+    run.add_argument('--metrics-file', help="Periodically write Prometheus metrics to this file (textfile collector)")
+    run.add_argument('--otel', action='store_true', help="Emit an OpenTelemetry span per request (needs opentelemetry)")
+    run.add_argument('-v', '--verbose', action='store_true', help="Echo prompts and responses")
+
+    compare = subparsers.add_parser('compare', help="Flag regressions against a stored baseline")
+    compare.add_argument('--store', default=None, help="Results history database (default: results/results.db)")
+    compare.add_argument('--model', help="Only compare this model")
+    compare.add_argument('--baseline', help="Baseline run id (default: previous like-for-like run)")
+    compare.add_argument('--candidate', help="Candidate run id (default: latest run)")
+    compare.add_argument('--threshold', type=float, default=0.05,
+                         help="Minimum relative change counted as a regression (default: 0.05)")
+
+    grid = subparsers.add_parser('grid', help="Compare quantizations and runtime options, report the Pareto frontier")
+    grid.add_argument('--models', nargs='+', help="Base model tags, e.g. llama3.2:3b")
+    grid.add_argument('--quantizations', nargs='+', help="Tag suffixes, e.g. instruct-q4_K_M instruct-q8_0 instruct-fp16")
+    grid.add_argument('--num-gpu', type=int, nargs='+', help="GPU layer offload counts to try")
+    grid.add_argument('--num-thread', type=int, nargs='+', help="CPU thread counts to try")
+    grid.add_argument('--num-batch', type=int, nargs='+', help="Prompt batch sizes to try")
+    grid.add_argument('--num-ctx', type=int, nargs='+', help="Context sizes to try")
+    grid.add_argument('--matrix', help="Matrix file to use instead of the flags above")
+    grid.add_argument('--prompts-file', help="Text file with one prompt per line, or a JSON list")
+    grid.add_argument('--hosts', nargs='+', metavar='HOST', help="Ollama hosts to run the grid on")
+    grid.add_argument('--repeat', type=int, help="Measured repetitions of each prompt (default: 1)")
+    grid.add_argument('--no-store', action='store_true', help="Don't append results to the history database")
+
+    coresidency = subparsers.add_parser('coresidency', help="Serve several models at once and compare to solo runs")
+    coresidency.add_argument('--models', nargs='+', required=True, help="Models to serve simultaneously")
+    coresidency.add_argument('--prompts-file', help="Text file with one prompt per line, or a JSON list")
+    coresidency.add_argument('--rounds', type=int, default=2, help="Passes over the prompts per model (default: 2)")
+    coresidency.add_argument('--host', help="Ollama host (default: OLLAMA_HOST or localhost)")
+    coresidency.add_argument('--option', type=_parse_option, action='append', dest='options', default=[],
+                             metavar='KEY=VALUE', help="Generation option (repeatable)")
+
+    selfbench = subparsers.add_parser('selfbench', help="Measure the harness's own overhead against a fake backend")
+    selfbench.add_argument('--tokens', type=int, default=20000, help="Tokens per overhead measurement (default: 20000)")
+    selfbench.add_argument('--rates', type=float, nargs='+', help="Emitted token rates to check accuracy at")
+    selfbench.add_argument('--no-http', action='store_true', help="Skip the HTTP fake server measurement")
+
+    fake_server = subparsers.add_parser('fake-server', help="Serve a deterministic fake Ollama API")
+    fake_server.add_argument('--host', default='127.0.0.1', help="Address to bind (default: 127.0.0.1)")
+    fake_server.add_argument('--port', type=int, default=11435, help="Port to listen on (default: 11435)")
+    fake_server.add_argument('--tokens-per-second', type=float, default=50, help="Emitted decode rate")
+    fake_server.add_argument('--ttft', type=float, default=0.05, help="Seconds to first token")
+    fake_server.add_argument('--load-time', type=float, default=0.0, help="Seconds charged for a cold load")
+    fake_server.add_argument('--models', nargs='+', default=['fake:latest'], help="Model names to advertise")
+
+    history = subparsers.add_parser('history', help="List stored benchmark runs")
+    history.add_argument('--store', default=None, help="Results history database (default: results/results.db)")
+    history.add_argument('--model', help="Only list this model")
+    history.add_argument('--host', help="Only list this host fingerprint")
+    history.add_argument('--limit', type=int, default=20, help="Number of runs to show (default: 20)")
+
+    resume = subparsers.add_parser('resume', help="Continue an interrupted run, skipping completed cells")
+    resume.add_argument('run_id', nargs='?', help="Run to resume (omit to list checkpointed runs)")
+    resume.add_argument('--dashboard', action='store_true', help="Show a live dashboard while the benchmark runs")
+
+    storage = subparsers.add_parser('storage', help="Measure model pull and blob read throughput")
+    storage.add_argument('--models', nargs='+', help="Installed models to read (default: all)")
+    storage.add_argument('--pull', nargs='+', metavar='MODEL', help="Pull these models first, timing each layer")
+    storage.add_argument('--limit-mb', type=int, help="Read at most this many MB per pass and model")
+    storage.add_argument('--host', help="Ollama host (default: OLLAMA_HOST or localhost)")
+
+    report = subparsers.add_parser('report', help="Render an HTML/Markdown report with plots from saved runs")
+    report.add_argument('paths', nargs='*', help="Result files, directories or globs (default: results/)")
+    report.add_argument('--format', choices=['html', 'markdown'], default='html', help="Report format (default: html)")
+    report.add_argument('-o', '--output', help="Report file (default: results/report_<timestamp>.html|md)")
+
+    return parser
+
+def cmd_run(args):
+    from .matrix import load_prompts
+    from .runner import main as run_benchmark
+
+    prompts = list(args.prompts or [])
+    if args.prompts_file:
+        prompts.extend(load_prompts(args.prompts_file))
+
+    store_path = None if args.no_store else (args.store or DEFAULT_STORE_PATH)
+    load_test = None
+    if args.arrival_rate or args.find_max_rate or args.trace:
+        load_test = {
+            "rate": args.arrival_rate or 1.0,
+            "duration": args.duration,
+            "output_lengths": args.load_output_lengths,
+            "ttft_slo": args.ttft_slo,
+            "itl_slo": args.itl_slo,
+            "search": args.find_max_rate,
+            "max_rate": args.max_rate,
+            "trace": args.trace,
+            "speedup": args.speedup,
+            "limit": args.trace_limit,
+            "use_trace_models": args.trace_models
+        }
+    prompt_cache = None
+    if args.prompt_cache is not None:
+        prompt_cache = {"prefix_lengths": args.prompt_cache or None, "turns": args.cache_turns}
+    embeddings = None
+    if args.embeddings:
+        embeddings = {
+            "batch_sizes": args.batch_sizes,
+            "input_lengths": args.input_lengths,
+            "concurrency": args.concurrency,
+            "documents_per_point": args.documents
+        }
+    results = run_benchmark(
+        verbose=args.verbose,
+        prompts=prompts or None,
+        models=args.models,
+        concurrency=args.concurrency,
+        sample_rate=args.sample_rate,
+        options=dict(args.options),
+        repeat=args.repeat,
+        warmup=args.warmup,
+        ci_target=args.ci_target,
+        max_repeat=args.max_repeat,
+        matrix=args.matrix,
+        drop_cache=args.drop_cache,
+        store_path=store_path,
+        context_lengths=args.context_lengths,
+        output_lengths=args.output_lengths,
+        hosts=args.hosts,
+        load_test=load_test,
+        prompt_cache=prompt_cache,
+        embeddings=embeddings,
+        dashboard=args.dashboard,
+        metrics_listen=args.metrics_port,
+        metrics_file=args.metrics_file,
+        otel=args.otel,
+        telemetry=args.telemetry,
+        cell_timeout=args.cell_timeout,
+        retries=args.retries,
+        request_timeout=args.request_timeout
+    )
+    return 0 if results else 1
+
+def cmd_resume(args):
+    from .checkpoint import list_runs
+    from .runner import resume
+
+    if not args.run_id:
+        for manifest in list_runs():
+            print(f"{manifest['run_id']:<16} {manifest['created_at']:<20} {manifest['status']}")
+        return 0
+    results = resume(args.run_id, dashboard=args.dashboard)
+    return 0 if results else 1
+
+def cmd_compare(args):
+    from .analysis import print_comparison
+
+    with ResultStore(args.store or DEFAULT_STORE_PATH) as store:
+        run_id = args.candidate
+        if not run_id:
+            latest = store.query(model=args.model, limit=1)
+            if not latest:
+                print(f"{Colors.FAIL}No stored runs to compare{Colors.END}")
+                return 1
+            run_id = latest[0]['run_id']
+
+        regressions = 0
+        compared = 0
+        unusable = 0
+        for candidate in store.query(model=args.model, run_id=run_id):
+            if args.baseline:
+                baseline = store.matching(candidate, args.baseline)
+            else:
+                baseline = store.previous(candidate)
+            if not baseline:
+                print(f"\n{Colors.WARNING}No baseline for {candidate['model']} "
+                      f"(prompt set {candidate['prompt_set']}, options {candidate['options']}){Colors.END}")
+                continue
+            comparisons = store.compare(baseline, candidate, args.threshold)
+            print_comparison(baseline, candidate, comparisons)
+            if not comparisons:
+                # Nothing was checked, so this must not pass as "no regressions"
+                unusable += 1
+                continue
+            regressions += sum(1 for comparison in comparisons if comparison['regression'])
+            compared += 1
+
+    if regressions:
+        print(f"\n{Colors.FAIL}{regressions} significant regression(s) found{Colors.END}")
+    if unusable:
+        print(f"\n{Colors.FAIL}{unusable} run(s) without per-request samples to compare{Colors.END}")
+    if regressions or unusable:
+        return 1
+    print(f"\n{Colors.GREEN}No significant regressions in {compared} comparison(s){Colors.END}")
+    return 0
+
+def cmd_grid(args):
+    from datetime import datetime
+    from .analysis import print_grid
+    from .grid import analyze_grid, build_grid
+    from .matrix import load_matrix, load_prompts
+    from .runner import main as run_benchmark, save_results
+
+    if args.matrix:
+        matrix = load_matrix(args.matrix)
+    elif args.models:
+        prompts = load_prompts(args.prompts_file) if args.prompts_file else None
+        matrix = build_grid(args.models, args.quantizations, prompts, num_gpu=args.num_gpu,
+                            num_thread=args.num_thread, num_batch=args.num_batch, num_ctx=args.num_ctx)
+    else:
+        print(f"{Colors.FAIL}Error: specify --models or --matrix{Colors.END}", file=sys.stderr)
+        return 1
+
+    results = run_benchmark(matrix=matrix, hosts=args.hosts, repeat=args.repeat,
+                            store_path=None if args.no_store else DEFAULT_STORE_PATH)
+    if not results:
+        return 1
+    summary = analyze_grid(results)
+    print_grid(summary)
+    save_results([summary], datetime.now().strftime("%H%M%S_%d%m%Y"), kind='grid')
+    return 0
+
+def cmd_coresidency(args):
+    from .matrix import load_prompts
+    from .runner import run_coresidency_benchmark
+
+    prompts = load_prompts(args.prompts_file) if args.prompts_file else None
+    result = run_coresidency_benchmark(args.models, prompts, args.rounds, dict(args.options), args.host)
+    return 0 if result else 1
+
+def cmd_selfbench(args):
+    from .analysis import print_selfbench
+    from .selfbench import run_selfbench
+
+    print_selfbench(run_selfbench(args.tokens, args.rates, not args.no_http))
+    return 0
+
+def cmd_fake_server(args):
+    import time
+    from .fake import FakeClient, serve_fake
+
+    client = FakeClient(tokens_per_second=args.tokens_per_second, ttft=args.ttft,
+                        load_time=args.load_time, models=args.models)
+    server = serve_fake(client, args.host, args.port)
+    print(f"Fake Ollama listening on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+def cmd_history(args):
+    from .analysis import print_history
+
+    with ResultStore(args.store or DEFAULT_STORE_PATH) as store:
+        print_history(store.query(model=args.model, host_fingerprint=args.host, limit=args.limit))
+    return 0
+
+def cmd_report(args):
+    from .report import generate_report
+
+    path = generate_report(args.paths, args.output, args.format)
+    print(f"Report written to {path}")
+    return 0
+
+def cmd_storage(args):
+    from datetime import datetime
+    from .analysis import print_pull, print_storage
+    from .hosts import get_client
+    from .runner import save_results
+    from .storage import pull_model, run_storage_benchmark
+
+    client = get_client(args.host)
+    pulls = []
+    for model in args.pull or []:
+        pulls.append(pull_model(model, client))
+        print_pull(pulls[-1])
+    results = run_storage_benchmark(args.models or args.pull, client,
+                                    args.limit_mb * 1024 * 1024 if args.limit_mb else None)
+    print_storage(results)
+    for result in results:
+        result["pull"] = next((pull for pull in pulls if pull["model"] in (result["model"],
+                               result["model"].removesuffix(':latest'))), None)
+    save_results(results, datetime.now().strftime("%H%M%S_%d%m%Y"), kind='storage')
+    return 0
+
+def main(argv=None, interactive=None):
+    """Entry point for the command line; `interactive` runs the menu loop"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    commands = {
+        'run': cmd_run,
+        'compare': cmd_compare,
+        'history': cmd_history,
+        'report': cmd_report,
+        'storage': cmd_storage,
+        'resume': cmd_resume,
+        'grid': cmd_grid,
+        'coresidency': cmd_coresidency,
+        'selfbench': cmd_selfbench,
+        'fake-server': cmd_fake_server
+    }
+    if args.command in commands:
+        try:
+            return commands[args.command](args)
+        except (OSError, ValueError, RuntimeError, sqlite3.Error) as e:
+            print(f"{Colors.FAIL}Error: {str(e)}{Colors.END}", file=sys.stderr)
+            return 1
+
+    # No subcommand: fall back to the interactive menu
+    if interactive is None:
+        parser.print_help()
+        return 1
+    interactive()
+    return 0
@@ -0,0 +1,79 @@
+import concurrent.futures
+import logging
+import time
+import ollama
+
+from .measure import check_deadline, stream_generate
+from .stats import percentiles
+
+DEFAULT_LEVELS = [1, 2, 4, 8, 16]
+
+# A level is considered saturated once doubling the in-flight requests
+# improves aggregate throughput by less than this fraction
+SATURATION_GAIN = 0.10
+
+def _worker(model, prompts, offset, options, client, deadline=None):
+    """Closed-loop client: send every prompt back-to-back, starting at offset"""
+    records = []
+    errors = 0
+    for i in range(len(prompts)):
+        check_deadline(deadline)
+        prompt = prompts[(offset + i) % len(prompts)]
+        try:
+            records.append(stream_generate(model, prompt, options, client=client))
+        except Exception as e:
+            logging.warning(f"Request failed for {model}: {str(e)}")
+            errors += 1
+    return records, errors
+
+def run_concurrency_level(model, prompts, level, options=None, client=ollama, timeline=None, deadline=None):
+    """Drive `level` simultaneous in-flight requests and return aggregate metrics.
+
+    Token arrivals go into `timeline` (a timeline.TokenTimeline) when given.
+    Workers stop with TimeoutError once `deadline` (time.monotonic()) passes.
+    """
+    records = []
+    errors = 0
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=level) as executor:
+        futures = [executor.submit(_worker, model, prompts, i, options, client, deadline) for i in range(level)]
+        for future in concurrent.futures.as_completed(futures):
+            worker_records, worker_errors = future.result()
+            records.extend(worker_records)
+            errors += worker_errors
+    wall_time = time.perf_counter() - start
+    if timeline is not None:
+        for record in records:
+            timeline.add(record, f"concurrency_{level}")
+
+    response_tokens = sum(r["response_tokens"] for r in records)
+    latencies = [r["latency"] for r in records]
+    return {
+        "concurrency": level,
+        "requests": len(records),
+        "errors": errors,
+        "wall_time": wall_time,
+        "response_tokens": response_tokens,
+        "aggregate_tokens_per_second": response_tokens / wall_time if wall_time > 0 else 0,
+        "requests_per_second": len(records) / wall_time if wall_time > 0 else 0,
+        "latency": percentiles(latencies),
+        "ttft": percentiles([r["ttft"] for r in records])
+    }
+
+def find_saturation_level(levels):
+    """Return the concurrency after which throughput stops scaling"""
+    if not levels:
+        return None
+    for current, following in zip(levels, levels[1:]):
+        base = current["aggregate_tokens_per_second"]
+        if base <= 0 or following["aggregate_tokens_per_second"] < base * (1 + SATURATION_GAIN):
+            return current["concurrency"]
+    return levels[-1]["concurrency"]
+
+def run_concurrency_sweep(model, prompts, levels=None, options=None, client=ollama, timeline=None, deadline=None):
+    """Run the prompt set at each concurrency level in the ladder"""
+    results = []
+    for level in levels or DEFAULT_LEVELS:
+        logging.info(f"Concurrency {level}: {level * len(prompts)} requests")
+        results.append(run_concurrency_level(model, prompts, level, options, client, timeline, deadline))
+    return results
@@ -0,0 +1,116 @@
+import concurrent.futures
+import logging
+import threading
+import time
+
+import numpy as np
+import ollama
+
+from .measure import stream_generate
+from .models import unload_model
+from .stats import percentiles
+
+# A request whose server-side load_duration exceeds this waited for a model swap
+SWAP_THRESHOLD = 0.1
+
+def _poll_residency(client, stop, interval, timeline, start):
+    """Record which benchmarked models are resident until `stop` is set"""
+    while not stop.is_set():
+        try:
+            resident = sorted(entry.get('name') or entry.get('model') for entry in client.ps().get('models', []))
+        except Exception as e:
+            logging.warning(f"ollama.ps() failed: {str(e)}")
+            resident = None
+        if resident is not None:
+            timeline.append({"time": time.perf_counter() - start, "resident": resident})
+        stop.wait(interval)
+
+def _residency_events(timeline):
+    """Load and eviction events derived from consecutive ps() snapshots"""
+    events = []
+    previous = set()
+    for snapshot in timeline:
+        current = set(snapshot["resident"])
+        events.extend({"time": snapshot["time"], "event": "load", "model": m} for m in sorted(current - previous))
+        events.extend({"time": snapshot["time"], "event": "evict", "model": m} for m in sorted(previous - current))
+        previous = current
+    return events
+
+def _workload(model, prompts, rounds, options, client):
+    measurements = []
+    for _ in range(rounds):
+        for prompt in prompts:
+            try:
+                measurements.append(stream_generate(model, prompt, options, client=client))
+            except Exception as e:
+                logging.warning(f"Request to {model} failed: {str(e)}")
+    return measurements
+
+def _summarize(measurements, wall_time):
+    response_tokens = sum(m["response_tokens"] for m in measurements)
+    eval_duration = sum(m["eval_duration"] for m in measurements)
+    stalls = [m["load_duration"] for m in measurements if m["load_duration"] > SWAP_THRESHOLD]
+    return {
+        "requests": len(measurements),
+        "tokens_per_second": response_tokens / wall_time if wall_time > 0 else 0,
+        "decode_speed": response_tokens / eval_duration if eval_duration > 0 else 0,
+        "ttft": percentiles([m["ttft"] for m in measurements], (50, 95, 99)),
+        "swap_stalls": len(stalls),
+        "swap_stall_time": float(np.sum(stalls)) if stalls else 0.0
+    }
+
+def _run(models, prompts, rounds, options, client, poll_interval):
+    timeline = []
+    stop = threading.Event()
+    start = time.perf_counter()
+    poller = threading.Thread(target=_poll_residency, args=(client, stop, poll_interval, timeline, start),
+                              name="residency-poller", daemon=True)
+    poller.start()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(models)) as executor:
+        futures = {model: executor.submit(_workload, model, prompts, rounds, options, client) for model in models}
+        measurements = {model: future.result() for model, future in futures.items()}
+    wall_time = time.perf_counter() - start
+    stop.set()
+    poller.join()
+    return measurements, wall_time, timeline
+
+def run_coresidency(models, prompts, rounds=2, options=None, client=ollama, poll_interval=0.5):
+    """Compare each model served alone with all models served at once.
+
+    Every model first runs its workload alone, starting unloaded, for a
+    solo baseline; then all workloads run simultaneously while ollama.ps()
+    is polled for residency. Requests that waited on a model load count as
+    swap stalls.
+    """
+    solo = {}
+    for model in models:
+        for other in models:
+            unload_model(other, client)
+        logging.info(f"Solo baseline for {model}...")
+        measurements, wall_time, _ = _run([model], prompts, rounds, options, client, poll_interval)
+        solo[model] = _summarize(measurements[model], wall_time)
+
+    for model in models:
+        unload_model(model, client)
+    logging.info(f"Running {', '.join(models)} concurrently...")
+    measurements, wall_time, timeline = _run(models, prompts, rounds, options, client, poll_interval)
+
+    per_model = {}
+    for model in models:
+        shared = _summarize(measurements[model], wall_time)
+        baseline = solo[model]["decode_speed"]
+        per_model[model] = {
+            "solo": solo[model],
+            "shared": shared,
+            "degradation": 1 - shared["decode_speed"] / baseline if baseline > 0 else None
+        }
+
+    events = _residency_events(timeline)
+    return {
+        "models": per_model,
+        "wall_time": wall_time,
+        "max_resident": max((len(snapshot["resident"]) for snapshot in timeline), default=0),
+        "evictions": sum(1 for event in events if event["event"] == "evict"),
+        "events": events,
+        "timeline": timeline
+    }
@@ -0,0 +1,172 @@
+import collections
+import logging
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from . import events
+from .utils import Colors
+
+# Rolling window for the tokens/s figure and sample sizes for percentiles
+RATE_WINDOW = 10.0
+TTFT_SAMPLES = 200
+ITL_SAMPLES = 5000
+
+# Events beyond this are dropped rather than blocking a measuring thread
+QUEUE_SIZE = 100000
+
+CLEAR = '\033[H\033[J'
+
+class _QueueHandler(logging.Handler):
+    def __init__(self, dashboard):
+        super().__init__()
+        self.dashboard = dashboard
+
+    def emit(self, record):
+        self.dashboard._on_event("log", {"message": self.format(record)})
+
+class Dashboard:
+    """Refresh-limited live terminal view of a running benchmark.
+
+    Measuring threads only enqueue events (see events.publish); a separate
+    render thread drains the queue and redraws at most `refresh` times per
+    second. Console log output is shown inside the dashboard while it runs.
+    """
+
+    def __init__(self, refresh=2.0, stream=None):
+        self.interval = 1.0 / refresh
+        self.stream = stream or sys.stdout
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+        self.started = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.token_counts = collections.deque()
+        self.ttft = collections.deque(maxlen=TTFT_SAMPLES)
+        self.itl = collections.deque(maxlen=ITL_SAMPLES)
+        self.resources = None
+        self.progress = None
+        self.log = collections.deque(maxlen=6)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._log_handler = _QueueHandler(self)
+        self._muted = []
+
+    def _on_event(self, kind, data):
+        try:
+            self.queue.put_nowait((time.perf_counter(), kind, data))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        events.subscribe(self._on_event)
+
+        # Route console logging into the dashboard instead of over it
+        root = logging.getLogger()
+        self._muted = [h for h in root.handlers
+                       if isinstance(h, logging.StreamHandler) and not isinstance(h, logging.FileHandler)]
+        for handler in self._muted:
+            root.removeHandler(handler)
+        root.addHandler(self._log_handler)
+
+        self._thread = threading.Thread(target=self._run, name="dashboard", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        events.unsubscribe(self._on_event)
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        root = logging.getLogger()
+        root.removeHandler(self._log_handler)
+        for handler in self._muted:
+            root.addHandler(handler)
+
+    def _apply(self, timestamp, kind, data):
+        if kind == "request_start":
+            self.in_flight += 1
+        elif kind == "tokens":
+            self.token_counts.append((timestamp, data["count"]))
+        elif kind == "request_end":
+            self.in_flight = max(0, self.in_flight - 1)
+            if data["failed"]:
+                self.failed += 1
+            else:
+                self.completed += 1
+            if data["tokens"]:
+                self.token_counts.append((timestamp, data["tokens"]))
+            if data["ttft"] is not None:
+                self.ttft.append(data["ttft"])
+            self.itl.extend(data["itl"])
+        elif kind == "resources":
+            self.resources = data
+        elif kind == "cell_start":
+            self.progress = data
+        elif kind == "log":
+            self.log.append(data["message"])
+
+    def _drain(self):
+        while True:
+            try:
+                self._apply(*self.queue.get_nowait())
+            except queue.Empty:
+                break
+        horizon = time.perf_counter() - RATE_WINDOW
+        while self.token_counts and self.token_counts[0][0] < horizon:
+            self.token_counts.popleft()
+
+    def _line(self, label, value):
+        return f"  {label + ':':<22}{Colors.GREEN}{value}{Colors.END}"
+
+    def render(self):
+        elapsed = time.perf_counter() - self.started
+        rate = sum(count for _, count in self.token_counts) / min(RATE_WINDOW, max(elapsed, 1e-9))
+        lines = [f"{Colors.BOLD}AI Benchmark — live{Colors.END}  ({elapsed:.0f}s elapsed)", ""]
+
+        if self.progress:
+            lines.append(self._line("Progress", f"cell {self.progress['index']}/{self.progress['total']} "
+                                               f"— {self.progress['model']}"))
+        lines.append(self._line("In-Flight Requests", self.in_flight))
+        lines.append(self._line("Completed", f"{self.completed} ({self.failed} failed)"))
+        lines.append(self._line("Rolling Throughput", f"{rate:.1f} t/s"))
+        if self.ttft:
+            p50, p95, p99 = np.percentile(self.ttft, [50, 95, 99]) * 1000
+            lines.append(self._line("TTFT", f"{p50:.0f} / {p95:.0f} / {p99:.0f} ms (p50/p95/p99)"))
+        if self.itl:
+            p50, p95, p99 = np.percentile(self.itl, [50, 95, 99]) * 1000
+            lines.append(self._line("Inter-Token Latency", f"{p50:.1f} / {p95:.1f} / {p99:.1f} ms (p50/p95/p99)"))
+
+        if self.resources:
+            lines.append("")
+            lines.append(self._line("CPU", f"{self.resources['cpu']:.0f}%"))
+            if not np.isnan(self.resources.get('process_rss', np.nan)):
+                lines.append(self._line("Ollama RSS", f"{self.resources['process_rss'] / (1024 * 1024):.0f} MB"))
+            if not np.isnan(self.resources.get('gpu_load', np.nan)):
+                lines.append(self._line("GPU", f"{self.resources['gpu_load']:.0f}% at "
+                                               f"{self.resources['gpu_temperature']:.0f}°C"))
+                lines.append(self._line("VRAM", f"{self.resources['gpu_memory']:.0f} MB"))
+            power = np.nansum([self.resources.get('gpu_power', np.nan), self.resources.get('cpu_power', np.nan)])
+            if power:
+                lines.append(self._line("Power", f"{power:.0f} W"))
+
+        if self.dropped:
+            lines.append(f"\n  {Colors.WARNING}{self.dropped} events dropped{Colors.END}")
+        if self.log:
+            lines.append("")
+            lines.extend(f"  {message.strip()}" for message in self.log)
+        self.stream.write(CLEAR + "\n".join(lines) + "\n")
+        self.stream.flush()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._drain()
+            self.render()
+            self._stop_event.wait(self.interval)
+        self._drain()
+        self.render()
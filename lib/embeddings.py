@@ -0,0 +1,137 @@
+import concurrent.futures
+import logging
+import time
+
+import ollama
+
+from .measure import check_deadline
+from .sampler import ResourceSampler
+from .stats import percentiles
+from .sweep import filler
+
+DEFAULT_BATCH_SIZES = [1, 8, 32, 128]
+DEFAULT_INPUT_LENGTHS = [128, 512]
+DEFAULT_CONCURRENCY = [1]
+DEFAULT_DOCUMENTS = 256
+
+# Probe length used to convert target token counts into filler words
+CALIBRATION_WORDS = 256
+
+def documents(count, words, seed):
+    """`count` distinct filler documents of `words` words each, like RAG chunks"""
+    return [f"Chunk {seed}-{i}: {filler(words, seed * 100003 + i)}" for i in range(count)]
+
+def embed_batch(model, inputs, options=None, client=ollama):
+    """Embed one batch of inputs and time the request"""
+    start = time.perf_counter()
+    response = client.embed(model=model, input=inputs, options=options)
+    end = time.perf_counter()
+    embeddings = response.get('embeddings') or []
+    return {
+        "start": start,
+        "end": end,
+        "latency": end - start,
+        "documents": len(embeddings),
+        "dimensions": len(embeddings[0]) if embeddings else 0,
+        "prompt_tokens": response.get('prompt_eval_count') or 0,
+        "total_duration": (response.get('total_duration') or 0) / 1e9
+    }
+
+def calibrate(model, options=None, client=ollama):
+    """Tokens per filler word and embedding dimensions, from one probe document"""
+    probe = embed_batch(model, documents(1, CALIBRATION_WORDS, -1), options, client)
+    tokens_per_word = probe["prompt_tokens"] / CALIBRATION_WORDS if probe["prompt_tokens"] else 1.3
+    return tokens_per_word, probe["dimensions"]
+
+def run_embedding_point(model, texts, batch_size, concurrency, options=None, client=ollama):
+    """Embed `texts` in batches of `batch_size` with `concurrency` batches in flight"""
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    records = []
+    errors = 0
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(embed_batch, model, batch, options, client) for batch in batches]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                records.append(future.result())
+            except Exception as e:
+                logging.warning(f"Embedding batch failed for {model}: {str(e)}")
+                errors += 1
+    wall_time = time.perf_counter() - start
+
+    embedded = sum(r["documents"] for r in records)
+    tokens = sum(r["prompt_tokens"] for r in records)
+    return {
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "batches": len(records),
+        "errors": errors,
+        "documents": embedded,
+        "tokens_per_document": tokens / embedded if embedded else 0,
+        "wall_time": wall_time,
+        "documents_per_second": embedded / wall_time if wall_time > 0 else 0,
+        "tokens_per_second": tokens / wall_time if wall_time > 0 else 0,
+        "latency": percentiles([r["latency"] for r in records])
+    }
+
+def run_embedding_sweep(model, batch_sizes=None, input_lengths=None, concurrency=None, documents_per_point=None,
+                        options=None, sample_rate=10, client=ollama, sampler=None, deadline=None):
+    """Measure embedding throughput over batch size, input length and concurrency.
+
+    Every point embeds the same number of fresh documents (so neither the
+    server nor the OS can serve repeats from a cache) through `ollama.embed`
+    with list inputs. Input lengths are in tokens, calibrated with the
+    server's prompt_eval_count. Peak Ollama and GPU memory per point show
+    how activation memory grows with the batch. Points are labelled on
+    `sampler` when given, otherwise on a sampler of their own.
+    """
+    batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+    input_lengths = input_lengths or DEFAULT_INPUT_LENGTHS
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    count = documents_per_point or DEFAULT_DOCUMENTS
+    tokens_per_word, dimensions = calibrate(model, options, client)
+    logging.info(f"Calibrated {tokens_per_word:.2f} tokens/word, {dimensions}-dimensional embeddings")
+
+    owned = sampler is None
+    if owned:
+        sampler = ResourceSampler(rate=sample_rate).start()
+    points = []
+    seed = 0
+    try:
+        for target in input_lengths:
+            words = max(1, int(target / tokens_per_word))
+            for level in concurrency:
+                for batch_size in batch_sizes:
+                    check_deadline(deadline)
+                    seed += 1
+                    phase = f"embed_in{target}_batch{batch_size}_conc{level}"
+                    logging.info(f"Embeddings: {count} x {target}-token inputs, batch {batch_size}, "
+                                 f"concurrency {level}...")
+                    texts = documents(count, words, seed)
+                    start = time.perf_counter()
+                    point = run_embedding_point(model, texts, batch_size, level, options, client)
+                    sampler.add_phase(phase, start, time.perf_counter())
+                    points.append({"input_tokens": target, **point, "phase": phase})
+    finally:
+        resources = sampler.stop() if owned else sampler.summary()
+
+    phases = resources.get("phases", {})
+    for point in points:
+        usage = phases.get(point.pop("phase"), {})
+        point["process_rss_mb"] = usage.get("process", {}).get("rss_mb", {}).get("max")
+        point["gpu_memory_mb"] = usage.get("gpu", {}).get("memory_mb", {}).get("max")
+
+    # Fastest batch size and concurrency for each input length
+    best = []
+    for target in input_lengths:
+        candidates = [p for p in points if p["input_tokens"] == target and p["documents"]]
+        if candidates:
+            point = max(candidates, key=lambda p: p["documents_per_second"])
+            best.append({key: point[key] for key in ("input_tokens", "batch_size", "concurrency",
+                                                     "documents_per_second", "tokens_per_second")})
+    return {
+        "dimensions": dimensions,
+        "documents_per_point": count,
+        "points": points,
+        "best": best
+    }
@@ -0,0 +1,25 @@
+import threading
+
+# Subscribers are called synchronously from the measuring threads, so they
+# must not block (the dashboard and exporters just enqueue or bump counters)
+_subscribers = []
+_lock = threading.Lock()
+
+def subscribe(callback):
+    """Register callback(kind, data) for every published event"""
+    global _subscribers
+    with _lock:
+        _subscribers = _subscribers + [callback]
+
+def unsubscribe(callback):
+    global _subscribers
+    with _lock:
+        _subscribers = [s for s in _subscribers if s is not callback]
+
+def active():
+    """Whether anyone is listening; lets hot loops skip building event payloads"""
+    return bool(_subscribers)
+
+def publish(kind, **data):
+    for callback in _subscribers:
+        callback(kind, data)
@@ -0,0 +1,266 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import events
+
+PREFIX = "ai_benchmark"
+
+# Histogram bucket upper bounds (seconds, or tokens/s)
+TTFT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ITL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SPEED_BUCKETS = (1, 5, 10, 20, 30, 50, 75, 100, 150, 200, 500, 1000)
+
+# Resource sampler columns exposed as gauges: (column, metric, help, scale)
+GAUGES = (
+    ("cpu", "cpu_percent", "System CPU utilization", 1),
+    ("process_cpu", "ollama_cpu_percent", "Ollama server CPU utilization", 1),
+    ("process_rss", "ollama_rss_bytes", "Ollama server resident memory", 1),
+    ("gpu_load", "gpu_load_percent", "GPU utilization", 1),
+    ("gpu_temperature", "gpu_temperature_celsius", "GPU temperature", 1),
+    ("gpu_memory", "gpu_memory_bytes", "GPU memory in use", 1024 * 1024),
+    ("gpu_power", "gpu_power_watts", "GPU power draw", 1),
+    ("cpu_power", "cpu_power_watts", "CPU package power draw", 1),
+)
+
+# Interval between writes of the textfile fallback
+PUSH_INTERVAL = 5.0
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _number(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+class _Histogram:
+    """Cumulative-bucket histogram per label set, in Prometheus semantics"""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, values):
+        counts, total = self.series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+        for value in values:
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+            total[1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, (total, count)) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    exporter = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        data = self.exporter.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def _tracer():
+    """OpenTelemetry tracer, exporting over OTLP when the SDK and exporter are installed.
+
+    Without them the globally configured provider is used (e.g. under
+    opentelemetry-instrument).
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        raise RuntimeError("opentelemetry-api is required for tracing (pip install opentelemetry-sdk "
+                           "opentelemetry-exporter-otlp)")
+    try:
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError:
+        return trace.get_tracer("ai_benchmark"), None
+
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    return provider.get_tracer("ai_benchmark"), provider
+
+class MetricsExporter:
+    """Expose live benchmark metrics to existing monitoring.
+
+    Subscribes to the event bus and keeps Prometheus histograms for TTFT,
+    inter-token latency, request latency and per-request tokens/s, plus
+    gauges for the resource sampler. They are served on /metrics at
+    `listen` ((host, port)), and/or written to `path` in the text format
+    for node_exporter's textfile collector on nodes nothing scrapes. With
+    `otel`, every request also becomes a span with load/prefill/decode
+    children.
+    """
+
+    def __init__(self, listen=None, path=None, otel=False):
+        self.listen = listen
+        self.path = path
+        self.lock = threading.Lock()
+        self.histograms = {
+            "ttft": _Histogram(f"{PREFIX}_ttft_seconds", "Time to first token", TTFT_BUCKETS),
+            "itl": _Histogram(f"{PREFIX}_inter_token_latency_seconds", "Gap between streamed tokens",
+                              ITL_BUCKETS),
+            "latency": _Histogram(f"{PREFIX}_request_latency_seconds", "End-to-end request latency",
+                                  LATENCY_BUCKETS),
+            "speed": _Histogram(f"{PREFIX}_tokens_per_second", "Decode speed per request", SPEED_BUCKETS),
+        }
+        self.requests = {}
+        self.tokens = {}
+        self.in_flight = 0
+        self.resources = {}
+        self.server = None
+        self.tracer, self.provider = _tracer() if otel else (None, None)
+        self._stop_event = threading.Event()
+        self._pusher = None
+
+    def start(self):
+        events.subscribe(self._on_event)
+        if self.listen:
+            handler = type('MetricsHandler', (_MetricsHandler,), {"exporter": self})
+            self.server = ThreadingHTTPServer(self.listen, handler)
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+            logging.info(f"Serving metrics on http://{self.listen[0]}:{self.server.server_port}/metrics")
+        if self.path:
+            self._pusher = threading.Thread(target=self._push_loop, name="metrics-push", daemon=True)
+            self._pusher.start()
+        return self
+
+    def stop(self):
+        events.unsubscribe(self._on_event)
+        self._stop_event.set()
+        if self._pusher:
+            self._pusher.join()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.provider:
+            self.provider.shutdown()
+
+    def _on_event(self, kind, data):
+        if kind == "request_start":
+            with self.lock:
+                self.in_flight += 1
+        elif kind == "request_end":
+            self._record(data)
+        elif kind == "resources":
+            with self.lock:
+                self.resources = data
+
+    def _record(self, data):
+        labels = (("model", data["model"]),)
+        status = "error" if data["failed"] else "ok"
+        speed = None
+        if data["eval_duration"] > 0:
+            speed = data["response_tokens"] / data["eval_duration"]
+        elif data["ttft"] is not None and data["latency"] > data["ttft"]:
+            speed = data["response_tokens"] / (data["latency"] - data["ttft"])
+
+        with self.lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            key = labels + (("status", status),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.tokens[labels] = self.tokens.get(labels, 0) + data["response_tokens"]
+            self.histograms["latency"].observe(labels, [data["latency"]])
+            self.histograms["itl"].observe(labels, data["itl"])
+            if data["ttft"] is not None:
+                self.histograms["ttft"].observe(labels, [data["ttft"]])
+            if speed:
+                self.histograms["speed"].observe(labels, [speed])
+
+        if self.tracer:
+            self._span(data, status)
+
+    def _span(self, data, status):
+        # Events arrive synchronously at the end of the request, so the wall
+        # clock now is its end; server phases are laid out load → prefill → decode
+        end = time.time_ns()
+        start = end - int(data["latency"] * 1e9)
+        span = self.tracer.start_span("ollama.generate", start_time=start, attributes={
+            "llm.model": data["model"],
+            "llm.response_tokens": data["response_tokens"],
+            "llm.ttft_seconds": data["ttft"] or 0.0,
+            "llm.status": status,
+        })
+        from opentelemetry import trace
+        context = trace.set_span_in_context(span)
+        load = int(data["load_duration"] * 1e9)
+        prefill = int(data["prompt_eval_duration"] * 1e9)
+        decode = int(data["eval_duration"] * 1e9)
+        phases = [("load", start, start + load), ("prefill", start + load, start + load + prefill),
+                  ("decode", end - decode, end)]
+        for name, phase_start, phase_end in phases:
+            if phase_end > phase_start:
+                self.tracer.start_span(name, context=context, start_time=phase_start).end(end_time=phase_end)
+        span.end(end_time=end)
+
+    def render(self):
+        """Current metrics in the Prometheus text exposition format"""
+        with self.lock:
+            lines = []
+            for histogram in self.histograms.values():
+                lines.extend(histogram.render())
+
+            lines += [f"# HELP {PREFIX}_requests_total Completed generate requests",
+                      f"# TYPE {PREFIX}_requests_total counter"]
+            lines += [f"{PREFIX}_requests_total{_labels(k)} {v}" for k, v in sorted(self.requests.items())]
+            lines += [f"# HELP {PREFIX}_response_tokens_total Generated tokens",
+                      f"# TYPE {PREFIX}_response_tokens_total counter"]
+            lines += [f"{PREFIX}_response_tokens_total{_labels(k)} {v}" for k, v in sorted(self.tokens.items())]
+            lines += [f"# HELP {PREFIX}_in_flight_requests Requests currently streaming",
+                      f"# TYPE {PREFIX}_in_flight_requests gauge",
+                      f"{PREFIX}_in_flight_requests {self.in_flight}"]
+
+            for column, metric, help, scale in GAUGES:
+                value = self.resources.get(column)
+                if value is None or value != value:  # not sampled, or NaN
+                    continue
+                lines += [f"# HELP {PREFIX}_{metric} {help}", f"# TYPE {PREFIX}_{metric} gauge",
+                          f"{PREFIX}_{metric} {_number(value * scale)}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Atomically write the current metrics to `path`"""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+    def _push_loop(self):
+        while not self._stop_event.wait(PUSH_INTERVAL):
+            self.write()
+        self.write()
+
+def parse_listen(value):
+    """'9464', ':9464' or '0.0.0.0:9464' → (host, port); host defaults to localhost"""
+    host, _, port = value.rpartition(':')
+    return (host or '127.0.0.1', int(port))
@@ -0,0 +1,297 @@
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Below this, waiting for the next token spins instead of sleeping, since
+# time.sleep() granularity would cap the emulated token rate
+SPIN_THRESHOLD = 0.001
+
+def _wait_until(deadline):
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_THRESHOLD:
+        time.sleep(remaining - SPIN_THRESHOLD)
+    while time.perf_counter() < deadline:
+        pass
+
+class FakeClient:
+    """Deterministic in-process stand-in for ollama.Client.
+
+    Implements the subset of the client API the benchmark uses and emits
+    tokens on a fixed schedule: `ttft` seconds to the first token, then one
+    token every 1 / tokens_per_second (0 means as fast as possible). A
+    `load_time` is charged on the first request after a model is unloaded.
+    Responses are plain dicts, like older versions of the ollama package.
+    With `prompt_cache`, prefill of the uncached prompt words is charged
+    before the first token, and words shared with the start of the previous
+    request (prompt and reply) count as cached, like Ollama's KV reuse.
+    """
+
+    def __init__(self, tokens_per_second=50, ttft=0.05, load_time=0.0, response_tokens=128,
+                 prompt_tokens_per_second=1000, models=("fake:latest",), model_size=1024 ** 3, prompt_cache=False):
+        self.tokens_per_second = tokens_per_second
+        self.ttft = ttft
+        self.load_time = load_time
+        self.response_tokens = response_tokens
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.models = list(models)
+        self.model_size = model_size
+        self.prompt_cache = prompt_cache
+        self.cache = {}
+        self.loaded = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url):
+        """Build a client from fake://?tokens_per_second=200&ttft=0.02 style URLs"""
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        profile = {}
+        for key, values in query.items():
+            if key == 'models':
+                profile[key] = values[0].split(',')
+            else:
+                profile[key] = float(values[0])
+        if 'response_tokens' in profile:
+            profile['response_tokens'] = int(profile['response_tokens'])
+        return cls(**profile)
+
+    def _entry(self, model):
+        return {
+            "name": model,
+            "model": model,
+            "size": self.model_size,
+            "digest": hashlib.sha256(model.encode()).hexdigest(),
+            "details": {"quantization_level": "Q4_K_M"}
+        }
+
+    def list(self):
+        return {"models": [self._entry(model) for model in self.models]}
+
+    def ps(self):
+        with self._lock:
+            loaded = sorted(self.loaded)
+        return {"models": [{**self._entry(model), "size_vram": self.model_size} for model in loaded]}
+
+    def pull(self, model, stream=False, **kwargs):
+        if model not in self.models:
+            self.models.append(model)
+        events = [{"status": "pulling manifest"}, {"status": "success"}]
+        return iter(events) if stream else events[-1]
+
+    def show(self, model, **kwargs):
+        return {"details": self._entry(model)["details"], "model_info": {}}
+
+    def _load(self, model):
+        """Charge the load time if the model isn't resident; return it in seconds"""
+        with self._lock:
+            if model in self.loaded:
+                return 0.0
+            self.loaded.add(model)
+        if self.load_time:
+            time.sleep(self.load_time)
+        return self.load_time
+
+    def _tokens(self, model, prompt, options, keep_alive, field):
+        if keep_alive == 0:
+            with self._lock:
+                self.loaded.discard(model)
+            yield {"model": model, "done": True, "done_reason": "unload", field: ""}
+            return
+
+        start = time.perf_counter()
+        load = self._load(model)
+        words = prompt.split() if prompt else []
+        prompt_tokens = len(words)
+        count = (options or {}).get('num_predict') or self.response_tokens
+        count = self.response_tokens if count < 0 else count
+        if not prompt:
+            count = 0
+
+        prefill = 0
+        if self.prompt_cache:
+            with self._lock:
+                cached = self.cache.get(model, [])
+                reused = 0
+                while reused < min(len(cached), len(words)) and cached[reused] == words[reused]:
+                    reused += 1
+                self.cache[model] = words + [f"tok{i}" for i in range(count)]
+            prompt_tokens -= reused
+            prefill = prompt_tokens / self.prompt_tokens_per_second if self.prompt_tokens_per_second else 0
+
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second else 0
+        first = time.perf_counter() + prefill + self.ttft
+        for i in range(count):
+            _wait_until(first + i * interval)
+            yield {"model": model, "done": False, field: f"tok{i} "}
+
+        prompt_eval = prompt_tokens / self.prompt_tokens_per_second if self.prompt_tokens_per_second else 0
+        yield {
+            "model": model,
+            "done": True,
+            "done_reason": "length",
+            field: "",
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": count,
+            "load_duration": int(load * 1e9),
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_duration": int(count * interval * 1e9),
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "context": list(range(prompt_tokens + count))
+        }
+
+    def generate(self, model='', prompt=None, stream=False, options=None, keep_alive=None, **kwargs):
+        chunks = self._tokens(model, prompt, options, keep_alive, 'response')
+        if stream:
+            return chunks
+        chunks = list(chunks)
+        final = chunks[-1]
+        final['response'] = ''.join(chunk['response'] for chunk in chunks)
+        return final
+
+    def chat(self, model='', messages=None, stream=False, options=None, keep_alive=None, **kwargs):
+        prompt = ' '.join(message.get('content', '') for message in messages or [])
+        chunks = ({**chunk, "message": {"role": "assistant", "content": chunk.pop('content')}}
+                  for chunk in self._tokens(model, prompt, options, keep_alive, 'content'))
+        if stream:
+            return chunks
+        chunks = list(chunks)
+        final = chunks[-1]
+        final['message']['content'] = ''.join(chunk['message']['content'] for chunk in chunks)
+        return final
+
+    def embed(self, model='', input='', keep_alive=None, **kwargs):
+        if keep_alive == 0:
+            with self._lock:
+                self.loaded.discard(model)
+            return {"model": model, "embeddings": []}
+        inputs = input if isinstance(input, list) else [input]
+        load = self._load(model)
+        tokens = sum(len(text.split()) for text in inputs)
+        duration = tokens / self.prompt_tokens_per_second if self.prompt_tokens_per_second else 0
+        time.sleep(duration)
+        return {
+            "model": model,
+            "embeddings": [[0.0] * 16 for _ in inputs],
+            "prompt_eval_count": tokens,
+            "load_duration": int(load * 1e9),
+            "total_duration": int((load + duration) * 1e9)
+        }
+
+class FakeNvml:
+    """Stand-in for telemetry.NvmlLibrary, for testing telemetry on GPU-less machines.
+
+    Reports `devices` identical GPUs at a fixed load and power draw; the
+    energy counter advances with wall time at that power, so energy per
+    token can be checked end to end.
+    """
+
+    def __init__(self, devices=2, load=90, watts=250.0, memory_used=8 * 1024 ** 3, memory_total=24 * 1024 ** 3,
+                 temperature=65, sm_clock=1800, throttle=0):
+        self.devices = devices
+        self.load = load
+        self.watts = watts
+        self.memory_used = memory_used
+        self.memory_total = memory_total
+        self.celsius = temperature
+        self.clock = sm_clock
+        self.throttle = throttle
+        self.started = time.perf_counter()
+
+    def device_count(self):
+        return self.devices
+
+    def name(self, index):
+        return f"Fake GPU {index}"
+
+    def utilization(self, index):
+        return self.load
+
+    def memory(self, index):
+        return self.memory_used, self.memory_total
+
+    def temperature(self, index):
+        return self.celsius
+
+    def power(self, index):
+        return int(self.watts * 1000)
+
+    def sm_clock(self, index):
+        return self.clock
+
+    def throttle_reasons(self, index):
+        return self.throttle
+
+    def energy(self, index):
+        return int((time.perf_counter() - self.started) * self.watts * 1000)
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    client = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, chunks):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in chunks:
+            line = json.dumps(chunk).encode() + b'\n'
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+    def do_GET(self):
+        routes = {
+            '/api/tags': self.client.list,
+            '/api/ps': self.client.ps,
+            '/api/version': lambda: {"version": "0.0.0-fake"}
+        }
+        if self.path in routes:
+            self._send_json(routes[self.path]())
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        stream = body.pop('stream', True)
+        routes = {
+            '/api/generate': self.client.generate,
+            '/api/chat': self.client.chat,
+            '/api/pull': self.client.pull
+        }
+        if self.path in routes:
+            response = routes[self.path](stream=stream, **body)
+            if stream:
+                self._send_stream(response)
+            else:
+                self._send_json(response)
+        elif self.path == '/api/embed':
+            self._send_json(self.client.embed(**body))
+        elif self.path == '/api/show':
+            self._send_json(self.client.show(**body))
+        else:
+            self.send_error(404)
+
+def serve_fake(client=None, host='127.0.0.1', port=0):
+    """Serve a FakeClient over Ollama's HTTP API in a background thread.
+
+    Returns the server; its URL is http://host:server.server_port and it
+    is stopped with server.shutdown().
+    """
+    handler = type('FakeHandler', (_FakeHandler,), {"client": client or FakeClient()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
@@ -0,0 +1,64 @@
+# Options varied by a grid run, with the matching CLI flags
+GRID_OPTIONS = ("num_gpu", "num_thread", "num_batch", "num_ctx")
+
+def build_grid(models, quantizations=None, prompts=None, **option_values):
+    """Matrix dict (see matrix.expand_matrix) for a quantization x option grid"""
+    matrix = {"models": models, "options": {}}
+    if quantizations:
+        matrix["quantizations"] = quantizations
+    if prompts:
+        matrix["prompt_sets"] = {"grid": prompts}
+    for name in GRID_OPTIONS:
+        if option_values.get(name):
+            matrix["options"][name] = option_values[name]
+    return matrix
+
+def _memory(result):
+    """Memory footprint in MB: Ollama's resident size, else peak runner RSS"""
+    load = result.get("load") or {}
+    if load.get("resident_size"):
+        return load["resident_size"] / (1024 * 1024)
+    process = ((result.get("system") or {}).get("resources") or {}).get("process")
+    return process["rss_mb"]["max"] if process else None
+
+def grid_points(results):
+    """One point per grid cell: decode throughput, memory and TTFT"""
+    points = []
+    for result in results:
+        points.append({
+            "model": result["model_name"],
+            "host": result.get("host"),
+            "options": result.get("options") or {},
+            "throughput": result["speeds"]["response"],
+            "memory_mb": _memory(result),
+            "ttft": (result.get("latency") or {}).get("ttft", {}).get("p50")
+        })
+    return points
+
+def _dominates(a, b):
+    """a is at least as good as b everywhere and strictly better somewhere"""
+    pairs = [(a["throughput"], b["throughput"])]
+    # Memory and latency are minimised, so compare them negated
+    for key in ("memory_mb", "ttft"):
+        if a[key] is not None and b[key] is not None:
+            pairs.append((-a[key], -b[key]))
+    return all(x >= y for x, y in pairs) and any(x > y for x, y in pairs)
+
+def pareto_frontier(points):
+    """Points not dominated on throughput (max), memory (min) and latency (min)"""
+    return [p for p in points if not any(_dominates(q, p) for q in points if q is not p)]
+
+def best_per_host(points):
+    """Highest-throughput Pareto-optimal configuration for each host"""
+    best = {}
+    for host in dict.fromkeys(p["host"] for p in points):
+        frontier = pareto_frontier([p for p in points if p["host"] == host])
+        best[host] = max(frontier, key=lambda p: (p["throughput"], -(p["ttft"] or 0)))
+    return best
+
+def analyze_grid(results):
+    points = grid_points(results)
+    frontier = pareto_frontier(points)
+    for point in points:
+        point["pareto"] = point in frontier
+    return {"points": points, "best": best_per_host(points) if points else {}}
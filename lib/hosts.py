@@ -0,0 +1,32 @@
+import socket
+import urllib.parse
+import ollama
+
+from .fake import FakeClient
+from .models import host_url
+
+LOCAL_NAMES = {'localhost', '127.0.0.1', '0.0.0.0', '::1'}
+
+def is_local(host=None):
+    """Whether an Ollama host runs on this machine (so local telemetry applies)"""
+    if not host:
+        return True
+    if host.startswith('fake://'):
+        return False
+    name = urllib.parse.urlparse(host_url(host)).hostname or ''
+    return name in LOCAL_NAMES or name in (socket.gethostname(), socket.getfqdn())
+
+def get_client(host=None, timeout=None):
+    """Client for one Ollama host; each keeps its own pooled HTTP connection.
+
+    fake:// hosts return an in-process FakeClient (see fake.FakeClient.from_url).
+    `timeout` bounds each HTTP read, so a hung request fails instead of
+    stalling the run.
+    """
+    if host and host.startswith('fake://'):
+        return FakeClient.from_url(host)
+    if timeout:
+        return ollama.Client(host=host_url(host) if host else None, timeout=timeout)
+    if not host:
+        return ollama
+    return ollama.Client(host=host_url(host))
@@ -0,0 +1,71 @@
+import itertools
+import json
+import os
+
+# Top-level keys that configure the run rather than define matrix axes
+RUN_SETTINGS = ("repeat", "warmup", "ci_target", "max_repeat", "concurrency", "context_lengths", "output_lengths",
+                "load_test", "prompt_cache", "embeddings", "hosts", "sample_rate", "drop_cache", "verbose")
+
+def load_prompts(path):
+    """Read prompts from a text file (one per line, '#' comments) or a JSON list"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return [str(prompt) for prompt in json.load(f)]
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def load_matrix(path):
+    """Load a benchmark matrix from a TOML or YAML file"""
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("PyYAML is required for YAML matrix files (pip install pyyaml), or use TOML")
+        with open(path, encoding='utf-8') as f:
+            matrix = yaml.safe_load(f) or {}
+    else:
+        import tomllib
+        with open(path, 'rb') as f:
+            matrix = tomllib.load(f)
+
+    # Prompt files are resolved relative to the matrix file
+    base_dir = os.path.dirname(os.path.abspath(path))
+    prompt_sets = {}
+    for name, prompts in (matrix.get('prompt_sets') or {}).items():
+        if isinstance(prompts, str):
+            prompts = load_prompts(os.path.join(base_dir, prompts))
+        prompt_sets[name] = list(prompts)
+    matrix['prompt_sets'] = prompt_sets
+    return matrix
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+def expand_matrix(matrix, default_prompts=None):
+    """Expand models x quantizations x prompt sets x option values into cells.
+
+    Every option whose value is a list is swept; scalars apply to all cells.
+    Quantizations are appended to the model tag (llama3.2:3b + q8_0 ->
+    llama3.2:3b-q8_0).
+    """
+    models = _as_list(matrix.get('models') or [])
+    quantizations = _as_list(matrix.get('quantizations') or [None])
+    prompt_sets = matrix.get('prompt_sets') or {"default": default_prompts}
+
+    options = matrix.get('options') or {}
+    option_names = list(options)
+    option_values = [_as_list(options[name]) for name in option_names]
+
+    cells = []
+    for model, quantization, (prompt_set, prompts), values in itertools.product(
+            models, quantizations, prompt_sets.items(), itertools.product(*option_values)):
+        cells.append({
+            "model": f"{model}-{quantization}" if quantization else model,
+            "prompt_set": prompt_set,
+            "prompts": prompts,
+            "options": dict(zip(option_names, values))
+        })
+    return cells
+
+def run_settings(matrix):
+    """Return the run-level settings (repeat, concurrency, ...) defined in the matrix"""
+    return {key: matrix[key] for key in RUN_SETTINGS if key in matrix}
@@ -0,0 +1,103 @@
+import time
+from array import array
+
+import ollama
+
+from . import events
+
+NS_PER_SECOND = 1e9
+
+# Token progress is published in batches to keep the stream loop cheap
+PROGRESS_TOKENS = 16
+
+def stream_generate(model, prompt, options=None, verbose=False, client=ollama):
+    """Send one streamed generate request and time every token as it arrives
+
+    `client` is an ollama.Client (or the ollama module for the default host).
+    """
+    return _timed_stream(model, lambda: client.generate(model=model, prompt=prompt, stream=True, options=options),
+                         lambda chunk: chunk.get('response'), verbose)
+
+def stream_chat(model, messages, options=None, verbose=False, client=ollama):
+    """Send one streamed chat request; measured like stream_generate, plus the reply text"""
+    reply = []
+
+    def text(chunk):
+        content = (chunk.get('message') or {}).get('content')
+        if content:
+            reply.append(content)
+        return content
+
+    measurement = _timed_stream(model, lambda: client.chat(model=model, messages=messages, stream=True,
+                                                           options=options), text, verbose)
+    measurement["reply"] = "".join(reply)
+    return measurement
+
+def _timed_stream(model, request, text, verbose):
+    # Token arrivals are perf_counter_ns() values in a C int64 array; the
+    # float seconds in token_times (the perf_counter clock) are derived after
+    # the stream so the per-token cost stays one append
+    token_ns = array('q')
+    final = {}
+    publishing = events.active()
+    if publishing:
+        events.publish("request_start", model=model)
+
+    start_ns = time.perf_counter_ns()
+    try:
+        for chunk in request():
+            content = text(chunk)
+            if content:
+                token_ns.append(time.perf_counter_ns())
+                if publishing and len(token_ns) % PROGRESS_TOKENS == 0:
+                    events.publish("tokens", count=PROGRESS_TOKENS)
+                if verbose:
+                    print(content, end='', flush=True)
+            if chunk.get('done'):
+                final = chunk
+    finally:
+        end_ns = time.perf_counter_ns()
+        start = start_ns / NS_PER_SECOND
+        end = end_ns / NS_PER_SECOND
+        token_times = [t / NS_PER_SECOND for t in token_ns]
+        if publishing:
+            events.publish(
+                "request_end",
+                model=model,
+                tokens=len(token_times) % PROGRESS_TOKENS,
+                ttft=token_times[0] - start if token_times else None,
+                itl=inter_token_latencies(token_times),
+                failed=not final,
+                latency=end - start,
+                response_tokens=final.get('eval_count') or len(token_times),
+                load_duration=(final.get('load_duration') or 0) / NS_PER_SECOND,
+                prompt_eval_duration=(final.get('prompt_eval_duration') or 0) / NS_PER_SECOND,
+                eval_duration=(final.get('eval_duration') or 0) / NS_PER_SECOND
+            )
+
+    if verbose:
+        print("\n")
+
+    return {
+        "start": start,
+        "end": end,
+        "latency": end - start,
+        "ttft": token_times[0] - start if token_times else end - start,
+        "token_times": token_times,
+        "token_ns": token_ns,
+        "prompt_tokens": final.get('prompt_eval_count') or 0,
+        "response_tokens": final.get('eval_count') or 0,
+        "load_duration": (final.get('load_duration') or 0) / NS_PER_SECOND,
+        "prompt_eval_duration": (final.get('prompt_eval_duration') or 0) / NS_PER_SECOND,
+        "eval_duration": (final.get('eval_duration') or 0) / NS_PER_SECOND,
+        "total_duration": (final.get('total_duration') or 0) / NS_PER_SECOND
+    }
+
+def check_deadline(deadline):
+    """Raise TimeoutError once `deadline` (a time.monotonic() value) has passed"""
+    if deadline and time.monotonic() > deadline:
+        raise TimeoutError("cell timeout reached")
+
+def inter_token_latencies(token_times):
+    """Gaps between consecutive token arrivals, in seconds"""
+    return [b - a for a, b in zip(token_times, token_times[1:])]
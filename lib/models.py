@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import time
+import urllib.request
+import ollama
+import psutil
+
+from .sampler import find_ollama_processes
+
+DEFAULT_REGISTRY = "registry.ollama.ai"
+DEFAULT_NAMESPACE = "library"
+
+# How long to wait for the server to report a model as unloaded
+UNLOAD_TIMEOUT = 30
+
+def models_dir():
+    """Locate Ollama's model store (OLLAMA_MODELS, user install, or Linux service install)"""
+    candidates = [
+        os.environ.get('OLLAMA_MODELS'),
+        os.path.expanduser('~/.ollama/models'),
+        '/usr/share/ollama/.ollama/models'
+    ]
+    for path in candidates:
+        if path and os.path.isdir(path):
+            return path
+    return None
+
+def _manifest_path(root, model):
+    name, _, tag = model.partition(':')
+    parts = name.split('/')
+    if len(parts) == 1:
+        parts = [DEFAULT_REGISTRY, DEFAULT_NAMESPACE] + parts
+    elif len(parts) == 2:
+        parts = [DEFAULT_REGISTRY] + parts
+    return os.path.join(root, 'manifests', *parts, tag or 'latest')
+
+def model_blob_paths(model):
+    """Return the on-disk blob files (weights, template, ...) that make up a model"""
+    root = models_dir()
+    if not root:
+        return []
+    try:
+        with open(_manifest_path(root, model), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return []
+    paths = []
+    for layer in manifest.get('layers', []) + [manifest.get('config') or {}]:
+        digest = layer.get('digest')
+        if digest:
+            path = os.path.join(root, 'blobs', digest.replace(':', '-'))
+            if os.path.exists(path):
+                paths.append(path)
+    return paths
+
+def _matches(entry, model):
+    """Compare names the way Ollama resolves them (an omitted tag means :latest)"""
+    if ':' not in model:
+        model += ':latest'
+    return model in (entry.get('name'), entry.get('model'))
+
+def model_size(model, client=ollama):
+    """Size in bytes reported by ollama.list(), or 0 if the model isn't installed"""
+    for entry in client.list().get('models', []):
+        if _matches(entry, model):
+            return entry.get('size') or 0
+    return 0
+
+def model_digest(model, client=ollama):
+    """Content digest of an installed model, which identifies the exact build"""
+    for entry in client.list().get('models', []):
+        if _matches(entry, model):
+            return entry.get('digest')
+    return None
+
+def host_url(host=None):
+    """Normalise an Ollama host (OLLAMA_HOST by default) into a base URL"""
+    host = host or os.environ.get('OLLAMA_HOST') or '127.0.0.1:11434'
+    if '://' not in host:
+        host = f"http://{host}"
+    return host.replace('://0.0.0.0', '://127.0.0.1').rstrip('/')
+
+def ollama_version(host=None):
+    """Server version from /api/version, or None if it can't be reached"""
+    try:
+        with urllib.request.urlopen(f"{host_url(host)}/api/version", timeout=5) as response:
+            return json.load(response).get('version')
+    except (OSError, ValueError):
+        return None
+
+def is_installed(model, client=ollama):
+    return any(_matches(entry, model) for entry in client.list().get('models', []))
+
+def resident_model(model, client=ollama):
+    """Return the ollama.ps() entry for a loaded model, or None"""
+    for entry in client.ps().get('models', []):
+        if _matches(entry, model):
+            return entry
+    return None
+
+def ollama_rss():
+    """Total resident memory of the Ollama server and runner processes, in bytes"""
+    total = 0
+    for proc in find_ollama_processes():
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+def drop_page_cache(paths):
+    """Evict model blobs from the page cache (clean pages only, no root needed)"""
+    if not hasattr(os, 'posix_fadvise'):
+        logging.warning("Dropping the page cache is not supported on this platform")
+        return False
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError as e:
+            logging.warning(f"Could not drop {path} from the page cache: {str(e)}")
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+def unload_model(model, client=ollama, embed=False):
+    """Ask the server to evict the model and wait until it is gone"""
+    if embed:
+        client.embed(model=model, input=[], keep_alive=0)
+    else:
+        client.generate(model=model, keep_alive=0)
+    deadline = time.time() + UNLOAD_TIMEOUT
+    while resident_model(model, client) and time.time() < deadline:
+        time.sleep(0.1)
+
+def prime_model(model, options=None, client=ollama):
+    """Load the model with `options` ahead of a timed section.
+
+    Ollama reloads a resident model when num_ctx (or another load option)
+    changes, so without this the first timed request pays for the reload.
+    """
+    client.generate(model=model, prompt='', options=options)
+
+def _timed_load(model, options, client, embed=False):
+    start = time.perf_counter()
+    if embed:
+        response = client.embed(model=model, input=[], options=options)
+    else:
+        response = client.generate(model=model, prompt='', options=options)
+    return time.perf_counter() - start, (response.get('load_duration') or 0) / 1e9
+
+def measure_load(model, options=None, drop_cache=False, client=ollama, local=True, embed=False):
+    """Measure cold (unloaded) and warm (already resident) load of a model.
+
+    An empty-prompt generate only loads the model, so its wall time and the
+    server's load_duration isolate the load from prompt processing. The
+    options must match the benchmark's, otherwise Ollama reloads the model
+    on the first measured request. Page cache and RSS measurements only
+    apply when the server runs on this machine (`local`). Embedding-only
+    models can't generate, so with `embed` an empty embed does the load.
+    """
+    unload_model(model, client, embed)
+    if drop_cache and local:
+        drop_page_cache(model_blob_paths(model))
+
+    rss_before = ollama_rss() if local else 0
+    cold_time, cold_duration = _timed_load(model, options, client, embed)
+    rss_after = ollama_rss() if local else 0
+    warm_time, warm_duration = _timed_load(model, options, client, embed)
+
+    size = model_size(model, client)
+    resident = resident_model(model, client)
+    return {
+        "cold_load_time": cold_time,
+        "cold_load_duration": cold_duration,
+        "warm_load_time": warm_time,
+        "warm_load_duration": warm_duration,
+        "page_cache_dropped": drop_cache and local,
+        "model_size": size,
+        "load_throughput": size / cold_time if cold_time > 0 else 0,
+        "resident_memory_delta": rss_after - rss_before if local else None,
+        "resident_size": (resident.get('size') or 0) if resident else 0,
+        "resident_vram": (resident.get('size_vram') or 0) if resident else 0
+    }
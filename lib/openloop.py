@@ -0,0 +1,176 @@
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+import ollama
+
+from .measure import check_deadline, stream_generate, inter_token_latencies
+from .models import prime_model
+from .stats import percentiles
+
+DEFAULT_TTFT_SLO = 0.5
+DEFAULT_ITL_SLO = 0.1
+
+# Fraction of requests that must meet the SLOs for a rate to count as sustainable
+DEFAULT_ATTAINMENT = 0.95
+
+# Upper bound on simultaneously outstanding requests on the client side
+MAX_IN_FLIGHT = 256
+
+def poisson_arrivals(rate, duration, prompts, output_lengths=None, seed=0):
+    """Yield (offset, request) pairs with exponential inter-arrival gaps.
+
+    Requests draw their prompt and num_predict uniformly from the given
+    prompts and output lengths, so the mix is reproducible for a seed.
+    """
+    rng = random.Random(seed)
+    offset = rng.expovariate(rate)
+    while offset < duration:
+        request = {"prompt": rng.choice(prompts)}
+        if output_lengths:
+            request["num_predict"] = rng.choice(output_lengths)
+        yield offset, request
+        offset += rng.expovariate(rate)
+
+# Per-request values kept for the summary; a compact tuple per request keeps
+# memory bounded for long replays
+RECORD_FIELDS = ("ttft", "itl_p99", "latency", "queue_delay", "dispatch_delay", "response_tokens")
+
+def _send(model, request, scheduled, options, client):
+    started = time.perf_counter()
+    request_options = dict(options or {})
+    if request.get("num_predict"):
+        request_options["num_predict"] = request["num_predict"]
+    try:
+        measurement = stream_generate(request.get("model") or model, request["prompt"], request_options, client=client)
+    except Exception as e:
+        logging.warning(f"Request failed: {str(e)}")
+        return None
+    # Time the server held the request before prefill started
+    queue_delay = max(0.0, measurement["ttft"] - measurement["prompt_eval_duration"] - measurement["load_duration"])
+    itl = inter_token_latencies(measurement["token_times"])
+    return (
+        measurement["ttft"],
+        float(np.percentile(itl, 99)) if itl else 0.0,
+        measurement["latency"],
+        queue_delay,
+        started - scheduled,
+        measurement["response_tokens"]
+    )
+
+def run_open_loop(model, arrivals, options=None, client=ollama, ttft_slo=DEFAULT_TTFT_SLO, itl_slo=DEFAULT_ITL_SLO,
+                  deadline=None):
+    """Issue requests on their arrival schedule regardless of completions.
+
+    `arrivals` is any iterable of (offset_seconds, request) pairs, consumed
+    lazily, where request holds a prompt and optionally num_predict/model.
+    Dispatch stops with TimeoutError once `deadline` (time.monotonic()) passes.
+    """
+    records = []
+    counts = {"requests": 0, "errors": 0}
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+    def collect(future):
+        record = future.result()
+        with lock:
+            if record is None:
+                counts["errors"] += 1
+            else:
+                records.append(record)
+        slots.release()
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as executor:
+        for offset, request in arrivals:
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            check_deadline(deadline)
+            slots.acquire()
+            counts["requests"] += 1
+            executor.submit(_send, model, request, scheduled, options, client).add_done_callback(collect)
+        offered_duration = time.perf_counter() - start
+    wall_time = time.perf_counter() - start
+
+    values = np.array(records, dtype=float).reshape(-1, len(RECORD_FIELDS))
+    columns = dict(zip(RECORD_FIELDS, values.T))
+    good = (columns["ttft"] <= ttft_slo) & (columns["itl_p99"] <= itl_slo)
+    requests = counts["requests"]
+    per_second = 1 / wall_time if wall_time > 0 else 0
+    return {
+        "requests": requests,
+        "errors": counts["errors"],
+        "offered_rate": requests / offered_duration if offered_duration > 0 else 0,
+        "wall_time": wall_time,
+        "throughput": len(values) * per_second,
+        "tokens_per_second": float(columns["response_tokens"].sum()) * per_second,
+        "goodput": int(good.sum()) * per_second,
+        "good_tokens_per_second": float(columns["response_tokens"][good].sum()) * per_second,
+        "slo": {"ttft": ttft_slo, "itl_p99": itl_slo},
+        "slo_attainment": int(good.sum()) / requests if requests else 0,
+        **{field: percentiles(columns[field].tolist(), (50, 95, 99))
+           for field in ("ttft", "itl_p99", "latency", "queue_delay", "dispatch_delay")}
+    }
+
+def find_max_rate(model, prompts, options=None, client=ollama, duration=30, output_lengths=None,
+                  ttft_slo=DEFAULT_TTFT_SLO, itl_slo=DEFAULT_ITL_SLO, attainment=DEFAULT_ATTAINMENT,
+                  low=0.1, high=32.0, iterations=6, deadline=None):
+    """Binary-search the highest Poisson arrival rate that still meets the SLOs"""
+    runs = []
+    best = None
+    for i in range(iterations):
+        rate = (low + high) / 2
+        logging.info(f"Open-loop probe at {rate:.2f} req/s for {duration}s...")
+        summary = run_open_loop(model, poisson_arrivals(rate, duration, prompts, output_lengths, seed=i),
+                                options, client, ttft_slo, itl_slo, deadline)
+        summary["rate"] = rate
+        runs.append(summary)
+        if summary["requests"] and summary["slo_attainment"] >= attainment:
+            best = rate
+            low = rate
+        else:
+            high = rate
+    return {"max_sustainable_rate": best, "attainment_target": attainment, "probes": runs}
+
+def run_load_test(model, prompts, options=None, client=ollama, rate=1.0, duration=60, output_lengths=None,
+                  ttft_slo=DEFAULT_TTFT_SLO, itl_slo=DEFAULT_ITL_SLO, search=False, max_rate=32.0,
+                  attainment=DEFAULT_ATTAINMENT, trace=None, speedup=1.0, limit=None, use_trace_models=False,
+                  deadline=None):
+    """Open-loop Poisson load test at `rate`, optionally followed by a max-rate search.
+
+    With `trace`, requests are replayed from a request log instead (see
+    trace.trace_arrivals) and the rate search is skipped.
+    """
+    if trace:
+        from .sweep import calibrate
+        from .trace import read_trace, trace_arrivals
+
+        # Size synthetic prompts before the replay clock starts (always, as
+        # looking for length-only records would take an extra pass over the
+        # trace), then reload the model with the replay's num_ctx, which the
+        # calibration probes changed
+        calibration = calibrate(model, options, client)
+        prime_model(model, options, client)
+        logging.info(f"Replaying {trace} at {speedup:g}x speed...")
+        arrivals = trace_arrivals(read_trace(trace), model, speedup, limit, use_trace_models, client, calibration)
+        summary = run_open_loop(model, arrivals, options, client, ttft_slo, itl_slo, deadline)
+        summary["trace"] = {"path": trace, "speedup": speedup, "limit": limit}
+        summary["rate"] = summary["offered_rate"]
+        return summary
+
+    # Earlier phases may have left the model loaded with another num_ctx;
+    # reloading it inside the arrival clock would queue the first requests
+    prime_model(model, options, client)
+    logging.info(f"Open-loop load at {rate:.2f} req/s for {duration}s...")
+    summary = run_open_loop(model, poisson_arrivals(rate, duration, prompts, output_lengths),
+                            options, client, ttft_slo, itl_slo, deadline)
+    summary["rate"] = rate
+    if search:
+        summary["search"] = find_max_rate(model, prompts, options, client, duration, output_lengths,
+                                          ttft_slo, itl_slo, attainment, high=max_rate, deadline=deadline)
+    return summary
@@ -0,0 +1,166 @@
+import logging
+import uuid
+
+import numpy as np
+import ollama
+
+from .measure import check_deadline, stream_chat, stream_generate
+from .models import prime_model
+from .sweep import CONTEXT_MARGIN, calibrate, context_size, filler, synthetic_prompt
+
+DEFAULT_PREFIX_LENGTHS = [256, 1024, 4096]
+DEFAULT_FAMILIES = 3
+DEFAULT_VARIANTS = 4
+DEFAULT_TURNS = 4
+
+# Unique tail after the shared prefix (a question about it), and the reply
+# length; both short so the prefill of the prefix dominates TTFT
+SUFFIX_WORDS = 24
+OUTPUT_TOKENS = 16
+
+def _question(seed):
+    return f"\n\nQuestion {seed}: {filler(SUFFIX_WORDS, seed)}?"
+
+def _summarize(measurements):
+    """Mean TTFT, evaluated prompt tokens and server prefill time of a request group"""
+    prefill = [m["prompt_eval_duration"] or m["ttft"] for m in measurements]
+    return {
+        "requests": len(measurements),
+        "ttft": float(np.mean([m["ttft"] for m in measurements])),
+        "evaluated_tokens": float(np.mean([m["prompt_tokens"] for m in measurements])),
+        "prefill_time": float(np.mean(prefill))
+    }
+
+def _compare(unique, cached):
+    """TTFT reduction, prefill speedup and share of prompt tokens served from the cache"""
+    return {
+        "ttft_reduction": 1 - cached["ttft"] / unique["ttft"] if unique["ttft"] > 0 else None,
+        "prefill_speedup": unique["prefill_time"] / cached["prefill_time"] if cached["prefill_time"] > 0 else None,
+        "cached_share": (1 - cached["evaluated_tokens"] / unique["evaluated_tokens"]
+                         if unique["evaluated_tokens"] > 0 else None)
+    }
+
+def run_prefix_point(model, words, families, variants, options, client, seed, deadline=None):
+    """Unique prompts vs prompt families sharing a prefix of `words` words.
+
+    Shared prompts are sent family by family (the order a structured
+    workload would use) and round-robin across families, which shows
+    whether the server can keep more than one prefix cached. The first
+    request of each family only primes the cache and isn't counted.
+    """
+    unique = []
+    for _ in range(variants):
+        check_deadline(deadline)
+        seed += 1
+        unique.append(stream_generate(model, synthetic_prompt(words, seed) + _question(seed), options, client=client))
+
+    sequential = []
+    prefixes = []
+    for _ in range(families):
+        seed += 1
+        prefixes.append(synthetic_prompt(words, seed))
+    for prefix in prefixes:
+        for v in range(variants + 1):
+            check_deadline(deadline)
+            measurement = stream_generate(model, prefix + _question(seed * 100 + v), options, client=client)
+            if v:
+                sequential.append(measurement)
+
+    interleaved = []
+    prefixes = []
+    for _ in range(families):
+        seed += 1
+        prefixes.append(synthetic_prompt(words, seed))
+    for v in range(variants + 1):
+        for prefix in prefixes:
+            check_deadline(deadline)
+            measurement = stream_generate(model, prefix + _question(seed * 100 + v), options, client=client)
+            if v:
+                interleaved.append(measurement)
+
+    unique, sequential, interleaved = _summarize(unique), _summarize(sequential), _summarize(interleaved)
+    return {
+        "unique": unique,
+        "shared": {**sequential, **_compare(unique, sequential)},
+        "interleaved": {**interleaved, **_compare(unique, interleaved)}
+    }, seed
+
+def run_conversation(model, words, turns, options, client, seed, deadline=None):
+    """Multi-turn chat with a system prompt of `words` words.
+
+    The conversation is played once in order, so each turn can reuse the
+    server's cached history, and then every turn's full history is replayed
+    behind a unique marker that defeats any prefix reuse.
+    """
+    system = {"role": "system", "content": synthetic_prompt(words, seed)}
+    messages = [system]
+    histories = []
+    warm = []
+    for turn in range(turns):
+        check_deadline(deadline)
+        messages.append({"role": "user", "content": _question(seed * 100 + turn).strip()})
+        histories.append(list(messages))
+        measurement = stream_chat(model, messages, options, client=client)
+        warm.append(measurement)
+        messages.append({"role": "assistant", "content": measurement["reply"]})
+
+    points = []
+    for turn, (history, hot) in enumerate(zip(histories, warm), 1):
+        check_deadline(deadline)
+        marker = {"role": "system", "content": f"Session {uuid.uuid4().hex}. {system['content']}"}
+        cold = stream_chat(model, [marker] + history[1:], options, client=client)
+        points.append({
+            "turn": turn,
+            "history_tokens": cold["prompt_tokens"],
+            "warm_ttft": hot["ttft"],
+            "cold_ttft": cold["ttft"],
+            "warm_evaluated": hot["prompt_tokens"],
+            "cold_evaluated": cold["prompt_tokens"],
+            "ttft_reduction": 1 - hot["ttft"] / cold["ttft"] if cold["ttft"] > 0 else None
+        })
+    return points
+
+def run_prompt_cache(model, options=None, client=ollama, prefix_lengths=None, families=DEFAULT_FAMILIES,
+                     variants=DEFAULT_VARIANTS, turns=DEFAULT_TURNS, deadline=None):
+    """Measure what the server's prompt (KV) cache saves on shared prefixes and chat history.
+
+    For each prefix length, families of prompts sharing a prefix are
+    compared with fully unique prompts of the same length; a multi-turn
+    conversation with the largest prefix as system prompt is compared with
+    replaying each turn cold. The model is reloaded with each scenario's
+    num_ctx first, so no measured request (the unique group and the first
+    turn come first) includes a reload.
+    """
+    prefix_lengths = prefix_lengths or DEFAULT_PREFIX_LENGTHS
+    options = dict(options or {})
+    options.setdefault("num_predict", OUTPUT_TOKENS)
+    overhead, tokens_per_word = calibrate(model, options, client)
+
+    points = []
+    seed = 1000
+    for target in prefix_lengths:
+        words = max(1, int((target - overhead) / tokens_per_word))
+        point_options = dict(options)
+        point_options.setdefault("num_ctx", context_size(target + SUFFIX_WORDS * 2 + OUTPUT_TOKENS + CONTEXT_MARGIN))
+        logging.info(f"Prompt cache: {target}-token prefixes, {families} families of {variants} prompts...")
+        prime_model(model, point_options, client)
+        point, seed = run_prefix_point(model, words, families, variants, point_options, client, seed, deadline)
+        points.append({"prefix_tokens": target, **point})
+
+    conversation = []
+    if turns:
+        target = max(prefix_lengths)
+        words = max(1, int((target - overhead) / tokens_per_word))
+        chat_options = dict(options)
+        chat_options.setdefault("num_ctx", context_size(target + turns * (SUFFIX_WORDS * 2 + OUTPUT_TOKENS * 2)
+                                                        + CONTEXT_MARGIN))
+        logging.info(f"Prompt cache: {turns}-turn conversation with a {target}-token system prompt...")
+        prime_model(model, chat_options, client)
+        conversation = run_conversation(model, words, turns, chat_options, client, seed + 1, deadline)
+
+    return {
+        "families": families,
+        "variants": variants,
+        "prefixes": points,
+        "conversation": {"system_tokens": max(prefix_lengths), "turns": conversation} if conversation else None
+    }
@@ -0,0 +1,292 @@
+import base64
+import glob
+import html
+import io
+import json
+import os
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")  # Reports are rendered headless, without a display
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from .analysis import analyze_performance
+from .timeline import load_timeline
+
+RESULTS_DIR = 'results'
+
+# Resource timeline columns and their axis labels
+TIMELINE_COLUMNS = (
+    ("cpu", "CPU %"),
+    ("memory", "Memory %"),
+    ("process_rss_mb", "Ollama RSS (MB)"),
+    ("gpu_load", "GPU %"),
+    ("gpu_memory_mb", "VRAM (MB)"),
+    ("gpu_temperature", "GPU °C"),
+)
+
+# Columns of the per-result table: (frame column, heading, format)
+TABLE_COLUMNS = (
+    ("label", "Result", "{}"),
+    ("prompt_eval_speed", "Prompt (t/s)", "{:.2f}"),
+    ("response_speed", "Response (t/s)", "{:.2f}"),
+    ("ttft_p50", "TTFT p50 (ms)", "{:.0f}"),
+    ("ttft_p95", "TTFT p95 (ms)", "{:.0f}"),
+    ("itl_p50", "ITL p50 (ms)", "{:.1f}"),
+    ("load_time", "Load (s)", "{:.2f}"),
+    ("cpu", "CPU %", "{:.0f}"),
+    ("gpu_load", "GPU %", "{:.0f}"),
+)
+
+def find_runs(paths=None):
+    """Expand files, directories and glob patterns into saved benchmark files"""
+    files = []
+    for path in paths or [RESULTS_DIR]:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, 'benchmark_*.json'))))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            files.extend(sorted(glob.glob(path)))
+    return files
+
+def load_runs(paths=None):
+    """Load every result from the saved runs, tagging each with its run name"""
+    results = []
+    for path in find_runs(paths):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        run = os.path.splitext(os.path.basename(path))[0].removeprefix('benchmark_')
+        for result in data.get("results", []):
+            # Grid, co-residency and other summaries are saved in the same format
+            if "model_name" in result and "speeds" in result:
+                if result.get("token_timeline"):
+                    # Sidecar paths are relative to the results file
+                    directory = os.path.join(os.path.dirname(path), result["token_timeline"]["path"])
+                    result["token_timeline"] = {**result["token_timeline"], "directory": directory}
+                results.append({**result, "run": run})
+    if not results:
+        raise ValueError("No saved benchmark results found")
+    return results
+
+def results_frame(results):
+    """One row per result with the headline metrics"""
+    runs = {result["run"] for result in results}
+    hosts = {result.get("host") for result in results}
+    rows = []
+    for result in results:
+        label = result["model_name"]
+        if len(hosts) > 1:
+            label += f" @ {result.get('host') or 'local'}"
+        if len(runs) > 1:
+            label += f" ({result['run']})"
+        latency = result.get("latency") or {}
+        resources = result["system"].get("resources") or {}
+        rows.append({
+            "label": label,
+            "run": result["run"],
+            "model": result["model_name"],
+            "host": result.get("host"),
+            "prompt_set": result.get("prompt_set"),
+            "prompt_eval_speed": result["speeds"]["prompt_eval"],
+            "response_speed": result["speeds"]["response"],
+            "ttft_p50": (latency.get("ttft") or {}).get("p50", np.nan) * 1000,
+            "ttft_p95": (latency.get("ttft") or {}).get("p95", np.nan) * 1000,
+            "itl_p50": (latency.get("inter_token") or {}).get("p50", np.nan) * 1000,
+            "load_time": result["performance"]["model_load_time"],
+            "cpu": (resources.get("cpu") or {}).get("mean", np.nan),
+            "gpu_load": ((resources.get("gpu") or {}).get("load") or {}).get("mean", np.nan),
+        })
+    return pd.DataFrame(rows)
+
+def model_comparison(frame):
+    """Per-model means across all loaded runs and hosts"""
+    grouped = frame.groupby("model")
+    summary = grouped[["prompt_eval_speed", "response_speed", "ttft_p50", "itl_p50", "load_time"]].mean()
+    summary.insert(0, "results", grouped.size())
+    return summary.sort_values("response_speed", ascending=False).reset_index()
+
+def _throughput_figure(frame):
+    fig, ax = plt.subplots(figsize=(10, 0.5 * len(frame) + 1.5), layout="constrained")
+    y = np.arange(len(frame))
+    ax.barh(y - 0.2, frame["response_speed"], height=0.4, label="Response")
+    ax.barh(y + 0.2, frame["prompt_eval_speed"], height=0.4, label="Prompt evaluation")
+    ax.set_yticks(y, frame["label"])
+    ax.invert_yaxis()
+    ax.set_xlabel("tokens/s")
+    ax.legend()
+    return fig
+
+def _latency_figure(results, frame):
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4.5), layout="constrained")
+    for result, label in zip(results, frame["label"]):
+        samples = result.get("samples") or {}
+        for ax, metric in zip(axes, ("ttft", "latency")):
+            values = np.sort(samples.get(metric) or [])
+            if len(values):
+                ax.step(values, np.arange(1, len(values) + 1) / len(values), where="post", label=label)
+    for ax, title in zip(axes, ("Time to first token", "Request latency")):
+        ax.set_title(title)
+        ax.set_xlabel("seconds")
+        ax.set_ylabel("fraction of requests")
+        ax.grid(alpha=0.3)
+    fig.legend(*axes[0].get_legend_handles_labels(), loc="outside lower center", fontsize="small")
+    return fig
+
+def _itl_figure(results, frame):
+    """Inter-token latency CDF over every token, from the binary timeline sidecars"""
+    curves = []
+    for result, label in zip(results, frame["label"]):
+        directory = (result.get("token_timeline") or {}).get("directory")
+        if directory and os.path.isdir(directory):
+            curves.append((np.sort(load_timeline(directory).inter_token_latencies("requests")) * 1000, label))
+    curves = [(values, label) for values, label in curves if len(values)]
+    if not curves:
+        return None
+    fig, ax = plt.subplots(figsize=(12, 4.5), layout="constrained")
+    for values, label in curves:
+        ax.step(values, np.arange(1, len(values) + 1) / len(values), where="post", label=label)
+    ax.set_xscale("log")
+    ax.set_xlabel("milliseconds between tokens")
+    ax.set_ylabel("fraction of tokens")
+    ax.grid(alpha=0.3)
+    fig.legend(*ax.get_legend_handles_labels(), loc="outside lower center", fontsize="small")
+    return fig
+
+def _speed_figure(results, frame):
+    fig, ax = plt.subplots(figsize=(12, 4.5), layout="constrained")
+    for result, label in zip(results, frame["label"]):
+        timeline = result.get("timeline")
+        if timeline:
+            ax.plot(timeline["request_start"], timeline["response_speed"], marker=".", label=label)
+        elif (result.get("samples") or {}).get("response_speed"):
+            # Older results only have the per-request samples, in order
+            ax.plot(result["samples"]["response_speed"], marker=".", label=label)
+    ax.set_xlabel("seconds since start (request number for older results)")
+    ax.set_ylabel("response tokens/s")
+    ax.grid(alpha=0.3)
+    fig.legend(*ax.get_legend_handles_labels(), loc="outside lower center", fontsize="small")
+    return fig
+
+def _resource_figure(results, frame):
+    timelines = [(result["system"]["resources"]["timeline"], label)
+                 for result, label in zip(results, frame["label"])
+                 if (result["system"].get("resources") or {}).get("timeline")]
+    if not timelines:
+        return None
+    columns = [(column, title) for column, title in TIMELINE_COLUMNS
+               if any(column in timeline for timeline, _ in timelines)]
+    fig, axes = plt.subplots(len(columns), 1, figsize=(12, 2.2 * len(columns) + 0.5),
+                             sharex=True, squeeze=False, layout="constrained")
+    for ax, (column, title) in zip(axes[:, 0], columns):
+        for timeline, label in timelines:
+            if column in timeline:
+                values = [np.nan if v is None else v for v in timeline[column]]
+                ax.plot(timeline["time"], values, label=label)
+        ax.set_ylabel(title)
+        ax.grid(alpha=0.3)
+    axes[-1, 0].set_xlabel("seconds since start")
+    fig.legend(*axes[0, 0].get_legend_handles_labels(), loc="outside lower center", fontsize="small")
+    return fig
+
+def build_figures(results, frame):
+    """Return (title, figure) pairs for the report"""
+    figures = [
+        ("Throughput", _throughput_figure(frame)),
+        ("Latency CDFs", _latency_figure(results, frame)),
+        ("Tokens/s Over Time", _speed_figure(results, frame)),
+    ]
+    itl = _itl_figure(results, frame)
+    if itl:
+        figures.insert(2, ("Inter-Token Latency CDF", itl))
+    resources = _resource_figure(results, frame)
+    if resources:
+        figures.append(("Resource Timelines", resources))
+    return figures
+
+def _png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100)
+    plt.close(fig)
+    return buffer.getvalue()
+
+def _cell(value, fmt):
+    if isinstance(value, float) and np.isnan(value):
+        return "n/a"
+    return fmt.format(value)
+
+def _table_rows(frame):
+    headings = [heading for _, heading, _ in TABLE_COLUMNS]
+    rows = [[_cell(row[column], fmt) for column, _, fmt in TABLE_COLUMNS] for _, row in frame.iterrows()]
+    return headings, rows
+
+def _comparison_rows(comparison):
+    headings = ["Model", "Results", "Prompt (t/s)", "Response (t/s)", "TTFT p50 (ms)", "ITL p50 (ms)", "Load (s)"]
+    formats = ["{}", "{}", "{:.2f}", "{:.2f}", "{:.0f}", "{:.1f}", "{:.2f}"]
+    rows = [[_cell(value, fmt) for value, fmt in zip(row, formats)]
+            for row in comparison.itertuples(index=False)]
+    return headings, rows
+
+def render_html(frame, comparison, figures, insights, title):
+    def table(headings, rows):
+        head = "".join(f"<th>{html.escape(h)}</th>" for h in headings)
+        body = "".join("<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>" for row in rows)
+        return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+    parts = [f"<h1>{html.escape(title)}</h1>",
+             "<h2>Model Comparison</h2>", table(*_comparison_rows(comparison)),
+             "<h2>Results</h2>", table(*_table_rows(frame))]
+    if insights:
+        parts.append("<h2>Insights</h2><ul>" + "".join(f"<li>{html.escape(i)}</li>" for i in insights) + "</ul>")
+    for name, fig in figures:
+        image = base64.b64encode(_png(fig)).decode()
+        parts.append(f"<h2>{html.escape(name)}</h2><img src=\"data:image/png;base64,{image}\" alt=\"{html.escape(name)}\">")
+    style = ("body{font-family:sans-serif;margin:2em;max-width:1200px}table{border-collapse:collapse}"
+             "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}td:first-child,th:first-child{text-align:left}"
+             "img{max-width:100%}")
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+            f"<style>{style}</style></head><body>{''.join(parts)}</body></html>\n")
+
+def render_markdown(frame, comparison, figures, insights, title, asset_dir):
+    """Markdown report; figures are written as PNG files into asset_dir"""
+    def table(headings, rows):
+        lines = ["| " + " | ".join(headings) + " |", "|" + "---|" * len(headings)]
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+        return "\n".join(lines)
+
+    os.makedirs(asset_dir, exist_ok=True)
+    parts = [f"# {title}", "## Model Comparison", table(*_comparison_rows(comparison)),
+             "## Results", table(*_table_rows(frame))]
+    if insights:
+        parts += ["## Insights", "\n".join(f"- {insight}" for insight in insights)]
+    for name, fig in figures:
+        filename = name.lower().replace(" ", "_").replace("/", "_") + ".png"
+        with open(os.path.join(asset_dir, filename), 'wb') as f:
+            f.write(_png(fig))
+        parts += [f"## {name}", f"![{name}]({os.path.basename(asset_dir)}/{filename})"]
+    return "\n\n".join(parts) + "\n"
+
+def generate_report(paths=None, output=None, fmt="html"):
+    """Render a report over the saved runs in `paths` and return its filename"""
+    results = load_runs(paths)
+    frame = results_frame(results)
+    comparison = model_comparison(frame)
+    figures = build_figures(results, frame)
+    insights = analyze_performance(results)
+
+    timestamp = datetime.now().strftime("%H%M%S_%d%m%Y")
+    extension = "html" if fmt == "html" else "md"
+    output = output or os.path.join(RESULTS_DIR, f"report_{timestamp}.{extension}")
+    title = f"AI Benchmark Report ({len(frame)} results from {frame['run'].nunique()} runs)"
+    if fmt == "html":
+        content = render_html(frame, comparison, figures, insights, title)
+    else:
+        content = render_markdown(frame, comparison, figures, insights, title,
+                                  os.path.splitext(output)[0] + "_files")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return output
@@ -1,27 +1,114 @@
 import numpy as np
 
+from .measure import inter_token_latencies
+from .stats import percentiles, summarize
+from .timeline import TokenTimeline
+
+# Window used for the rolling completion speed samples
+COMPLETION_WINDOW = 10
+
 class BenchmarkResult:
     def __init__(self, model_name):
         self.model_name = model_name
+        self.host = None
         self.prompt_tokens = 0
         self.response_tokens = 0
         self.model_load_time = 0
+        self.load = None
+        self.pull = None
         self.prompt_eval_time = 0
         self.response_time = 0
         self.total_time = 0
         self.completion_tokens_per_second = []
+        self.ttft = []
+        self.inter_token_latencies = []
+        self.load_duration = 0
+        self.prompt_eval_duration = 0
+        self.eval_duration = 0
         self.resources_usage = None
         self.system_specs = None
+        self.options = {}
+        self.prompt_set = None
+        self.metadata = {}
+        self.warmup = 0
+        self.repetitions = 0
+        self.samples = {"prompt_eval_speed": [], "response_speed": [], "ttft": [], "latency": []}
+        self.statistics = {}
+        self.concurrency_levels = []
+        self.saturation_level = None
+        self.context_sweep = []
+        self.open_loop = None
+        self.prompt_cache = None
+        self.embeddings = None
+        # (perf_counter start, response tokens/s) per request; `origin` is the
+        # perf_counter value the saved offsets are relative to
+        self.request_timeline = []
+        self.origin = None
+        # Joules used by the sampled devices while prefilling and decoding
+        self.prefill_energy = None
+        self.decode_energy = None
+        # Every token arrival, saved as a binary sidecar next to the JSON
+        self.token_timeline = TokenTimeline()
+        self.token_timeline_info = None
+        
+    def record_request(self, measurement):
+        """Accumulate one streamed request measured by measure.stream_generate"""
+        self.prompt_tokens += measurement["prompt_tokens"]
+        self.response_tokens += measurement["response_tokens"]
+        self.load_duration += measurement["load_duration"]
+        self.prompt_eval_duration += measurement["prompt_eval_duration"]
+        self.eval_duration += measurement["eval_duration"]
+        self.ttft.append(measurement["ttft"])
+
+        # Prefer the server-side timings, fall back to client-side ones
+        if measurement["prompt_eval_duration"] > 0:
+            prompt_eval_time = measurement["prompt_eval_duration"]
+        else:
+            prompt_eval_time = measurement["ttft"]
+        if measurement["eval_duration"] > 0:
+            response_time = measurement["eval_duration"]
+        else:
+            response_time = measurement["latency"] - measurement["ttft"]
+        self.prompt_eval_time += prompt_eval_time
+        self.response_time += response_time
+
+        # Per-request samples for the repetition statistics
+        if prompt_eval_time > 0:
+            self.samples["prompt_eval_speed"].append(measurement["prompt_tokens"] / prompt_eval_time)
+        if response_time > 0:
+            self.samples["response_speed"].append(measurement["response_tokens"] / response_time)
+            self.request_timeline.append((measurement["start"], self.samples["response_speed"][-1]))
+        self.samples["ttft"].append(measurement["ttft"])
+        self.samples["latency"].append(measurement["latency"])
+
+        self.token_timeline.add(measurement)
+        token_times = measurement["token_times"]
+        self.inter_token_latencies.extend(inter_token_latencies(token_times))
+        for first, last in zip(token_times[::COMPLETION_WINDOW], token_times[COMPLETION_WINDOW::COMPLETION_WINDOW]):
+            if last > first:
+                self.completion_tokens_per_second.append(COMPLETION_WINDOW / (last - first))
         
     def calculate_metrics(self):
         self.prompt_eval_speed = self.prompt_tokens / self.prompt_eval_time if self.prompt_eval_time > 0 else 0
         self.response_speed = self.response_tokens / self.response_time if self.response_time > 0 else 0
         self.total_speed = (self.prompt_tokens + self.response_tokens) / self.total_time if self.total_time > 0 else 0
         self.avg_completion_speed = np.mean(self.completion_tokens_per_second) if self.completion_tokens_per_second else 0
+        self.statistics = {metric: summarize(values) for metric, values in self.samples.items() if values}
+        self.tokens_per_joule = self.response_tokens / self.decode_energy if self.decode_energy else None
+        self.prompt_tokens_per_joule = self.prompt_tokens / self.prefill_energy if self.prefill_energy else None
         
+    def save_token_timeline(self, directory, path):
+        """Write the token timeline to `directory`; `path` is how the JSON refers to it"""
+        if len(self.token_timeline):
+            self.token_timeline_info = {"path": path, **self.token_timeline.save(directory, self.origin)}
+
     def to_dict(self):
-        return {
+        data = {
             "model_name": self.model_name,
+            "host": self.host,
+            "prompt_set": self.prompt_set,
+            "options": self.options,
+            "metadata": self.metadata,
             "performance": {
                 "prompt_tokens": self.prompt_tokens,
                 "response_tokens": self.response_tokens,
@@ -30,6 +117,21 @@ class BenchmarkResult:
                 "response_time": round(self.response_time, 2),
                 "total_time": round(self.total_time, 2)
             },
+            "latency": {
+                "ttft": {
+                    "mean": round(float(np.mean(self.ttft)), 4) if self.ttft else 0,
+                    **{k: round(v, 4) for k, v in percentiles(self.ttft, (50, 95, 99)).items()}
+                },
+                "inter_token": {
+                    "mean": round(float(np.mean(self.inter_token_latencies)), 4) if self.inter_token_latencies else 0,
+                    **{k: round(v, 4) for k, v in percentiles(self.inter_token_latencies, (50, 95, 99)).items()}
+                }
+            },
+            "server": {
+                "load_duration": round(self.load_duration, 4),
+                "prompt_eval_duration": round(self.prompt_eval_duration, 4),
+                "eval_duration": round(self.eval_duration, 4)
+            },
             "speeds": {
                 "prompt_eval": round(self.prompt_eval_speed, 2),
                 "response": round(self.response_speed, 2),
@@ -38,8 +140,53 @@ class BenchmarkResult:
                 "average": round(self.avg_completion_speed, 2)
                 }
             },
+            "repetitions": {
+                "warmup": self.warmup,
+                "measured": self.repetitions
+            },
+            "samples": {
+                metric: [round(float(value), 6) for value in values]
+                for metric, values in self.samples.items()
+            },
+            "statistics": {
+                metric: {k: round(v, 4) if isinstance(v, float) else v for k, v in summary.items()}
+                for metric, summary in self.statistics.items()
+            },
             "system": {
                 "specs": self.system_specs,
                 "resources": self.resources_usage
             }
         }
+        if self.pull:
+            data["pull"] = self.pull
+        if self.load:
+            data["load"] = {k: round(v, 4) if isinstance(v, float) else v for k, v in self.load.items()}
+        if self.concurrency_levels:
+            data["concurrency"] = {
+                "levels": self.concurrency_levels,
+                "saturation_level": self.saturation_level
+            }
+        if self.context_sweep:
+            data["context_sweep"] = self.context_sweep
+        if self.open_loop:
+            data["open_loop"] = self.open_loop
+        if self.prompt_cache:
+            data["prompt_cache"] = self.prompt_cache
+        if self.embeddings:
+            data["embeddings"] = self.embeddings
+        if self.decode_energy is not None:
+            data["energy"] = {
+                "prefill_j": round(self.prefill_energy, 3) if self.prefill_energy is not None else None,
+                "decode_j": round(self.decode_energy, 3),
+                "tokens_per_joule": round(self.tokens_per_joule, 4) if self.tokens_per_joule else None,
+                "prompt_tokens_per_joule": round(self.prompt_tokens_per_joule, 4) if self.prompt_tokens_per_joule else None
+            }
+        if self.token_timeline_info:
+            data["token_timeline"] = self.token_timeline_info
+        if self.request_timeline:
+            origin = self.origin if self.origin is not None else self.request_timeline[0][0]
+            data["timeline"] = {
+                "request_start": [round(start - origin, 4) for start, _ in self.request_timeline],
+                "response_speed": [round(speed, 2) for _, speed in self.request_timeline]
+            }
+        return data
@@ -1,186 +1,463 @@
 #!/usr/bin/env python3.12
+import hashlib
 import json
 import logging
 import os
 import sys
+import threading
 import time
-import ollama
 import concurrent.futures
-import GPUtil
+import ollama
 from datetime import datetime
-import numpy as np
 
 from .result import BenchmarkResult
 from .system_info import SystemInfo
-from .analysis import print_results
-from .utils import Colors
+from .sampler import ResourceSampler
+from .measure import check_deadline, stream_generate
+from .concurrency import run_concurrency_sweep, find_saturation_level
+from .sweep import run_context_sweep
+from .promptcache import run_prompt_cache
+from .embeddings import run_embedding_sweep
+from .storage import pull_model
+from .openloop import run_load_test
+from .coresidency import run_coresidency
+from .matrix import load_matrix, expand_matrix, run_settings
+from .stats import relative_ci_width
+from .models import is_installed, measure_load, model_digest, ollama_version, host_url
+from .hosts import get_client, is_local
+from .store import ResultStore, git_revision, DEFAULT_PATH as DEFAULT_STORE_PATH
+from .analysis import analyze_performance, print_insights, print_results, print_host_comparison, print_coresidency
+from .utils import Colors, convert_numpy
+from . import events
+from .dashboard import Dashboard
+from .exporter import MetricsExporter
+from .telemetry import select_backends
+from .checkpoint import Checkpoint, cell_key
+
+def setup_logging():
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
 
-def save_results(results, timestamp):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(message)s',
+        handlers=[
+            logging.FileHandler(f'logs/benchmark_{datetime.now().strftime("%H%M%S_%d%m%Y")}.log'),
+            logging.StreamHandler()
+        ]
+    )
+    logging.getLogger('httpx').setLevel(logging.WARNING)  # Disable ollama HTTP logs
+
+def token_timeline_dir(timestamp, key, kind='benchmark'):
+    """Sidecar directory for one cell's token timeline, and its path relative to the results file"""
+    path = f"{kind}_{timestamp}_tokens/{hashlib.sha256(key.encode()).hexdigest()[:12]}"
+    return os.path.join('results', path), path
+
+def save_results(results, timestamp, kind='benchmark'):
     results_dir = 'results'
     if not os.path.exists(results_dir):
         os.makedirs(results_dir)
         
-    filename = f"{results_dir}/benchmark_{timestamp}.json"
-    
-    def convert_numpy(obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return obj
+    filename = f"{results_dir}/{kind}_{timestamp}.json"
 
     with open(filename, 'w') as f:
         json.dump({"results": results}, f, indent=4, default=convert_numpy)
     logging.info(f"Results saved to {filename}")
 
-def run_benchmark_for_prompts(model, prompts, verbose=False):
+# Generation options applied unless overridden per run or matrix cell
+DEFAULT_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9
+}
+
+DEFAULT_PROMPTS = [
+    "What are the key differences between classical and quantum computing?",
+    "Describe an efficient implementation of quicksort in Python.",
+    "How do transformer models handle long-range dependencies?",
+    "Explain the concept of algorithmic complexity using Big O notation."
+]
+
+# Metric whose confidence interval drives adaptive repetitions
+CI_METRIC = "response_speed"
+
+# Seconds before the first retry of a failed cell; doubled for each further retry
+RETRY_BACKOFF = 5.0
+
+def run_benchmark_for_prompts(model, prompts, verbose=False, concurrency=None, sample_rate=10, options=None, repeat=1,
+                              warmup=1, ci_target=None, max_repeat=10, drop_cache=False,
+                              context_lengths=None, output_lengths=None, client=ollama, host=None, load_test=None,
+                              prompt_cache=None, embeddings=None, checkpoint=None, deadline=None):
+    """Benchmark one model; returns a BenchmarkResult, or None when it failed.
+
+    With `embeddings` (batch sizes, input lengths, concurrency), the model
+    is benchmarked as an embedding model instead: the generation passes are
+    skipped and only the embedding throughput sweep runs.
+
+    With a `checkpoint` (checkpoint.CellCheckpoint), every measured request
+    is recorded and requests already recorded are reused rather than re-run.
+    `deadline` (a time.monotonic() value) is checked between requests in
+    every phase; past it the cell fails with TimeoutError.
+    """
+    # Hardware specs and resource sampling only describe this machine,
+    # so remote hosts are identified by their URL instead
+    local = is_local(host)
     result = BenchmarkResult(model)
-    result.system_specs = SystemInfo.get_system_specs()
+    result.host = host_url(host)
+    result.system_specs = SystemInfo.get_system_specs() if local else {"host": result.host}
+    result.options = options or {}
+    result.metadata["host_fingerprint"] = SystemInfo.fingerprint(result.system_specs)
+    result.metadata["git_revision"] = git_revision()
     
     # Check if Ollama is running
     try:
-        ollama.list()
+        client.list()
     except Exception as e:
-        logging.error("Ollama is not running. Please start it with 'ollama serve'")
-        sys.exit(1)
+        logging.error(f"Ollama is not running at {result.host}. Please start it with 'ollama serve'")
+        return None
+
+    # Download the model if needed; this is not part of the load timing
+    if not is_installed(model, client):
+        try:
+            logging.info(f"Pulling {model}...")
+            result.pull = pull_model(model, client)
+        except Exception as e:
+            logging.error(f"Error pulling model {model}: {str(e)}")
+            return None
+
+    result.metadata["model_digest"] = model_digest(model, client)
+    result.metadata["ollama_version"] = ollama_version(host)
+
+    # num_gpu is the number of offloaded layers, so it is left to Ollama
+    # unless set explicitly (e.g. by a grid run)
+    options = {**DEFAULT_OPTIONS, **(options or {})}
 
-    # Model loading time
-    start_time = time.time()
+    # Start resource monitoring in a background thread
+    result.origin = time.perf_counter()
+    sampler = ResourceSampler(rate=sample_rate if local else 0).start()
+
+    # Model loading time: cold (unloaded first) and warm (already resident)
+    load_start = time.perf_counter()
     try:
-        ollama.pull(model)
+        result.load = measure_load(model, options, drop_cache, client, local, embed=bool(embeddings))
     except Exception as e:
-        logging.error(f"Error pulling model {model}: {str(e)}")
-        sys.exit(1)
+        logging.error(f"Error loading model {model}: {str(e)}")
+        sampler.stop()
+        return None
         
-    result.model_load_time = time.time() - start_time
+    result.model_load_time = result.load["cold_load_time"]
+    sampler.add_phase("load", load_start, time.perf_counter())
     
-    # Start resource monitoring in a separate thread
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(SystemInfo.monitor_resources, 60)  # Monitor for 60 seconds max
-        
-        try:
-            # Process each prompt
+    try:
+        if embeddings:
+            start_time = time.time() - result.model_load_time
+            result.embeddings = run_embedding_sweep(model, options=options, client=client, sampler=sampler,
+                                                    deadline=deadline, **embeddings)
+            result.total_time = time.time() - start_time
+            result.resources_usage = sampler.stop()
+            result.calculate_metrics()
+            return result
+
+        # Warm-up passes absorb cold caches and model load and are discarded
+        warmup_start = time.perf_counter()
+        for _ in range(warmup):
             for prompt in prompts:
-                prompt_start_time = time.time()
-                
-                # Get response from model
-                response = ollama.generate(
-                    model=model,
-                    prompt=prompt,
-                    options={
-                        "num_gpu": len(GPUtil.getGPUs()) if GPUtil.getGPUs() else 0,
-                        "temperature": 0.7,
-                        "top_p": 0.9
-                    }
-                )
-                
+                check_deadline(deadline)
+                stream_generate(model, prompt, options, client=client)
+        sampler.add_phase("warmup", warmup_start, time.perf_counter())
+        result.warmup = warmup
+
+        # Total time covers the cold load and the measured passes, not the
+        # unload wait before the load or the discarded warm-up passes
+        start_time = time.time() - result.model_load_time
+
+        # Measured repetitions; with a CI target, keep going until the
+        # confidence interval is narrow enough or max_repeat is reached
+        while True:
+            for index, prompt in enumerate(prompts):
+                check_deadline(deadline)
+                measurement = checkpoint.completed(index, result.repetitions, result.origin) if checkpoint else None
+                if measurement:
+                    result.record_request(measurement)
+                    continue
+
                 if verbose:
                     print(f"\nPrompt: {prompt}\n")
-                    print(f"Response: {response['response']}\n")
-                
-                prompt_end_time = time.time()
-                result.prompt_tokens += response['prompt_eval_count']
-                result.response_tokens += response['eval_count']
-                result.prompt_eval_time += prompt_end_time - prompt_start_time
-                
-                # Get token-by-token metrics
-                stream = ollama.generate(
-                    model=model,
-                    prompt=prompt,
-                    stream=True,
-                    options={
-                        "num_gpu": len(GPUtil.getGPUs()) if GPUtil.getGPUs() else 0,
-                        "temperature": 0.7,
-                        "top_p": 0.9
-                    }
-                )
-                
-                last_token_time = time.time()
-                tokens_since_last = 0
                     
-                for chunk in stream:
-                    current_time = time.time()
-                    if isinstance(chunk, dict) and 'response' in chunk:
-                        tokens_since_last += 1
-                        
-                        # Calculate tokens per second every 10 tokens
-                        if tokens_since_last >= 10:
-                            time_diff = current_time - last_token_time
-                            if time_diff > 0:
-                                result.completion_tokens_per_second.append(tokens_since_last / time_diff)
-                            tokens_since_last = 0
-                            last_token_time = current_time
-                        
-                        if verbose:
-                            print(chunk['response'], end='', flush=True)
-                
-                if verbose:
-                    print("\n")
+                # Single streamed request: TTFT, token arrivals and server timings
+                measurement = stream_generate(model, prompt, options, verbose, client)
+                result.record_request(measurement)
+                if checkpoint:
+                    checkpoint.record(index, result.repetitions, measurement, result.origin)
+                first_token = measurement["start"] + measurement["ttft"]
+                sampler.add_phase("prefill", measurement["start"], first_token)
+                sampler.add_phase("decode", first_token, measurement["end"])
+            result.repetitions += 1
 
-                result.response_time += time.time() - prompt_end_time
-                
-            result.total_time = time.time() - start_time
-            result.resources_usage = future.result()
-            result.calculate_metrics()
-            return result
+            if result.repetitions < repeat:
+                continue
+            if not ci_target or result.repetitions >= max_repeat:
+                break
+            width = relative_ci_width(result.samples[CI_METRIC])
+            if width <= ci_target:
+                break
+            logging.info(f"CI width {width:.1%} above target {ci_target:.1%}, running extra repetition...")
             
-        except Exception as e:
-            logging.error(f"Error during benchmark for {model}: {str(e)}")
-            return None
+        result.total_time = time.time() - start_time
+        result.resources_usage = sampler.stop()
+        timeline = sampler.timeline(result.origin)
+        if timeline:
+            result.resources_usage["timeline"] = timeline
+        result.prefill_energy = sampler.phase_energy("prefill")
+        result.decode_energy = sampler.phase_energy("decode")
+        result.calculate_metrics()
+        
+        # Optional load test with several simultaneous in-flight requests
+        if concurrency:
+            result.concurrency_levels = run_concurrency_sweep(model, prompts, concurrency, options, client,
+                                                              result.token_timeline, deadline)
+            result.saturation_level = find_saturation_level(result.concurrency_levels)
+        
+        # Optional prefill/decode scaling curves over prompt and output length
+        if context_lengths or output_lengths:
+            result.context_sweep = run_context_sweep(model, context_lengths, output_lengths, options,
+                                                     repeat, sample_rate if local else 0, client, deadline)
+        
+        # Optional open-loop (Poisson arrival) load test with SLO reporting
+        if load_test:
+            result.open_loop = run_load_test(model, prompts, options, client, deadline=deadline, **load_test)
 
-def main(verbose=False, prompts=None, models=None):
-    # Setup logging
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
+        # Optional shared-prefix and multi-turn prompt cache scenario
+        if prompt_cache:
+            result.prompt_cache = run_prompt_cache(model, options, client, deadline=deadline, **prompt_cache)
+        return result
+        
+    except Exception as e:
+        sampler.stop()
+        logging.error(f"Error during benchmark for {model}: {str(e)}")
+        return None
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(message)s',
-        handlers=[
-            logging.FileHandler(f'logs/benchmark_{datetime.now().strftime("%H%M%S_%d%m%Y")}.log'),
-            logging.StreamHandler()
-        ]
-    )
-    logging.getLogger('httpx').setLevel(logging.WARNING)  # Disable ollama HTTP logs
+def main(verbose=False, prompts=None, models=None, concurrency=None, sample_rate=10,
+         options=None, repeat=None, matrix=None, warmup=None, ci_target=None, max_repeat=None, drop_cache=False,
+         store_path=DEFAULT_STORE_PATH, context_lengths=None, output_lengths=None, hosts=None, load_test=None,
+         dashboard=False, metrics_listen=None, metrics_file=None, otel=False, telemetry=None,
+         cell_timeout=None, retries=0, request_timeout=None, run_id=None, prompt_cache=None,
+         embeddings=None):
+    """Run the benchmark for each model, or for every cell of a matrix file/dict.
+
+    With several `hosts`, the same cells run on every host in parallel.
+    With `dashboard`, a live view is shown and results are printed at the end.
+    `metrics_listen` ((host, port)), `metrics_file` and `otel` export live
+    metrics and request spans while the run is going. `telemetry` names the
+    device telemetry backends to sample (default: detected).
+
+    Progress is checkpointed per request under results/runs/<run id>/; a
+    failed cell is retried `retries` times and then skipped, and
+    `cell_timeout` / `request_timeout` (seconds) stop cells that hang.
+    Pass the `run_id` of an interrupted run to resume it (see resume).
+    """
+    setup_logging()
 
     # Default prompts
     if not prompts:
-        prompts = [
-            "What are the key differences between classical and quantum computing?",
-            "Describe an efficient implementation of quicksort in Python.",
-            "How do transformer models handle long-range dependencies?",
-            "Explain the concept of algorithmic complexity using Big O notation."
-        ]
+        prompts = DEFAULT_PROMPTS
 
-    timestamp = datetime.now().strftime("%H%M%S_%d%m%Y")
+    timestamp = run_id or datetime.now().strftime("%H%M%S_%d%m%Y")
     all_results = []
     
     try:
-        # Get available models if none specified
-        if not models:
-            response = ollama.list()
-            if not response or not response.get('models', []):
-                logging.error("No models available. Please download some models first.")
+        cells = None
+        if matrix is not None:
+            if isinstance(matrix, str):
+                matrix = load_matrix(matrix)
+            # Explicit arguments take precedence over the matrix file
+            settings = run_settings(matrix)
+            concurrency = concurrency or settings.get('concurrency')
+            repeat = repeat or settings.get('repeat')
+            warmup = warmup if warmup is not None else settings.get('warmup')
+            ci_target = ci_target or settings.get('ci_target')
+            max_repeat = max_repeat or settings.get('max_repeat')
+            drop_cache = drop_cache or settings.get('drop_cache', False)
+            context_lengths = context_lengths or settings.get('context_lengths')
+            output_lengths = output_lengths or settings.get('output_lengths')
+            hosts = hosts or settings.get('hosts')
+            load_test = load_test or settings.get('load_test')
+            prompt_cache = prompt_cache or settings.get('prompt_cache')
+            embeddings = embeddings or settings.get('embeddings')
+            verbose = verbose or settings.get('verbose', False)
+            sample_rate = settings.get('sample_rate', sample_rate)
+            if models:
+                matrix = {**matrix, "models": models}
+            cells = expand_matrix(matrix, prompts)
+            if not cells:
+                logging.error("Benchmark matrix is empty. Specify at least one model.")
                 return []
-            models = [model.get('name', model.get('model', 'Unknown')) 
-                     for model in response.get('models', [])]
-
-        # Run benchmark for each model
-        for model in models:
-            logging.info(f"\nBenchmarking {model}...")
-            result = run_benchmark_for_prompts(model, prompts, verbose)
-            if result:
-                all_results.append(result.to_dict())
-                print_results({"model_name": model, "speeds": result.to_dict()["speeds"], "performance": result.to_dict()["performance"]})
+
+        if telemetry:
+            select_backends(telemetry)
+
+        # Everything needed to pick the run up again after a crash
+        if run_id:
+            checkpoint = Checkpoint.load(run_id)
+            logging.info(f"Resuming run {run_id}: {len(checkpoint.results)} cells already completed")
+        else:
+            checkpoint = Checkpoint.create(timestamp, {
+                "verbose": verbose, "prompts": None if prompts is DEFAULT_PROMPTS else prompts,
+                "models": models, "concurrency": concurrency, "sample_rate": sample_rate, "options": options,
+                "repeat": repeat, "matrix": matrix, "warmup": warmup, "ci_target": ci_target,
+                "max_repeat": max_repeat, "drop_cache": drop_cache, "store_path": store_path,
+                "context_lengths": context_lengths, "output_lengths": output_lengths, "hosts": hosts,
+                "load_test": load_test, "prompt_cache": prompt_cache, "embeddings": embeddings,
+                "telemetry": telemetry, "cell_timeout": cell_timeout, "retries": retries,
+                "request_timeout": request_timeout
+            })
+            logging.info(f"Run {timestamp} (resume with: python main.py resume {timestamp})")
+
+        run_options = {
+            "verbose": verbose,
+            "concurrency": concurrency,
+            "sample_rate": sample_rate,
+            "repeat": repeat or 1,
+            "warmup": 1 if warmup is None else warmup,
+            "ci_target": ci_target,
+            "max_repeat": max_repeat or 10,
+            "drop_cache": drop_cache,
+            "context_lengths": context_lengths,
+            "output_lengths": output_lengths,
+            "load_test": load_test,
+            "prompt_cache": prompt_cache,
+            "embeddings": embeddings
+        }
+
+        # Every result is also appended to the history store (unless disabled)
+        store = ResultStore(store_path) if store_path else None
+        lock = threading.Lock()
+        progress = {"done": 0}
+        total = len(cells) * len(hosts or [None]) if cells is not None else None
+
+        live = None
+        if dashboard:
+            if sys.stdout.isatty():
+                live = Dashboard().start()
+            else:
+                logging.warning("Live dashboard needs a terminal, continuing without it")
+        exporter = None
+        if metrics_listen or metrics_file or otel:
+            exporter = MetricsExporter(metrics_listen, metrics_file, otel).start()
+
+        def run_cell(cell, cell_options, client, host, key):
+            for attempt in range(retries + 1):
+                deadline = time.monotonic() + cell_timeout if cell_timeout else None
+                result = run_benchmark_for_prompts(cell["model"], cell["prompts"], options=cell_options,
+                                                   client=client, host=host, checkpoint=checkpoint.cell(key),
+                                                   deadline=deadline, **run_options)
+                if result or attempt == retries:
+                    return result
+                delay = RETRY_BACKOFF * 2 ** attempt
+                logging.warning(f"{cell['model']} failed (attempt {attempt + 1} of {retries + 1}), "
+                                f"retrying in {delay:.0f}s...")
+                time.sleep(delay)
+
+        def run_host(host):
+            client = get_client(host, request_timeout)
+            host_cells = cells
+            if host_cells is None:
+                host_models = models
+                # Get available models if none specified
+                if not host_models:
+                    response = client.list()
+                    if not response or not response.get('models', []):
+                        logging.error(f"No models available on {host_url(host)}. Please download some models first.")
+                        return
+                    host_models = [model.get('name', model.get('model', 'Unknown')) 
+                                   for model in response.get('models', [])]
+                prompt_set = "default" if prompts is DEFAULT_PROMPTS else "custom"
+                host_cells = [{"model": model, "prompt_set": prompt_set, "prompts": prompts, "options": {}}
+                              for model in host_models]
+
+            # Run benchmark for each model (or matrix cell)
+            for cell in host_cells:
+                with lock:
+                    progress["done"] += 1
+                    events.publish("cell_start", index=progress["done"], total=total or len(host_cells),
+                                   model=cell["model"], host=host_url(host))
+                key = cell_key(host_url(host), cell)
+                if checkpoint.result(key):
+                    logging.info(f"Skipping {cell['model']}, already completed in run {timestamp}")
+                    with lock:
+                        all_results.append(checkpoint.result(key))
+                    continue
+
+                cell_options = {**(options or {}), **cell["options"]}
+                description = ", ".join(f"{k}={v}" for k, v in cell_options.items())
+                logging.info(f"\nBenchmarking {cell['model']}" + (f" on {host_url(host)}" if host else "")
+                             + (f" ({description})" if description else "") + "...")
+                result = run_cell(cell, cell_options, client, host, key)
+                if not result:
+                    checkpoint.record_failure(key, retries + 1)
+                    continue
+                # Embedding runs share no metrics with generation runs, so they
+                # get their own store key and never serve as each other's baseline
+                result.prompt_set = "embeddings" if embeddings else cell["prompt_set"]
+                result.save_token_timeline(*token_timeline_dir(timestamp, key))
+                with lock:
+                    all_results.append(result.to_dict())
+                    checkpoint.record_result(key, all_results[-1])
+                    if not live:
+                        print_results(all_results[-1])
+                    if store:
+                        store.append(all_results[-1], timestamp)
+
+        try:
+            if hosts and len(hosts) > 1:
+                # One worker per host; hosts run in parallel, cells within a host in order
+                with concurrent.futures.ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+                    for future in [executor.submit(run_host, host) for host in hosts]:
+                        future.result()
+            else:
+                run_host(hosts[0] if hosts else None)
+        except BaseException:
+            checkpoint.close()
+            raise
+        finally:
+            if exporter:
+                exporter.stop()
+            if live:
+                live.stop()
+                for result in all_results:
+                    print_results(result)
+        if hosts and len(hosts) > 1:
+            print_host_comparison(all_results)
+        print_insights(analyze_performance(all_results))
                     
+        if store:
+            store.close()
         save_results(all_results, timestamp)
+        checkpoint.close(complete=True)
         return all_results
         
     except Exception as e:
         logging.error(f"Error during benchmarking: {str(e)}")
         return []
 
+def resume(run_id, **overrides):
+    """Continue a checkpointed run, skipping the cells and requests it already completed"""
+    arguments = Checkpoint.load(run_id).manifest["arguments"]
+    return main(**{**arguments, **overrides}, run_id=run_id)
+
+def run_coresidency_benchmark(models, prompts=None, rounds=2, options=None, host=None):
+    """Benchmark several models served at once against their solo baselines"""
+    setup_logging()
+    timestamp = datetime.now().strftime("%H%M%S_%d%m%Y")
+    try:
+        result = run_coresidency(models, prompts or DEFAULT_PROMPTS, rounds,
+                                 {**DEFAULT_OPTIONS, **(options or {})}, get_client(host))
+    except Exception as e:
+        logging.error(f"Error during co-residency benchmark: {str(e)}")
+        return None
+    result["host"] = host_url(host)
+    print_coresidency(result)
+    save_results([result], timestamp, kind='coresidency')
+    return result
+
 # For backward compatibility
 run_benchmark = run_benchmark_for_prompts
@@ -0,0 +1,323 @@
+import threading
+import time
+import warnings
+import numpy as np
+import psutil
+
+from . import events
+from .telemetry import DEVICE_FIELDS, LIMITING_REASONS, THROTTLE_REASONS, detect_backends
+
+# Column layout of the ring buffer. The gpu_* columns aggregate all GPUs
+# (mean load, max temperature, total memory and power); energy is the
+# cumulative device energy counter total, when every device has one
+COLUMNS = ("time", "cpu", "process_rss", "process_cpu", "gpu_load", "gpu_temperature", "gpu_memory", "memory",
+           "gpu_power", "cpu_power", "energy")
+
+# Resource timelines saved with a result are averaged down to this many points
+TIMELINE_POINTS = 300
+
+# How often the Ollama process list is refreshed (runners come and go with models)
+PROCESS_REFRESH_INTERVAL = 2.0
+
+def find_ollama_processes():
+    """Return the Ollama server and model runner processes"""
+    processes = []
+    for proc in psutil.process_iter(['name']):
+        name = proc.info.get('name') or ''
+        if 'ollama' in name.lower():
+            processes.append(proc)
+    return processes
+
+def _stats(values):
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    return {
+        "mean": float(np.mean(values)),
+        "max": float(np.max(values)),
+        "std": float(np.std(values))
+    }
+
+class ResourceSampler:
+    """Background CPU/GPU/Ollama process sampler with start/stop semantics.
+
+    Samples are written to preallocated NumPy ring buffers so the sampling
+    thread never allocates, and callers label time ranges with phases
+    (load / prefill / decode) to get per-phase summaries and energy. A rate
+    of 0 disables sampling, e.g. when benchmarking a remote Ollama host.
+    Devices come from the telemetry backends (see telemetry.detect_backends).
+    """
+
+    def __init__(self, rate=10, capacity=36000, backends=None):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.rate = rate
+        self.capacity = capacity
+        self.buffer = np.full((capacity, len(COLUMNS)), np.nan)
+        self.count = 0
+        self.phases = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._processes = []
+        self._processes_refreshed = 0
+        self.backends = backends
+        self.devices = []
+        self.device_buffer = None
+
+    def start(self):
+        if self.rate <= 0:
+            return self
+        if self.backends is None:
+            self.backends = detect_backends()
+        self.devices = [(backend, backend.kind, name) for backend in self.backends for name in backend.names]
+        self.device_buffer = np.full((self.capacity, len(self.devices), len(DEVICE_FIELDS)), np.nan)
+        self._stop_event.clear()
+        psutil.cpu_percent(interval=None)  # Prime the non-blocking counter
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and return the summary statistics"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        return self.summary()
+
+    def add_phase(self, name, start, end):
+        """Label the perf_counter range [start, end) with a phase name"""
+        self.phases.append((name, start, end))
+
+    def _ordered(self, buffer):
+        if self.count <= self.capacity:
+            return buffer[:self.count]
+        head = self.count % self.capacity
+        return np.concatenate((buffer[head:], buffer[:head]))
+
+    def samples(self):
+        """Return the retained samples in chronological order"""
+        return self._ordered(self.buffer)
+
+    def device_samples(self):
+        """Per-device readings (samples × devices × DEVICE_FIELDS), aligned with samples()"""
+        if self.device_buffer is None:
+            return np.empty((0, 0, len(DEVICE_FIELDS)))
+        return self._ordered(self.device_buffer)
+
+    def energy(self, start, end, samples=None):
+        """Joules used by all sampled devices over the perf_counter range [start, end).
+
+        Uses the devices' energy counters where available and integrates the
+        sampled power draw otherwise. None when no power was sampled.
+        """
+        samples = self.samples() if samples is None else samples
+        times = samples[:, 0]
+        energy = samples[:, 10]
+        if len(samples) >= 2 and not np.isnan(energy).any():
+            return float(np.interp(end, times, energy) - np.interp(start, times, energy))
+
+        power = np.nansum(samples[:, 8:10], axis=1)
+        sampled = ~np.isnan(samples[:, 8:10]).all(axis=1)
+        if not sampled.any():
+            return None
+        times, power = times[sampled], power[sampled]
+        inside = (times > start) & (times < end)
+        grid = np.concatenate(([start], times[inside], [end]))
+        power = np.interp(grid, times, power)
+        return float(np.sum((power[1:] + power[:-1]) / 2 * np.diff(grid)))
+
+    def phase_energy(self, name):
+        """Joules used during all ranges labelled with phase `name`, or None"""
+        samples = self.samples()
+        total = None
+        for phase, start, end in self.phases:
+            if phase == name:
+                energy = self.energy(start, end, samples)
+                if energy is not None:
+                    total = (total or 0) + energy
+        return total
+
+    def latest(self):
+        """Return the most recent sample as a dict, or None before the first tick"""
+        if not self.count:
+            return None
+        row = self.buffer[(self.count - 1) % self.capacity]
+        return dict(zip(COLUMNS, row.tolist()))
+
+    def timeline(self, origin=None, points=TIMELINE_POINTS):
+        """Samples averaged into at most `points` bins, for plotting.
+
+        Times are seconds since `origin` (a perf_counter value, default the
+        first sample); columns that were never sampled are left out.
+        """
+        samples = self.samples()
+        if not len(samples):
+            return None
+        bins = np.array_split(samples, min(points, len(samples)))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # Bins where a column is all NaN
+            binned = np.array([np.nanmean(chunk, axis=0) for chunk in bins])
+        binned[:, 0] -= samples[0, 0] if origin is None else origin
+        binned[:, 2] /= 1024 * 1024
+
+        names = {"process_rss": "process_rss_mb", "gpu_memory": "gpu_memory_mb"}
+        return {
+            names.get(column, column): [None if np.isnan(v) else round(float(v), 3) for v in binned[:, i]]
+            for i, column in enumerate(COLUMNS)
+            if column != "energy" and not np.isnan(binned[:, i]).all()
+        }
+
+    def _refresh_processes(self, now):
+        if now - self._processes_refreshed < PROCESS_REFRESH_INTERVAL:
+            return
+        known = {proc.pid for proc in self._processes}
+        self._processes = find_ollama_processes()
+        for proc in self._processes:
+            if proc.pid not in known:
+                try:
+                    proc.cpu_percent(interval=None)
+                except psutil.Error:
+                    pass
+        self._processes_refreshed = now
+
+    def _sample_devices(self, row, devices):
+        offset = 0
+        for backend in self.backends:
+            try:
+                readings = backend.sample()[:len(backend.names)]
+            except Exception:
+                readings = []  # Leave this tick's readings as NaN
+            for i, reading in enumerate(readings):
+                devices[offset + i] = [np.nan if reading[field] is None else reading[field] for field in DEVICE_FIELDS]
+            offset += len(backend.names)
+
+        gpus = [i for i, (_, kind, _) in enumerate(self.devices) if kind == "gpu"]
+        cpus = [i for i, (_, kind, _) in enumerate(self.devices) if kind == "cpu"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # Fields a device doesn't report
+            if gpus:
+                row[4] = np.nanmean(devices[gpus, 0])
+                row[5] = np.nanmax(devices[gpus, 3])
+                row[6] = np.nansum(devices[gpus, 1]) if not np.isnan(devices[gpus, 1]).all() else np.nan
+                row[8] = np.nansum(devices[gpus, 4]) if not np.isnan(devices[gpus, 4]).all() else np.nan
+            if cpus and not np.isnan(devices[cpus, 4]).all():
+                row[9] = np.nansum(devices[cpus, 4])
+        powered = ~np.isnan(devices[:, 4])
+        if powered.any() and not np.isnan(devices[powered, 7]).any():
+            row[10] = devices[powered, 7].sum()
+
+    def _sample(self, row, devices):
+        now = time.perf_counter()
+        self._refresh_processes(now)
+
+        row[:] = np.nan
+        row[0] = now
+        row[1] = psutil.cpu_percent(interval=None)
+        row[7] = psutil.virtual_memory().percent
+
+        rss = 0
+        cpu = 0
+        for proc in self._processes:
+            try:
+                rss += proc.memory_info().rss
+                cpu += proc.cpu_percent(interval=None)
+            except psutil.Error:
+                continue
+        if self._processes:
+            row[2] = rss
+            row[3] = cpu
+
+        devices[:] = np.nan
+        if self.devices:
+            self._sample_devices(row, devices)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            tick = time.perf_counter()
+            slot = self.count % self.capacity
+            self._sample(self.buffer[slot], self.device_buffer[slot])
+            self.count += 1
+            if events.active():
+                events.publish("resources", **self.latest())
+            self._stop_event.wait(max(0, self.interval - (time.perf_counter() - tick)))
+
+    def _summarize(self, samples):
+        if not len(samples):
+            return None
+        result = {"samples": int(len(samples)), "cpu": _stats(samples[:, 1]), "memory": _stats(samples[:, 7])}
+
+        if not np.isnan(samples[:, 2]).all():
+            rss = samples[:, 2][~np.isnan(samples[:, 2])]
+            cpu = samples[:, 3][~np.isnan(samples[:, 3])]
+            result["process"] = {
+                "rss_mb": _stats(rss / (1024 * 1024)),
+                "cpu": _stats(cpu)
+            }
+
+        if not np.isnan(samples[:, 4]).all():
+            gpu = samples[~np.isnan(samples[:, 4])]
+            result["gpu"] = {
+                "load": _stats(gpu[:, 4]),
+                "temperature": _stats(gpu[:, 5]),
+                "memory_mb": _stats(gpu[:, 6])
+            }
+            if not np.isnan(gpu[:, 8]).all():
+                result["gpu"]["power_w"] = _stats(gpu[:, 8])
+
+        if not np.isnan(samples[:, 9]).all():
+            result["cpu_power_w"] = _stats(samples[:, 9])
+        return result
+
+    def _summarize_devices(self):
+        readings = self.device_samples()
+        devices = []
+        for i, (_, kind, name) in enumerate(self.devices):
+            device = {"name": name, "kind": kind}
+            for field, key in (("load", "load"), ("memory_used", "memory_mb"), ("temperature", "temperature"),
+                               ("power", "power_w"), ("sm_clock", "sm_clock_mhz")):
+                stats = _stats(readings[:, i, DEVICE_FIELDS.index(field)])
+                if stats:
+                    device[key] = stats
+            total = readings[:, i, DEVICE_FIELDS.index("memory_total")]
+            if not np.isnan(total).all():
+                device["memory_total_mb"] = float(np.nanmax(total))
+
+            # Share of samples in which each reason held the clocks back
+            throttle = readings[:, i, DEVICE_FIELDS.index("throttle")]
+            throttle = throttle[~np.isnan(throttle)].astype(np.int64)
+            limited = {
+                reason: float(np.mean((throttle & bit) != 0))
+                for bit, reason in THROTTLE_REASONS.items()
+                if bit & LIMITING_REASONS and (throttle & bit).any()
+            }
+            if limited:
+                device["throttle"] = limited
+            devices.append(device)
+        return devices
+
+    def summary(self):
+        samples = self.samples()
+        result = self._summarize(samples) or {"samples": 0}
+        result["rate"] = self.rate
+
+        phases = {}
+        for name in dict.fromkeys(phase[0] for phase in self.phases):
+            mask = np.zeros(len(samples), dtype=bool)
+            for phase, start, end in self.phases:
+                if phase == name:
+                    mask |= (samples[:, 0] >= start) & (samples[:, 0] < end)
+            summary = self._summarize(samples[mask])
+            if summary:
+                energy = self.phase_energy(name)
+                if energy is not None:
+                    summary["energy_j"] = energy
+                phases[name] = summary
+        if phases:
+            result["phases"] = phases
+
+        if self.devices and len(samples):
+            result["devices"] = self._summarize_devices()
+            energy = self.energy(samples[0, 0], samples[-1, 0], samples)
+            if energy is not None:
+                result["energy_j"] = energy
+        return result
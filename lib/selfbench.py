@@ -0,0 +1,75 @@
+import time
+import ollama
+
+from .fake import FakeClient, serve_fake
+from .measure import stream_generate
+from .result import BenchmarkResult
+
+DEFAULT_RATES = [100, 500, 1000, 5000]
+PROMPT = "harness self benchmark"
+
+def _bare_loop(client, tokens):
+    """Time draining the fake stream with no measurement code at all"""
+    start = time.perf_counter()
+    for _ in client.generate(model="fake:latest", prompt=PROMPT, stream=True, options={"num_predict": tokens}):
+        pass
+    return time.perf_counter() - start
+
+def _measured_loop(client, tokens):
+    start = time.perf_counter()
+    measurement = stream_generate("fake:latest", PROMPT, {"num_predict": tokens}, client=client)
+    elapsed = time.perf_counter() - start
+
+    # Post-processing cost of folding the request into a result
+    record_start = time.perf_counter()
+    BenchmarkResult("fake:latest").record_request(measurement)
+    return measurement, elapsed, time.perf_counter() - record_start
+
+def measure_overhead(tokens=20000, client=None):
+    """Per-token cost of the streaming measurement loop on top of a bare loop"""
+    client = client or FakeClient(tokens_per_second=0, ttft=0)
+    client.generate(model="fake:latest", prompt=PROMPT, options={"num_predict": 1})  # Warm up
+    bare = _bare_loop(client, tokens)
+    measurement, measured, record = _measured_loop(client, tokens)
+    count = len(measurement["token_times"]) or 1
+    return {
+        "tokens": count,
+        "bare_per_token_us": bare / count * 1e6,
+        "measured_per_token_us": measured / count * 1e6,
+        "overhead_per_token_us": max(0, measured - bare) / count * 1e6,
+        "record_per_token_us": record / count * 1e6,
+        "max_tokens_per_second": count / measured if measured > 0 else 0
+    }
+
+def measure_accuracy(rates=None, tokens=500, client_factory=FakeClient):
+    """Compare the decode rate the harness reports with the rate the fake emits"""
+    points = []
+    for rate in rates or DEFAULT_RATES:
+        client = client_factory(tokens_per_second=rate, ttft=0)
+        measurement = stream_generate("fake:latest", PROMPT, {"num_predict": tokens}, client=client)
+        times = measurement["token_times"]
+        measured = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0
+        points.append({
+            "configured_tokens_per_second": rate,
+            "measured_tokens_per_second": measured,
+            "error": (measured - rate) / rate if rate else 0
+        })
+    return points
+
+def run_selfbench(tokens=20000, rates=None, http=True):
+    """Benchmark the harness itself in-process and, optionally, over HTTP"""
+    report = {
+        "in_process": {
+            "overhead": measure_overhead(tokens),
+            "accuracy": measure_accuracy(rates)
+        }
+    }
+    if http:
+        # Full stack: ollama.Client, HTTP streaming and JSON decoding per chunk
+        server = serve_fake(FakeClient(tokens_per_second=0, ttft=0))
+        try:
+            client = ollama.Client(host=f"http://127.0.0.1:{server.server_port}")
+            report["http"] = {"overhead": measure_overhead(min(tokens, 5000), client)}
+        finally:
+            server.shutdown()
+    return report
@@ -0,0 +1,63 @@
+import numpy as np
+
+# Bootstrap settings; the fixed seed keeps reported intervals reproducible
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 0
+
+def percentiles(values, qs=(50, 95, 99)):
+    """Return the requested percentiles of values as a {'pXX': value} dict"""
+    if not values:
+        return {f"p{q}": 0 for q in qs}
+    points = np.percentile(values, qs)
+    return {f"p{q}": float(p) for q, p in zip(qs, points)}
+
+def bootstrap_ci(values, confidence=0.95, resamples=BOOTSTRAP_RESAMPLES, statistic=np.mean):
+    """Percentile bootstrap confidence interval of `statistic`, or None for fewer than 2 values"""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return None
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    samples = values[rng.integers(0, len(values), size=(resamples, len(values)))]
+    estimates = statistic(samples, axis=1)
+    alpha = (1 - confidence) / 2 * 100
+    low, high = np.percentile(estimates, [alpha, 100 - alpha])
+    return float(low), float(high)
+
+def relative_ci_width(values, confidence=0.95):
+    """Width of the bootstrap CI relative to the mean (inf when it can't be computed)"""
+    ci = bootstrap_ci(values, confidence)
+    mean = float(np.mean(values)) if len(values) else 0
+    if ci is None or mean == 0:
+        return float('inf')
+    return (ci[1] - ci[0]) / abs(mean)
+
+def summarize(values, confidence=0.95):
+    """Mean/median/stddev/percentiles and bootstrap CI of a metric's samples"""
+    if not len(values):
+        return None
+    values = np.asarray(values, dtype=float)
+    ci = bootstrap_ci(values, confidence)
+    return {
+        "n": int(len(values)),
+        "mean": float(np.mean(values)),
+        "median": float(np.median(values)),
+        "std": float(np.std(values, ddof=1)) if len(values) > 1 else 0.0,
+        "min": float(np.min(values)),
+        "max": float(np.max(values)),
+        **percentiles(values.tolist(), (5, 95)),
+        "ci_low": ci[0] if ci else None,
+        "ci_high": ci[1] if ci else None
+    }
+
+def bootstrap_diff_ci(baseline, candidate, confidence=0.95, resamples=BOOTSTRAP_RESAMPLES):
+    """Bootstrap CI of mean(candidate) - mean(baseline), or None if either has fewer than 2 values"""
+    baseline = np.asarray(baseline, dtype=float)
+    candidate = np.asarray(candidate, dtype=float)
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    baseline_means = baseline[rng.integers(0, len(baseline), size=(resamples, len(baseline)))].mean(axis=1)
+    candidate_means = candidate[rng.integers(0, len(candidate), size=(resamples, len(candidate)))].mean(axis=1)
+    alpha = (1 - confidence) / 2 * 100
+    low, high = np.percentile(candidate_means - baseline_means, [alpha, 100 - alpha])
+    return float(low), float(high)
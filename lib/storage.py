@@ -0,0 +1,135 @@
+import logging
+import mmap
+import os
+import time
+
+import ollama
+
+from .models import drop_page_cache, model_blob_paths
+
+MB = 1024 * 1024
+
+# Read size for sequential reads; large enough that syscall overhead is noise
+READ_SIZE = 8 * MB
+
+def pull_model(model, client=ollama, progress=None):
+    """Pull a model, timing the download of every layer from the streamed progress.
+
+    `progress(status, digest, completed, total)` is called for every
+    progress event, e.g. to draw a progress bar. A layer already in the
+    store is complete in its very first event and is marked as cached;
+    any other layer counts as downloaded, however quickly it arrived.
+    """
+    layers = {}
+    start = time.perf_counter()
+    for event in client.pull(model, stream=True):
+        now = time.perf_counter()
+        digest = event.get('digest')
+        completed = event.get('completed') or 0
+        total = event.get('total') or 0
+        if progress:
+            progress(event.get('status') or '', digest, completed, total)
+        if not digest or not total:
+            continue
+        layer = layers.setdefault(digest, {"digest": digest, "size": total, "first": now, "start_bytes": completed,
+                                           "cached": completed >= total})
+        if completed > layer.get("completed", -1):
+            layer["last"] = now
+        layer["completed"] = completed
+    duration = time.perf_counter() - start
+
+    summary = []
+    downloaded = 0
+    for layer in layers.values():
+        elapsed = layer["last"] - layer["first"]
+        cached = layer["cached"]
+        transferred = 0 if cached else layer["completed"] - layer["start_bytes"]
+        downloaded += transferred
+        summary.append({
+            "digest": layer["digest"],
+            "size": layer["size"],
+            "downloaded": transferred,
+            "duration": elapsed,
+            "cached": cached,
+            "mb_per_second": transferred / MB / elapsed if transferred and elapsed > 0 else None
+        })
+    return {
+        "model": model,
+        "duration": duration,
+        "downloaded": downloaded,
+        "mb_per_second": downloaded / MB / duration if duration > 0 and downloaded else None,
+        "layers": summary
+    }
+
+def _sequential_read(paths, limit):
+    buffer = bytearray(READ_SIZE)
+    view = memoryview(buffer)
+    total = 0
+    start = time.perf_counter()
+    for path in paths:
+        with open(path, 'rb', buffering=0) as f:
+            while limit is None or total < limit:
+                count = f.readinto(view)
+                if not count:
+                    break
+                total += count
+    return total, time.perf_counter() - start
+
+def _mmap_read(paths, limit):
+    """Touch one byte per page, the access pattern of a runner mapping the weights"""
+    page = mmap.PAGESIZE
+    total = 0
+    start = time.perf_counter()
+    for path in paths:
+        if limit is not None and total >= limit:
+            break
+        size = os.path.getsize(path)
+        if not size:
+            continue
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = size if limit is None else min(size, limit - total)
+            checksum = 0
+            for offset in range(0, end, page):
+                checksum ^= mapped[offset]
+            total += end
+    return total, time.perf_counter() - start
+
+def _throughput(total, elapsed):
+    return total / MB / elapsed if elapsed > 0 else None
+
+def measure_blob_reads(model, limit=None):
+    """Read throughput of a model's blobs: sequential and mmap reads, cold and page-cached.
+
+    Only works against the local model store (see models.models_dir). Cold
+    reads evict the blobs from the page cache first; where that isn't
+    possible the "cold" numbers are really cached ones, which is flagged.
+    `limit` caps the bytes read per pass for very large models.
+    """
+    paths = sorted(model_blob_paths(model), key=os.path.getsize, reverse=True)
+    if not paths:
+        return None
+    size = sum(os.path.getsize(path) for path in paths)
+    logging.info(f"Reading {model} blobs ({size / MB:.0f} MB) from {os.path.dirname(paths[0])}...")
+
+    result = {"model": model, "size": size, "directory": os.path.dirname(paths[0])}
+    dropped = True
+    for method, read in (("sequential", _sequential_read), ("mmap", _mmap_read)):
+        dropped = drop_page_cache(paths) and dropped
+        cold = _throughput(*read(paths, limit))
+        cached = _throughput(*read(paths, limit))
+        result[method] = {"cold": cold, "cached": cached}
+    result["cache_dropped"] = dropped
+    result["bytes_read"] = size if limit is None else min(size, limit)
+    return result
+
+def run_storage_benchmark(models=None, client=ollama, limit=None):
+    """Blob read throughput of the installed models, with their ollama.list() sizes"""
+    entries = client.list().get('models', [])
+    results = []
+    for entry in entries:
+        name = str(entry.get('name') or entry.get('model'))
+        if models and name not in models and name.removesuffix(':latest') not in models:
+            continue
+        reads = measure_blob_reads(name, limit)
+        results.append({"model": name, "size": entry.get('size') or 0, "reads": reads})
+    return results
@@ -0,0 +1,206 @@
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime
+
+from .utils import convert_numpy
+
+DEFAULT_PATH = 'results/results.db'
+
+# Metrics checked by compare(); True means higher is better
+COMPARED_METRICS = {
+    "prompt_eval_speed": True,
+    "response_speed": True,
+    "ttft": False,
+    "latency": False
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    model TEXT NOT NULL,
+    model_digest TEXT,
+    host_fingerprint TEXT,
+    prompt_set TEXT,
+    options TEXT,
+    git_revision TEXT,
+    ollama_version TEXT,
+    prompt_eval_speed REAL,
+    response_speed REAL,
+    total_speed REAL,
+    ttft_p50 REAL,
+    model_load_time REAL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (model_digest, host_fingerprint, prompt_set, options);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, created_at);
+CREATE INDEX IF NOT EXISTS runs_run_id ON runs (run_id);
+CREATE INDEX IF NOT EXISTS samples_run ON samples (run, metric);
+"""
+
+def git_revision():
+    """Short git revision of this tool, or None outside a checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+class ResultStore:
+    """Append-only SQLite history of benchmark results.
+
+    Runs are keyed by model digest, host fingerprint, prompt set and
+    generation options so that only like-for-like results are compared.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        # Multi-host runs append from worker threads (serialised by the caller)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, result, run_id):
+        """Store one BenchmarkResult.to_dict() and its per-request samples"""
+        metadata = result.get("metadata") or {}
+        speeds = result.get("speeds") or {}
+        with self.conn:
+            cursor = self.conn.execute(
+                """INSERT INTO runs (run_id, created_at, model, model_digest, host_fingerprint, prompt_set,
+                                     options, git_revision, ollama_version, prompt_eval_speed, response_speed,
+                                     total_speed, ttft_p50, model_load_time, data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    run_id,
+                    datetime.now().isoformat(timespec='seconds'),
+                    result["model_name"],
+                    metadata.get("model_digest"),
+                    metadata.get("host_fingerprint"),
+                    result.get("prompt_set"),
+                    json.dumps(result.get("options") or {}, sort_keys=True),
+                    metadata.get("git_revision"),
+                    metadata.get("ollama_version"),
+                    speeds.get("prompt_eval"),
+                    speeds.get("response"),
+                    speeds.get("total"),
+                    (result.get("latency") or {}).get("ttft", {}).get("p50"),
+                    (result.get("performance") or {}).get("model_load_time"),
+                    json.dumps(result, default=convert_numpy)
+                )
+            )
+            row = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO samples (run, metric, value) VALUES (?, ?, ?)",
+                [(row, metric, float(value)) for metric, values in (result.get("samples") or {}).items()
+                 for value in values]
+            )
+        return row
+
+    def query(self, model=None, model_digest=None, host_fingerprint=None, run_id=None, since=None, limit=None):
+        """Return matching runs, newest first"""
+        clauses = []
+        params = []
+        for column, value in (("model", model), ("model_digest", model_digest),
+                              ("host_fingerprint", host_fingerprint), ("run_id", run_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        sql = "SELECT * FROM runs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def samples(self, row):
+        """Return {metric: [values]} for a stored run"""
+        samples = {}
+        for metric, value in self.conn.execute("SELECT metric, value FROM samples WHERE run = ?", (row,)):
+            samples.setdefault(metric, []).append(value)
+        return samples
+
+    def previous(self, run):
+        """The most recent like-for-like run stored before `run` that has per-request samples"""
+        row = self.conn.execute(
+            """SELECT * FROM runs
+               WHERE model_digest IS ? AND host_fingerprint IS ? AND prompt_set IS ? AND options = ? AND id < ?
+                     AND EXISTS (SELECT 1 FROM samples WHERE samples.run = runs.id)
+               ORDER BY id DESC LIMIT 1""",
+            (run["model_digest"], run["host_fingerprint"], run["prompt_set"], run["options"], run["id"])
+        ).fetchone()
+        return dict(row) if row else None
+
+    def matching(self, run, run_id):
+        """The like-for-like run from a given run_id"""
+        row = self.conn.execute(
+            """SELECT * FROM runs
+               WHERE model_digest IS ? AND host_fingerprint IS ? AND prompt_set IS ? AND options = ? AND run_id = ?
+               ORDER BY id DESC LIMIT 1""",
+            (run["model_digest"], run["host_fingerprint"], run["prompt_set"], run["options"], run_id)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def compare(self, baseline, candidate, threshold=0.05):
+        """Compare two stored runs metric by metric.
+
+        A change is a regression when it goes in the bad direction by more
+        than `threshold` and the bootstrap CI of the difference of means
+        excludes zero.
+        """
+        import numpy as np
+
+        from .stats import bootstrap_diff_ci
+
+        baseline_samples = self.samples(baseline["id"])
+        candidate_samples = self.samples(candidate["id"])
+        comparisons = []
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before = baseline_samples.get(metric)
+            after = candidate_samples.get(metric)
+            if not before or not after:
+                continue
+            before_mean = float(np.mean(before))
+            after_mean = float(np.mean(after))
+            change = (after_mean - before_mean) / before_mean if before_mean else 0
+            ci = bootstrap_diff_ci(before, after)
+            significant = ci is not None and (ci[0] > 0 or ci[1] < 0)
+            worse = change < -threshold if higher_is_better else change > threshold
+            better = change > threshold if higher_is_better else change < -threshold
+            comparisons.append({
+                "metric": metric,
+                "baseline": before_mean,
+                "candidate": after_mean,
+                "change": change,
+                "ci": ci,
+                "significant": significant,
+                "regression": significant and worse,
+                "improvement": significant and better
+            })
+        return comparisons
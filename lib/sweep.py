@@ -0,0 +1,123 @@
+import logging
+import random
+
+import numpy as np
+import ollama
+
+from .measure import check_deadline, stream_generate
+from .models import prime_model
+from .sampler import ResourceSampler
+
+DEFAULT_CONTEXT_LENGTHS = [128, 512, 2048, 8192, 32768]
+DEFAULT_OUTPUT_LENGTHS = [128]
+
+# Words for the synthetic filler text; a seeded shuffle keeps every prompt
+# unique so the server's prompt cache can't shortcut the prefill
+VOCABULARY = (
+    "system memory cache latency throughput model token layer weight tensor kernel thread "
+    "process request server client network storage matrix vector batch queue schedule "
+    "compute buffer stream signal energy power clock cycle branch predict decode encode "
+    "attention context window sequence position embedding gradient optimizer training "
+    "inference quantize precision float integer register pipeline parallel device host"
+).split()
+
+INSTRUCTION = "Read the following notes and then write a long, detailed summary of them.\n\n"
+
+# Extra context reserved on top of prompt + output when sizing num_ctx
+CONTEXT_MARGIN = 64
+
+def filler(words, seed):
+    """`words` random vocabulary words, reproducible from `seed`"""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+def synthetic_prompt(words, seed):
+    """Unique filler prompt of roughly `words` words (see calibrate for the token ratio)"""
+    return f"{INSTRUCTION}Notes #{seed}: {filler(words, seed)}"
+
+def context_size(tokens):
+    """Smallest power of two that fits the requested number of tokens"""
+    size = 256
+    while size < tokens:
+        size *= 2
+    return size
+
+def calibrate(model, options=None, client=ollama):
+    """Fit prompt_eval_count = overhead + tokens_per_word * words from two probes"""
+    probes = (64, 512)
+    counts = []
+    for i, words in enumerate(probes):
+        response = client.generate(model=model, prompt=synthetic_prompt(words, -1 - i),
+                                   options={**(options or {}), "num_predict": 1, "num_ctx": context_size(words * 4)})
+        counts.append(response.get('prompt_eval_count') or 0)
+    tokens_per_word = (counts[1] - counts[0]) / (probes[1] - probes[0])
+    if tokens_per_word <= 0:
+        tokens_per_word = 1.3  # Typical for English text with BPE tokenizers
+    overhead = max(0, counts[0] - tokens_per_word * probes[0])
+    return overhead, tokens_per_word
+
+def run_context_sweep(model, context_lengths=None, output_lengths=None, options=None, repeat=1, sample_rate=10,
+                      client=ollama, deadline=None):
+    """Measure prefill and decode speed as prompt and output length grow.
+
+    Prompts are synthesized to hit each target token count (calibrated with
+    the server's prompt_eval_count) and num_ctx is sized to fit them unless
+    it was set explicitly. Ollama runner memory and GPU memory per point
+    show how the KV cache grows with context. The model is reloaded with
+    each point's num_ctx before that point is measured.
+    """
+    context_lengths = context_lengths or DEFAULT_CONTEXT_LENGTHS
+    output_lengths = output_lengths or DEFAULT_OUTPUT_LENGTHS
+    options = dict(options or {})
+    overhead, tokens_per_word = calibrate(model, options, client)
+    logging.info(f"Calibrated {tokens_per_word:.2f} tokens/word (+{overhead:.0f} template tokens)")
+
+    sampler = ResourceSampler(rate=sample_rate).start()
+    points = []
+    seed = 0
+    try:
+        for target in context_lengths:
+            words = max(1, int((target - overhead) / tokens_per_word))
+            for output_length in output_lengths:
+                point_options = {**options, "num_predict": output_length}
+                point_options.setdefault("num_ctx", context_size(target + output_length + CONTEXT_MARGIN))
+                phase = f"ctx{target}_out{output_length}"
+                logging.info(f"Context {target} tokens, output {output_length} tokens...")
+                prime_model(model, point_options, client)
+
+                measurements = []
+                for _ in range(repeat):
+                    check_deadline(deadline)
+                    seed += 1
+                    measurement = stream_generate(model, synthetic_prompt(words, seed), point_options, client=client)
+                    sampler.add_phase(phase, measurement["start"], measurement["end"])
+                    measurements.append(measurement)
+
+                prompt_eval = sum(m["prompt_eval_duration"] for m in measurements)
+                evaluation = sum(m["eval_duration"] for m in measurements)
+                points.append({
+                    "target_context": target,
+                    "output_length": output_length,
+                    "num_ctx": point_options["num_ctx"],
+                    "prompt_tokens": float(np.mean([m["prompt_tokens"] for m in measurements])),
+                    "response_tokens": float(np.mean([m["response_tokens"] for m in measurements])),
+                    "prefill_speed": sum(m["prompt_tokens"] for m in measurements) / prompt_eval if prompt_eval > 0 else 0,
+                    "decode_speed": sum(m["response_tokens"] for m in measurements) / evaluation if evaluation > 0 else 0,
+                    "ttft": float(np.mean([m["ttft"] for m in measurements])),
+                    "phase": phase
+                })
+    finally:
+        resources = sampler.stop()
+
+    # Peak runner/GPU memory per point, relative to the smallest context
+    phases = resources.get("phases", {})
+    for point in points:
+        usage = phases.get(point.pop("phase"), {})
+        point["process_rss_mb"] = usage.get("process", {}).get("rss_mb", {}).get("max")
+        point["gpu_memory_mb"] = usage.get("gpu", {}).get("memory_mb", {}).get("max")
+    for key in ("process_rss_mb", "gpu_memory_mb"):
+        base = next((p[key] for p in points if p[key] is not None), None)
+        for point in points:
+            growth_key = key.replace("_mb", "_growth_mb")
+            point[growth_key] = point[key] - base if point[key] is not None and base is not None else None
+    return points
@@ -1,20 +1,78 @@
+import copy
 import psutil
-import GPUtil
-import cpuinfo
-import numpy as np
+import hashlib
+import json
+import os
 import time
 
+# Host specs are cached on disk; the cache is thrown away after a reboot or
+# a GPU driver update, the only times the hardware can have changed
+CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                          'ai-bench', 'host.json')
+CACHE_VERSION = 2  # Bumped to drop caches that recorded --telemetry fake/none GPUs
+
+_specs = None
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cache_key():
+    """Boot ID and GPU driver versions, which invalidate the cached specs when they change"""
+    boot_id = _read('/proc/sys/kernel/random/boot_id') or str(int(psutil.boot_time()))
+    drivers = {name: version for name in ('nvidia', 'amdgpu')
+               if (version := _read(f'/sys/module/{name}/version'))}
+    return {"version": CACHE_VERSION, "boot_id": boot_id, "drivers": drivers}
+
 class SystemInfo:
     @staticmethod
-    def get_system_specs():
+    def get_system_specs(refresh=False):
+        """Hardware specs of this host, computed once per boot and driver version.
+
+        Probing the CPU (py-cpuinfo runs a subprocess) and the GPUs takes
+        about a second, so the result is kept for the process and in
+        CACHE_PATH; `refresh` probes again regardless.
+        """
+        global _specs
+        if _specs is None or refresh:
+            key = cache_key()
+            cached = None
+            if not refresh:
+                try:
+                    with open(CACHE_PATH, encoding='utf-8') as f:
+                        cached = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            if cached and cached.get("key") == key:
+                _specs = cached["specs"]
+            else:
+                _specs = SystemInfo.probe_system_specs()
+                try:
+                    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+                    tmp = CACHE_PATH + '.tmp'
+                    with open(tmp, 'w', encoding='utf-8') as f:
+                        json.dump({"key": key, "specs": _specs}, f, indent=4)
+                    os.replace(tmp, CACHE_PATH)
+                except OSError:
+                    pass  # Read-only home; the specs are still kept for this process
+        return copy.deepcopy(_specs)
+
+    @staticmethod
+    def probe_system_specs():
+        """Query the CPU and GPUs directly, bypassing the cache"""
         try:
+            import cpuinfo
+
             cpu_info = cpuinfo.get_cpu_info()
             freq = cpu_info.get('hz_actual_friendly', 'Unknown')
             brand = cpu_info.get('brand_raw', 'Unknown CPU')
         except Exception:
             freq = "Unknown"
             brand = "Unknown CPU"
-            
+
         specs = {
             "cpu": {
                 "model": brand,
@@ -23,53 +81,31 @@ class SystemInfo:
                 "frequency": freq
             }
         }
-        
-        if GPUtil.getGPUs():
-            specs["gpu"] = [{"name": gpu.name} for gpu in GPUtil.getGPUs()]
-            
+
+        # The host's own GPUs, not the backends --telemetry picked (e.g. fake or none)
+        from .telemetry import host_backends
+
+        gpus = [{"name": name} for backend in host_backends() if backend.kind == "gpu" for name in backend.names]
+        if gpus:
+            specs["gpu"] = gpus
+
         return specs
 
     @staticmethod
-    def monitor_resources(duration):
-        samples = []
-        end_time = time.time() + duration
-        
-        while time.time() < end_time:
-            cpu = psutil.cpu_percent(interval=0.1)
-            gpu_data = None
-            
-            if GPUtil.getGPUs():
-                gpu = GPUtil.getGPUs()[0]
-                gpu_data = {"load": gpu.load * 100, "temperature": gpu.temperature}
-                
-            samples.append((cpu, gpu_data))
-            time.sleep(0.1)
-            
-        cpu_samples = [s[0] for s in samples]
-        
-        result = {
-            "cpu": {
-                "mean": np.mean(cpu_samples),
-                "max": np.max(cpu_samples),
-                "std": np.std(cpu_samples)
-            }
-        }
-        
-        if any(s[1] for s in samples):
-            gpu_loads = [s[1]["load"] for s in samples if s[1]]
-            gpu_temps = [s[1]["temperature"] for s in samples if s[1]]
-            
-            result["gpu"] = {
-                "load": {
-                    "mean": np.mean(gpu_loads),
-                    "max": np.max(gpu_loads),
-                    "std": np.std(gpu_loads)
-                },
-                "temperature": {
-                    "mean": np.mean(gpu_temps),
-                    "max": np.max(gpu_temps),
-                    "std": np.std(gpu_temps)
-                }
-            }
-            
-        return result
+    def fingerprint(specs):
+        """Stable short hash identifying a host's hardware configuration"""
+        # The current CPU frequency changes between runs, so leave it out
+        cpu = {k: v for k, v in specs.get("cpu", {}).items() if k != "frequency"}
+        stable = {"cpu": cpu, "gpu": specs.get("gpu")}
+        if specs.get("host"):
+            stable["host"] = specs["host"]
+        return hashlib.sha256(json.dumps(stable, sort_keys=True).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def monitor_resources(duration, rate=10):
+        """Sample resources for a fixed duration (see ResourceSampler for start/stop use)"""
+        from .sampler import ResourceSampler
+
+        sampler = ResourceSampler(rate=rate).start()
+        time.sleep(duration)
+        return sampler.stop()
@@ -0,0 +1,341 @@
+import ctypes
+import glob
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+# Fields every backend reports per device; missing readings are None.
+# load and temperature in %/°C, memory in MB, power in W, sm_clock in MHz,
+# throttle is an NVML clock event reason bitmask, energy a cumulative J counter
+DEVICE_FIELDS = ("load", "memory_used", "memory_total", "temperature", "power", "sm_clock", "throttle", "energy")
+
+# NVML clock throttle (event) reasons
+THROTTLE_REASONS = {
+    0x1: "gpu_idle",
+    0x2: "applications_clocks_setting",
+    0x4: "sw_power_cap",
+    0x8: "hw_slowdown",
+    0x10: "sync_boost",
+    0x20: "sw_thermal",
+    0x40: "hw_thermal",
+    0x80: "hw_power_brake",
+    0x100: "display_clocks",
+}
+
+# Reasons that mean the GPU is held back, rather than just idle or pinned
+LIMITING_REASONS = 0x4 | 0x8 | 0x20 | 0x40 | 0x80
+
+class NvmlError(RuntimeError):
+    pass
+
+class _Utilization(ctypes.Structure):
+    _fields_ = [("gpu", ctypes.c_uint), ("memory", ctypes.c_uint)]
+
+class _Memory(ctypes.Structure):
+    _fields_ = [("total", ctypes.c_ulonglong), ("free", ctypes.c_ulonglong), ("used", ctypes.c_ulonglong)]
+
+class NvmlLibrary:
+    """Minimal ctypes binding to NVML (libnvidia-ml), the library nvidia-smi uses.
+
+    Queries are in-process calls taking microseconds, instead of one
+    nvidia-smi process per sample. Readings a device doesn't support
+    (e.g. the energy counter before Volta) come back as None.
+    """
+
+    SUCCESS = 0
+    NOT_SUPPORTED = 3
+    TEMPERATURE_GPU = 0
+    CLOCK_SM = 1
+
+    def __init__(self):
+        if sys.platform == 'win32':
+            path = os.path.join(os.environ.get('ProgramFiles', r'C:\Program Files'),
+                                'NVIDIA Corporation', 'NVSMI', 'nvml.dll')
+            names = ['nvml.dll', path]
+        else:
+            names = ['libnvidia-ml.so.1', 'libnvidia-ml.so']
+        self.lib = None
+        for name in names:
+            try:
+                self.lib = ctypes.CDLL(name)
+                break
+            except OSError:
+                continue
+        if self.lib is None:
+            raise NvmlError("NVML library not found")
+        self._check(self.lib.nvmlInit_v2())
+        self.handles = []
+        count = ctypes.c_uint()
+        self._check(self.lib.nvmlDeviceGetCount_v2(ctypes.byref(count)))
+        for index in range(count.value):
+            handle = ctypes.c_void_p()
+            self._check(self.lib.nvmlDeviceGetHandleByIndex_v2(index, ctypes.byref(handle)))
+            self.handles.append(handle)
+
+    def _check(self, status):
+        if status == self.NOT_SUPPORTED:
+            return False
+        if status != self.SUCCESS:
+            raise NvmlError(f"NVML call failed with status {status}")
+        return True
+
+    def _read(self, function, index, ctype, *args):
+        value = ctype()
+        if not self._check(getattr(self.lib, function)(self.handles[index], *args, ctypes.byref(value))):
+            return None
+        return value
+
+    def device_count(self):
+        return len(self.handles)
+
+    def name(self, index):
+        buffer = ctypes.create_string_buffer(96)
+        self._check(self.lib.nvmlDeviceGetName(self.handles[index], buffer, len(buffer)))
+        return buffer.value.decode(errors='replace')
+
+    def utilization(self, index):
+        value = self._read('nvmlDeviceGetUtilizationRates', index, _Utilization)
+        return value.gpu if value is not None else None
+
+    def memory(self, index):
+        """(used, total) in bytes"""
+        value = self._read('nvmlDeviceGetMemoryInfo', index, _Memory)
+        return (value.used, value.total) if value is not None else (None, None)
+
+    def temperature(self, index):
+        value = self._read('nvmlDeviceGetTemperature', index, ctypes.c_uint, self.TEMPERATURE_GPU)
+        return value.value if value is not None else None
+
+    def power(self, index):
+        """Power draw in mW"""
+        value = self._read('nvmlDeviceGetPowerUsage', index, ctypes.c_uint)
+        return value.value if value is not None else None
+
+    def sm_clock(self, index):
+        value = self._read('nvmlDeviceGetClockInfo', index, ctypes.c_uint, self.CLOCK_SM)
+        return value.value if value is not None else None
+
+    def throttle_reasons(self, index):
+        value = self._read('nvmlDeviceGetCurrentClocksThrottleReasons', index, ctypes.c_ulonglong)
+        return value.value if value is not None else None
+
+    def energy(self, index):
+        """Energy consumed since the driver loaded, in mJ"""
+        value = self._read('nvmlDeviceGetTotalEnergyConsumption', index, ctypes.c_ulonglong)
+        return value.value if value is not None else None
+
+class NvmlBackend:
+    """NVIDIA GPUs through NVML; `library` may be a stand-in such as fake.FakeNvml"""
+
+    kind = "gpu"
+
+    def __init__(self, library=None):
+        self.library = library or NvmlLibrary()
+        self.names = [self.library.name(i) for i in range(self.library.device_count())]
+
+    def sample(self):
+        devices = []
+        for index in range(len(self.names)):
+            used, total = self.library.memory(index)
+            power = self.library.power(index)
+            energy = self.library.energy(index)
+            devices.append({
+                "load": self.library.utilization(index),
+                "memory_used": used / (1024 * 1024) if used is not None else None,
+                "memory_total": total / (1024 * 1024) if total is not None else None,
+                "temperature": self.library.temperature(index),
+                "power": power / 1000 if power is not None else None,
+                "sm_clock": self.library.sm_clock(index),
+                "throttle": self.library.throttle_reasons(index),
+                "energy": energy / 1000 if energy is not None else None,
+            })
+        return devices
+
+def _rocm_number(card, *keys):
+    for key, value in card.items():
+        if any(k in key for k in keys):
+            try:
+                return float(str(value).strip('()').lower().removesuffix('mhz'))
+            except ValueError:
+                continue
+    return None
+
+class RocmSmiBackend:
+    """AMD GPUs through `rocm-smi --json`.
+
+    This still runs one process per sample, so keep the sample rate modest
+    on ROCm hosts. rocm-smi has no throttle reasons or energy counter.
+    """
+
+    kind = "gpu"
+    COMMAND = ['rocm-smi', '--showuse', '--showpower', '--showtemp', '--showclocks',
+               '--showmeminfo', 'vram', '--showproductname', '--json']
+
+    def __init__(self):
+        if not shutil.which('rocm-smi'):
+            raise RuntimeError("rocm-smi not found")
+        cards = self._query()
+        if not cards:
+            raise RuntimeError("rocm-smi reports no GPUs")
+        self.names = [card.get("Card series") or card.get("Card model") or name for name, card in cards.items()]
+
+    def _query(self):
+        output = subprocess.run(self.COMMAND, capture_output=True, text=True, timeout=10).stdout
+        return {name: card for name, card in json.loads(output or '{}').items() if name.startswith('card')}
+
+    def sample(self):
+        devices = []
+        for card in self._query().values():
+            used = _rocm_number(card, "VRAM Total Used Memory")
+            total = _rocm_number(card, "VRAM Total Memory")
+            devices.append({
+                "load": _rocm_number(card, "GPU use"),
+                "memory_used": used / (1024 * 1024) if used is not None else None,
+                "memory_total": total / (1024 * 1024) if total is not None else None,
+                "temperature": _rocm_number(card, "Temperature (Sensor edge)", "Temperature (Sensor junction)"),
+                "power": _rocm_number(card, "Graphics Package Power"),
+                "sm_clock": _rocm_number(card, "sclk clock speed"),
+                "throttle": None,
+                "energy": None,
+            })
+        return devices
+
+class GputilBackend:
+    """Any GPU nvidia-smi can see, through GPUtil (one nvidia-smi run per sample).
+
+    Only a fallback when NVML can't be loaded directly: no power, clocks or
+    throttle reasons.
+    """
+
+    kind = "gpu"
+
+    def __init__(self):
+        import GPUtil
+
+        self.gputil = GPUtil
+        gpus = GPUtil.getGPUs()
+        if not gpus:
+            raise RuntimeError("GPUtil reports no GPUs")
+        self.names = [gpu.name for gpu in gpus]
+
+    def sample(self):
+        return [{
+            "load": gpu.load * 100,
+            "memory_used": gpu.memoryUsed,
+            "memory_total": gpu.memoryTotal,
+            "temperature": gpu.temperature,
+            "power": None,
+            "sm_clock": None,
+            "throttle": None,
+            "energy": None,
+        } for gpu in self.gputil.getGPUs()]
+
+class RaplBackend:
+    """CPU package power from the Linux powercap (Intel/AMD RAPL) energy counters.
+
+    The counters are root-only on most kernels. Apple Silicon only exposes
+    power through `sudo powermetrics`, so macOS hosts get no CPU power.
+    """
+
+    kind = "cpu"
+
+    def __init__(self):
+        self.domains = []
+        for path in sorted(glob.glob('/sys/class/powercap/intel-rapl:[0-9]*')):
+            if ':' in os.path.basename(path).split('rapl:', 1)[1]:
+                continue  # Subdomains (core, uncore, dram) are included in the package
+            with open(os.path.join(path, 'name')) as f:
+                name = f.read().strip()
+            with open(os.path.join(path, 'max_energy_range_uj')) as f:
+                wrap = int(f.read())
+            self.domains.append((name, os.path.join(path, 'energy_uj'), wrap))
+        if not self.domains:
+            raise RuntimeError("No RAPL powercap domains")
+        self.names = [name for name, _, _ in self.domains]
+        self.energy = [0.0] * len(self.domains)
+        self.last = [self._read(path) for _, path, _ in self.domains]  # Fails early when not readable
+        self.last_time = time.perf_counter()
+
+    def _read(self, path):
+        with open(path) as f:
+            return int(f.read())
+
+    def sample(self):
+        now = time.perf_counter()
+        elapsed = now - self.last_time
+        devices = []
+        for i, (_, path, wrap) in enumerate(self.domains):
+            value = self._read(path)
+            delta = value - self.last[i]
+            if delta < 0:
+                delta += wrap
+            self.last[i] = value
+            self.energy[i] += delta / 1e6
+            devices.append({
+                "load": None, "memory_used": None, "memory_total": None, "temperature": None,
+                "power": delta / 1e6 / elapsed if elapsed > 0 else None,
+                "sm_clock": None, "throttle": None, "energy": self.energy[i],
+            })
+        self.last_time = now
+        return devices
+
+BACKENDS = {
+    "nvml": NvmlBackend,
+    "rocm": RocmSmiBackend,
+    "gputil": GputilBackend,
+    "rapl": RaplBackend,
+}
+
+_detected = None
+_selected = None
+
+def host_backends():
+    """The first GPU backend that works on this host, plus CPU package power if readable.
+
+    Always the real hardware, whatever select_backends chose for sampling.
+    """
+    global _detected
+    if _detected is None:
+        _detected = []
+        for name in ("nvml", "rocm", "gputil"):
+            try:
+                _detected.append(BACKENDS[name]())
+                break
+            except Exception as e:
+                logging.debug(f"Telemetry backend {name} unavailable: {str(e)}")
+        try:
+            _detected.append(RaplBackend())
+        except Exception as e:
+            logging.debug(f"Telemetry backend rapl unavailable: {str(e)}")
+    return _detected
+
+def detect_backends():
+    """Backends samplers use: those picked with select_backends, else host_backends()"""
+    return _selected if _selected is not None else host_backends()
+
+def select_backends(names):
+    """Use these backends (see get_backends) for every sampler from now on"""
+    global _selected
+    _selected = get_backends(names)
+
+def get_backends(names=None):
+    """Backends by name ('auto', 'none', 'fake' or keys of BACKENDS); None means auto"""
+    if not names or names == ["auto"]:
+        return host_backends()
+    backends = []
+    for name in names:
+        if name == "none":
+            continue
+        if name == "fake":
+            from .fake import FakeNvml
+            backends.append(NvmlBackend(FakeNvml()))
+        elif name in BACKENDS:
+            backends.append(BACKENDS[name]())
+        else:
+            raise ValueError(f"Unknown telemetry backend '{name}' (choose from auto, none, fake, "
+                             f"{', '.join(BACKENDS)})")
+    return backends
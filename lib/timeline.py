@@ -0,0 +1,114 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+NS_PER_SECOND = 1_000_000_000
+
+# Sidecar format: one .npy file per column plus meta.json. Token and request
+# times are int64 nanoseconds since the result's origin; request i owns
+# tokens[request_index[i]:request_index[i + 1]]
+FORMAT_VERSION = 1
+COLUMNS = ("tokens", "request_index", "request_start", "request_end", "request_group")
+
+class TokenTimeline:
+    """Arrival time of every streamed token of a result, in columnar int64 buffers.
+
+    Buffers are array('q'), so adding a request is a memcpy of its token
+    array rather than one Python float object per token, and saving writes
+    them straight to .npy files. Requests are tagged with a group (the
+    measured passes, or a concurrency level) so sweeps can be told apart.
+    """
+
+    def __init__(self):
+        self.tokens = array('q')
+        self.request_index = array('q', [0])
+        self.request_start = array('q')
+        self.request_end = array('q')
+        self.request_group = array('q')
+        self.groups = []
+
+    def __len__(self):
+        return len(self.request_start)
+
+    def add(self, measurement, group="requests"):
+        """Append one measurement from measure.stream_generate"""
+        token_ns = measurement.get("token_ns")
+        if token_ns is None:
+            # Restored from a checkpoint, which keeps float seconds
+            token_ns = array('q', (round(t * NS_PER_SECOND) for t in measurement["token_times"]))
+        if group not in self.groups:
+            self.groups.append(group)
+        self.tokens.extend(token_ns)
+        self.request_index.append(len(self.tokens))
+        self.request_start.append(round(measurement["start"] * NS_PER_SECOND))
+        self.request_end.append(round(measurement["end"] * NS_PER_SECOND))
+        self.request_group.append(self.groups.index(group))
+
+    def save(self, directory, origin=None):
+        """Write the sidecar to `directory`, times relative to `origin` (perf_counter seconds)"""
+        os.makedirs(directory, exist_ok=True)
+        origin_ns = round(origin * NS_PER_SECOND) if origin is not None else (self.request_start[0] if self else 0)
+        for column in COLUMNS:
+            values = np.frombuffer(getattr(self, column), dtype=np.int64)
+            if column in ("tokens", "request_start", "request_end"):
+                values = values - origin_ns
+            np.save(os.path.join(directory, f"{column}.npy"), values)
+        meta = {"version": FORMAT_VERSION, "unit": "ns", "groups": self.groups,
+                "requests": len(self), "tokens": len(self.tokens)}
+        with open(os.path.join(directory, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=4)
+        return meta
+
+class SavedTimeline:
+    """A sidecar written by TokenTimeline.save, memory-mapped by default.
+
+    Columns are read-only NumPy arrays backed by the files, so opening a
+    timeline of tens of millions of tokens costs nothing until it is read.
+    """
+
+    def __init__(self, directory, mmap=True):
+        with open(os.path.join(directory, "meta.json"), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported token timeline version {self.meta.get('version')} in {directory}")
+        self.groups = self.meta["groups"]
+        for column in COLUMNS:
+            setattr(self, column, np.load(os.path.join(directory, f"{column}.npy"), mmap_mode='r' if mmap else None))
+
+    def __len__(self):
+        return len(self.request_start)
+
+    def request(self, index):
+        """Token arrival times of one request, in ns since the origin"""
+        return self.tokens[self.request_index[index]:self.request_index[index + 1]]
+
+    def group_mask(self, group):
+        """Boolean mask over the requests belonging to `group`"""
+        return np.asarray(self.request_group) == self.groups.index(group)
+
+    def inter_token_latencies(self, group=None):
+        """Gaps between consecutive tokens within each request, in seconds"""
+        gaps = np.diff(self.tokens)
+        # Drop the gap across every request boundary
+        same_request = np.ones(len(gaps), dtype=bool)
+        boundaries = np.asarray(self.request_index[1:-1]) - 1
+        same_request[boundaries[(boundaries >= 0) & (boundaries < len(gaps))]] = False
+        if group is not None:
+            owner = np.repeat(np.asarray(self.request_group), np.diff(self.request_index))[:-1]
+            same_request &= owner == self.groups.index(group)
+        return gaps[same_request] / NS_PER_SECOND
+
+    def ttft(self, group=None):
+        """Time to first token of each request with tokens, in seconds"""
+        counts = np.diff(self.request_index)
+        mask = counts > 0
+        if group is not None:
+            mask &= self.group_mask(group)
+        first = np.asarray(self.tokens)[np.asarray(self.request_index[:-1])[mask]]
+        return (first - np.asarray(self.request_start)[mask]) / NS_PER_SECOND
+
+def load_timeline(directory, mmap=True):
+    """Open a token timeline sidecar (see SavedTimeline)"""
+    return SavedTimeline(directory, mmap)
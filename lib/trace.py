@@ -0,0 +1,88 @@
+import csv
+import gzip
+import itertools
+import json
+import logging
+from datetime import datetime
+
+import ollama
+
+from .sweep import calibrate, synthetic_prompt
+
+# Accepted column names, in order of preference
+TIMESTAMP_FIELDS = ("timestamp", "time", "arrival_time", "ts")
+PROMPT_LENGTH_FIELDS = ("prompt_tokens", "prompt_length", "input_tokens")
+OUTPUT_LENGTH_FIELDS = ("max_tokens", "num_predict", "output_tokens")
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def read_trace(path):
+    """Lazily yield request records from a JSONL or CSV request log (optionally .gz)"""
+    with _open(path) as f:
+        if path.removesuffix('.gz').endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _first(record, fields):
+    for field in fields:
+        value = record.get(field)
+        if value not in (None, ''):
+            return value
+    return None
+
+def _timestamp(value):
+    """Seconds since the epoch from a number or an ISO 8601 string"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+def trace_arrivals(records, model=None, speedup=1.0, limit=None, use_trace_models=False, client=ollama,
+                   calibration=None):
+    """Turn trace records into (offset, request) pairs for openloop.run_open_loop.
+
+    Inter-arrival gaps are preserved, divided by `speedup` (2.0 replays
+    twice as fast). Records with only a prompt length get a synthetic
+    prompt of about that many tokens, sized with `calibration` (the
+    (overhead, tokens_per_word) of sweep.calibrate). Calibrate before the
+    replay clock starts: calibrating here, on the first such record, blocks
+    the dispatcher. Unless `use_trace_models` is set, every request goes to
+    `model` so replays are comparable across models.
+    """
+    first = None
+    for index, record in enumerate(itertools.islice(records, limit)):
+        timestamp = _first(record, TIMESTAMP_FIELDS)
+        if timestamp is None:
+            logging.warning(f"Skipping trace record {index} without a timestamp")
+            continue
+        timestamp = _timestamp(timestamp)
+        if first is None:
+            first = timestamp
+
+        request = {}
+        if record.get('prompt'):
+            request["prompt"] = record['prompt']
+        else:
+            length = _first(record, PROMPT_LENGTH_FIELDS)
+            if length is None:
+                logging.warning(f"Skipping trace record {index} without a prompt or prompt length")
+                continue
+            if calibration is None:
+                logging.warning("Calibrating prompt lengths during the replay, arrivals will be delayed")
+                calibration = calibrate(model, client=client)
+            overhead, tokens_per_word = calibration
+            request["prompt"] = synthetic_prompt(max(1, int((float(length) - overhead) / tokens_per_word)), index)
+
+        output_length = _first(record, OUTPUT_LENGTH_FIELDS)
+        if output_length is not None:
+            request["num_predict"] = int(float(output_length))
+        if use_trace_models and record.get('model'):
+            request["model"] = record['model']
+
+        yield (timestamp - first) / speedup, request
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3.12
 import sys
 import os
-from lib import run_benchmark_main as run_benchmark
 
 from lib.utils import Colors
 
@@ -24,17 +23,26 @@ def manage_models():
         print(colorize_menu("Download model", 1))
         print(colorize_menu("List installed models", 2))
         print(colorize_menu("Delete model", 3))
-        print(colorize_menu("Back to main menu", 4))
+        print(colorize_menu("Benchmark model storage", 4))
+        print(colorize_menu("Back to main menu", 5))
         
-        choice = input("\nEnter your choice (1-4): ")
+        choice = input("\nEnter your choice (1-5): ")
         
         if choice == '1':
             print("\nFind available models at: https://ollama.com/search")
             model = input("\nEnter model name (e.g., llama3.2:3b): ")
             print(f"\nDownloading {model}...")
             try:
-                import ollama
-                ollama.pull(model)
+                from lib.analysis import print_pull
+                from lib.storage import pull_model
+
+                def progress(status, digest, completed, total):
+                    line = f"{status} {completed / total:.0%}" if total else status
+                    print(f"\r{line[:70]:<70}", end='', flush=True)
+
+                pull = pull_model(model, progress=progress)
+                print()
+                print_pull(pull)
                 print(f"\n{Colors.GREEN}{model} downloaded successfully!{Colors.END}")
             except Exception as e:
                 print(f"\n{Colors.FAIL}Error downloading model: {str(e)}{Colors.END}")
@@ -102,6 +110,22 @@ def manage_models():
             input("\nPress Enter to continue...")
             
         elif choice == '4':
+            try:
+                from lib.analysis import print_storage
+                from lib.storage import run_storage_benchmark
+
+                print("\nReading every installed model's blobs, cold and cached (this can take a while)...")
+                results = run_storage_benchmark()
+                if not results:
+                    print("No models installed")
+                else:
+                    print_storage(results)
+            except Exception as e:
+                print(f"\n{Colors.FAIL}Error benchmarking storage: {str(e)}{Colors.END}")
+                print(f"{Colors.WARNING}Make sure Ollama is running (ollama serve){Colors.END}")
+            input("\nPress Enter to continue...")
+
+        elif choice == '5':
             return
             
         else:
@@ -131,7 +155,14 @@ def get_benchmark_options():
             prompts.append(prompt)
         if prompts:
             options['prompts'] = prompts
-    
+
+    if input("Run concurrency sweep? (y/N): ").lower().startswith('y'):
+        levels = input("Concurrency levels (space-separated, Enter for 1 2 4 8 16): ").strip()
+        try:
+            options['concurrency'] = [int(level) for level in levels.split()] if levels else [1, 2, 4, 8, 16]
+        except ValueError:
+            print(f"\n{Colors.WARNING}Invalid concurrency levels, skipping sweep...{Colors.END}")
+
     try:
         import ollama
         print("\nAvailable models:")
@@ -209,6 +240,8 @@ def main():
                 # Extract models and create kwargs for run_benchmark
                 selected_models = options.pop('models', None) if options else None
                 if selected_models:
+                    from lib import run_benchmark_main as run_benchmark
+
                     run_benchmark(models=selected_models, **options or {})
                 else:
                     print(f"{Colors.FAIL}Error: No models selected for benchmark{Colors.END}")
@@ -231,6 +264,9 @@ def main():
 
 if __name__ == "__main__":
     try:
+        if len(sys.argv) > 1:
+            from lib.cli import main as cli_main
+            sys.exit(cli_main(sys.argv[1:], interactive=main))
         main()
     except KeyboardInterrupt:
         print(f"\n{Colors.WARNING}Operation cancelled by user{Colors.END}")
@@ -0,0 +1,10 @@
+import pytest
+
+from lib.fake import FakeClient
+from lib.sweep import run_context_sweep
+
+@pytest.mark.parametrize("target", [64, 256, 1024])
+def test_context_sweep_hits_target_prompt_tokens(target):
+    client = FakeClient(tokens_per_second=0, ttft=0, prompt_tokens_per_second=0, response_tokens=4)
+    points = run_context_sweep("fake:latest", [target], [4], sample_rate=0, client=client)
+    assert points[0]["prompt_tokens"] == pytest.approx(target, rel=0.02, abs=2)